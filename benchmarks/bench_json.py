@@ -0,0 +1,115 @@
+"""Micro-benchmark JSON parsing/serialisation of large API payloads.
+
+Compares the json module with tre.json_codec (which uses orjson when installed) on synthetic
+workspace and operation list payloads, and checks that tre.json_codec.dumps output matches json.dumps.
+Also compares the built-in jsonc colorizer with pygments (when installed).
+
+Usage: python benchmarks/bench_json.py [--repeat 5] [--workspaces 5000] [--operations 20000] [--output results.json]
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.stub_api import make_operation, make_workspace, make_workspace_id  # noqa: E402
+from tre import json_codec  # noqa: E402
+from tre.jsonc import iter_jsonc  # noqa: E402
+
+
+def _make_payloads(workspace_count: int, operation_count: int) -> "dict[str, bytes]":
+    workspaces = {"workspaces": [make_workspace(index) for index in range(workspace_count)]}
+    operations = {"operations": [
+        make_operation(index, f"/workspaces/{make_workspace_id(index % max(1, workspace_count))}")
+        for index in range(operation_count)]}
+    return {
+        "workspaces": json.dumps(workspaces).encode("utf-8"),
+        "operations": json.dumps(operations).encode("utf-8"),
+    }
+
+
+def _time_ms(func, repeat: int) -> "list[float]":
+    func()  # warm up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _summarise(name: str, samples: "list[float]", **extra) -> dict:
+    return {
+        "name": name,
+        "kind": "json",
+        "unit": "ms",
+        "samples": [round(sample, 3) for sample in samples],
+        "min": round(min(samples), 3),
+        "median": round(statistics.median(samples), 3),
+        "mean": round(statistics.mean(samples), 3),
+        **extra,
+    }
+
+
+def bench_payload(name: str, payload: bytes, repeat: int) -> "list[dict]":
+    parsed = json.loads(payload)
+    if json_codec.dumps(parsed, indent=2) != json.dumps(parsed, indent=2):
+        raise RuntimeError(f"json_codec.dumps output differs from json.dumps for {name}")
+
+    size = {"payload_bytes": len(payload)}
+    backend = json_codec.get_backend()
+    results = [
+        _summarise(f"loads:{name}:json", _time_ms(lambda: json.loads(payload), repeat), **size),
+        _summarise(f"loads:{name}:{backend}", _time_ms(lambda: json_codec.loads(payload), repeat), **size),
+        _summarise(f"dumps_indent:{name}:json", _time_ms(lambda: json.dumps(parsed, indent=2), repeat), **size),
+        _summarise(f"dumps_indent:{name}:{backend}", _time_ms(lambda: json_codec.dumps(parsed, indent=2), repeat), **size),
+        _summarise(f"dumps_body:{name}:json", _time_ms(lambda: json.dumps(parsed).encode("utf-8"), repeat), **size),
+        _summarise(f"dumps_body:{name}:{backend}", _time_ms(lambda: json_codec.dumps_bytes(parsed), repeat), **size),
+        _summarise(f"jsonc:{name}:builtin", _time_ms(lambda: "".join(iter_jsonc(parsed)), repeat), **size),
+    ]
+    try:
+        from pygments import highlight, lexers, formatters
+    except ImportError:
+        return results
+
+    def pygments_jsonc():
+        highlight(json_codec.dumps(parsed, indent=2), lexers.JsonLexer(), formatters.TerminalFormatter())
+    results.append(_summarise(f"jsonc:{name}:pygments", _time_ms(pygments_jsonc, repeat), **size))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Number of samples per benchmark")
+    parser.add_argument("--output", help="File to write JSON results to (default: stdout)")
+    parser.add_argument("--workspaces", type=int, default=5000, help="Number of workspaces in the workspace list payload")
+    parser.add_argument("--operations", type=int, default=20000, help="Number of operations in the operation list payload")
+    args = parser.parse_args()
+
+    results = []
+    for name, payload in _make_payloads(args.workspaces, args.operations).items():
+        results += bench_payload(name, payload, args.repeat)
+
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "json_backend": json_codec.get_backend(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(report_json, encoding="utf-8")
+    else:
+        print(report_json)
+
+
+if __name__ == "__main__":
+    main()
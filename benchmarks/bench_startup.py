@@ -0,0 +1,215 @@
+"""Benchmark CLI startup, --help and shell completion latency.
+
+Results are written as JSON. Pass --baseline with a previous results file to fail
+(exit code 1) when a benchmark's median regresses by more than --max-regression.
+
+Usage: python benchmarks/bench_startup.py [--repeat 5] [--output results.json] [--baseline baseline.json]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.stub_api import StubTreApi, make_workspace_id  # noqa: E402
+
+# Run the CLI from source with a fixed program name (so that _TRE_COMPLETE is used for completion)
+CLI_COMMAND = [sys.executable, "-c", "from tre.main import cli; cli(prog_name='tre')"]
+
+ROOT_SCOPE = "api://bench-root"
+TENANT_ID = "bench-tenant"
+CLIENT_ID = "bench-client"
+
+IMPORT_MODULES = [
+    "tre.main",
+    "tre.api_client",
+    "tre.output",
+]
+
+WORKSPACE_ID = make_workspace_id(1)
+WORKSPACE_SERVICE_ID = f"{WORKSPACE_ID[:8]}-0001-4000-8000-000000000000"
+
+# name -> command line words to complete (the last word is the one being completed)
+COMPLETION_CASES = {
+    "workspace_id_completion": ["workspace", ""],
+    "workspace_service_id_completion": ["workspace", WORKSPACE_ID, "workspace-service", ""],
+    "user_resource_id_completion": ["workspace", WORKSPACE_ID, "workspace-service", WORKSPACE_SERVICE_ID, "user-resource", ""],
+    "airlock_id_completion": ["workspace", WORKSPACE_ID, "airlock", ""],
+    "workspace_template_name_completion": ["workspace-template", ""],
+    "workspace_service_template_name_completion": ["workspace-service-template", ""],
+    "user_resource_template_name_completion": ["workspace-service-template", "tre-template-0", "user-resource-template", ""],
+    "shared_service_template_name_completion": ["shared-service-template", ""],
+}
+
+
+def _summarise(name: str, kind: str, samples: "list[float]", **extra) -> dict:
+    return {
+        "name": name,
+        "kind": kind,
+        "unit": "ms",
+        "samples": [round(sample, 3) for sample in samples],
+        "min": round(min(samples), 3),
+        "median": round(statistics.median(samples), 3),
+        "mean": round(statistics.mean(samples), 3),
+        **extra,
+    }
+
+
+def _time_process(args: "list[str]", env: dict) -> "tuple[float, str]":
+    start = time.perf_counter()
+    result = subprocess.run(args, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Command failed ({result.returncode}): {args}\n{result.stderr.decode()}")
+    return elapsed, result.stdout.decode()
+
+
+def _import_time_ms(module: str, env: dict) -> float:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    # lines are: "import time: self [us] | cumulative | imported package"
+    # the top-level entry for the module is the last line with no indentation
+    pattern = re.compile(r"^import time:\s*\d+\s*\|\s*(\d+)\s*\| " + re.escape(module) + "$")
+    for line in reversed(result.stderr.decode().splitlines()):
+        match = pattern.match(line)
+        if match:
+            return int(match.group(1)) / 1000
+    raise RuntimeError(f"Unable to find import time for {module}")
+
+
+def bench_imports(modules: "list[str]", repeat: int, env: dict) -> "list[dict]":
+    results = []
+    for module in modules:
+        cold_samples = []
+        for _ in range(repeat):
+            # an empty bytecode cache forces every module to be compiled from source
+            with tempfile.TemporaryDirectory() as pycache_dir:
+                cold_samples.append(_import_time_ms(module, {**env, "PYTHONPYCACHEPREFIX": pycache_dir}))
+        _import_time_ms(module, env)  # ensure bytecode is cached
+        warm_samples = [_import_time_ms(module, env) for _ in range(repeat)]
+        results.append(_summarise(f"import:{module}:cold", "import", cold_samples))
+        results.append(_summarise(f"import:{module}:warm", "import", warm_samples))
+    return results
+
+
+def bench_help(repeat: int, env: dict) -> "list[dict]":
+    _time_process(CLI_COMMAND + ["--help"], env)  # warm up
+    samples = [_time_process(CLI_COMMAND + ["--help"], env)[0] for _ in range(repeat)]
+    return [_summarise("tre --help", "help", samples)]
+
+
+def bench_completions(repeat: int, env: dict) -> "list[dict]":
+    results = []
+    for name, words in COMPLETION_CASES.items():
+        completion_env = {
+            **env,
+            "_TRE_COMPLETE": "bash_complete",
+            "COMP_WORDS": " ".join(["tre"] + words),
+            "COMP_CWORD": str(len(words)),
+        }
+        # first call populates any caches (e.g. workspace scope, completion candidates)
+        _time_process(CLI_COMMAND, completion_env)
+        time.sleep(1)  # allow any background refresh to complete
+        samples = []
+        for _ in range(repeat):
+            elapsed, output = _time_process(CLI_COMMAND, completion_env)
+            samples.append(elapsed)
+        results.append(_summarise(f"complete:{name}", "completion", samples, candidates=len(output.splitlines())))
+    return results
+
+
+def _create_home(home_dir: Path, stub: StubTreApi) -> None:
+    """Set up a logged-in (client-credentials) config pointing at the stub API with cached tokens."""
+    config_dir = home_dir / ".config" / "tre"
+    config_dir.mkdir(parents=True)
+    (config_dir / "environment.json").write_text(json.dumps({
+        "base-url": stub.base_url,
+        "login-method": "client-credentials",
+        "client-id": CLIENT_ID,
+        "client-secret": "not-a-secret",
+        "aad-tenant-id": TENANT_ID,
+        "api-scope": ROOT_SCOPE,
+        "verify": False,
+    }), encoding="utf-8")
+
+    # Pre-populate the access token cache so that no calls are made to AAD
+    from tre.token_cache import AccessTokenCache
+    token_cache = AccessTokenCache(config_dir / "access_token_cache.json")
+    log = logging.getLogger(__name__)
+    for scope in [ROOT_SCOPE] + stub.workspace_scopes():
+        key = AccessTokenCache.get_key(TENANT_ID, CLIENT_ID, scope)
+        token_cache.get_or_acquire_token(log, key, lambda: {"access_token": "benchmark-token", "expires_in": 24 * 60 * 60})
+
+
+def _compare(results: "list[dict]", baseline_file: str, max_regression: float) -> "list[str]":
+    baseline = {result["name"]: result for result in json.loads(Path(baseline_file).read_text())["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["name"])
+        if previous and result["median"] > previous["median"] * max_regression:
+            regressions.append(f"{result['name']}: {previous['median']}ms -> {result['median']}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Number of samples per benchmark")
+    parser.add_argument("--output", help="File to write JSON results to (default: stdout)")
+    parser.add_argument("--baseline", help="Previous results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=1.25, help="Allowed ratio of median to baseline median")
+    parser.add_argument("--workspaces", type=int, default=200, help="Number of workspaces served by the stub API")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home_dir, StubTreApi(workspace_count=args.workspaces) as stub:
+        env = {key: value for key, value in os.environ.items() if not key.startswith("TRECLI_")}
+        env.update({"HOME": home_dir, "USERPROFILE": home_dir, "PYTHONPATH": str(REPO_ROOT)})
+        _create_home(Path(home_dir), stub)
+
+        modules = IMPORT_MODULES + _get_command_modules()
+        results = bench_imports(modules, args.repeat, env)
+        results += bench_help(args.repeat, env)
+        results += bench_completions(args.repeat, env)
+
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(report_json, encoding="utf-8")
+    else:
+        print(report_json)
+
+    if args.baseline:
+        regressions = _compare(results, args.baseline, args.max_regression)
+        if regressions:
+            print("Regressions found:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+def _get_lazy_subcommands() -> "dict[str, tuple[str, str]]":
+    from tre.main import cli
+    return cli.lazy_subcommands
+
+
+def _get_command_modules() -> "list[str]":
+    return sorted(set(import_path.rsplit(".", 1)[0] for import_path, _ in _get_lazy_subcommands().values()))
+
+
+if __name__ == "__main__":
+    main()
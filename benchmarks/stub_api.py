@@ -0,0 +1,171 @@
+"""A minimal local stand-in for the TRE API, used by the benchmarks.
+
+Run directly to serve on a given port: python benchmarks/stub_api.py --port 8000
+"""
+import argparse
+import json
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_workspace_id(index: int) -> str:
+    return f"{index:08x}-0000-4000-8000-000000000000"
+
+
+def make_workspace(index: int) -> dict:
+    return {
+        "id": make_workspace_id(index),
+        "templateName": "tre-workspace-base",
+        "templateVersion": "0.5.1",
+        "deploymentStatus": "deployed",
+        "isEnabled": True,
+        "_etag": f"\"{index:08x}-etag\"",
+        "workspaceURL": "",
+        "resourcePath": f"/workspaces/{make_workspace_id(index)}",
+        "properties": {
+            "display_name": f"Workspace {index}",
+            "description": "A workspace created for benchmarking the TRE CLI",
+            "scope_id": f"api://ws-{index:08x}",
+            "address_space_size": "small",
+        },
+    }
+
+
+def make_operation(index: int, resource_path: str) -> dict:
+    created = 1660000000.0 + index * 60
+    return {
+        "id": f"{index:08x}-1111-4000-8000-000000000000",
+        "resourceId": resource_path.split("/")[-1],
+        "resourcePath": resource_path,
+        "resourceVersion": 0,
+        "status": "deployed",
+        "action": "install",
+        "message": "Deployment succeeded",
+        "createdWhen": created,
+        "updatedWhen": created + 600,
+        "user": {"id": "user-id", "name": "Benchmark User", "email": "bench@example.com", "roles": ["TREAdmin"]},
+        "steps": [
+            {
+                "stepId": "main",
+                "stepTitle": "Main step",
+                "resourceId": resource_path.split("/")[-1],
+                "resourceTemplateName": "tre-workspace-base",
+                "resourceType": "workspace",
+                "resourceAction": "install",
+                "status": "deployed",
+                "message": "Deployment succeeded",
+                "updatedWhen": created + 600,
+            }
+        ],
+    }
+
+
+def _make_children(key: str, parent_id: str, count: int, template_name: str) -> dict:
+    return {key: [
+        {
+            "id": f"{parent_id[:8]}-{index:04x}-4000-8000-000000000000",
+            "templateName": template_name,
+            "templateVersion": "0.1.0",
+            "deploymentStatus": "deployed",
+            "isEnabled": True,
+            "properties": {"display_name": f"{template_name} {index}"},
+        }
+        for index in range(count)
+    ]}
+
+
+class StubTreApi:
+    """Serves canned TRE API responses on localhost from a background thread."""
+
+    def __init__(self, workspace_count: int = 50, child_count: int = 5, operation_count: int = 20, port: int = 0):
+        self.workspace_count = workspace_count
+        self.child_count = child_count
+        self.operation_count = operation_count
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def workspace_scopes(self) -> "list[str]":
+        return [make_workspace(index)["properties"]["scope_id"] for index in range(self.workspace_count)]
+
+    def get_response(self, path: str):
+        parts = path.split("?")[0].strip("/").split("/")
+        if parts[:1] != ["api"]:
+            return None
+        parts = parts[1:]
+        if parts == ["workspaces"]:
+            return {"workspaces": [make_workspace(index) for index in range(self.workspace_count)]}
+        if len(parts) == 2 and parts[0] == "workspaces":
+            index = int(parts[1].split("-")[0], 16)
+            return {"workspace": make_workspace(index)} if index < self.workspace_count else None
+        if parts[-1] == "operations":
+            resource_path = "/" + "/".join(parts[:-1])
+            return {"operations": [make_operation(index, resource_path) for index in range(self.operation_count)]}
+        if parts[-1] == "workspace-services":
+            return _make_children("workspaceServices", parts[1], self.child_count, "tre-service-guacamole")
+        if parts[-1] == "user-resources":
+            return _make_children("userResources", parts[3], self.child_count, "tre-service-guacamole-linuxvm")
+        if parts[-1] == "requests":
+            return {"airlockRequests": [
+                {"id": f"{parts[1][:8]}-{index:04x}-4000-8000-aaaaaaaaaaaa", "workspaceId": parts[1], "requestType": "import", "status": "draft", "businessJustification": "benchmark"}
+                for index in range(self.child_count)
+            ]}
+        if parts == ["shared-services"]:
+            return _make_children("sharedServices", "5ba4ed00", self.child_count, "tre-shared-service-firewall")
+        if parts[-1].endswith("-templates"):
+            return {"templates": [
+                {"id": f"template-{index}", "name": f"tre-template-{index}", "title": f"Template {index}", "description": "Benchmark template"}
+                for index in range(self.child_count)
+            ]}
+        return None
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                body = stub.get_response(self.path)
+                status = 200 if body is not None else 404
+                content = json.dumps(body if body is not None else {"detail": "Not Found"}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
+
+    def start(self) -> "StubTreApi":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workspaces", type=int, default=50)
+    args = parser.parse_args()
+    stub = StubTreApi(workspace_count=args.workspaces, port=args.port)
+    print(f"Serving stub TRE API on {stub.base_url}")
+    stub._server.serve_forever()
@@ -43,10 +43,13 @@ setup(
         "click==8.1.3",
         "httpx~=0.23.0",
         "msal >= 1.17.0",
-        "jmespath==1.0.1",
-        "tabulate==0.8.10",
-        "pygments==2.13.0"
+        "jmespath==1.0.1"
     ],
+    extras_require={
+        "http2": ["httpx[http2]~=0.23.0"],
+        "orjson": ["orjson>=3.6"],
+        "pygments": ["pygments==2.13.0"],
+    },
 
     namespace_packages=[],
     packages=find_packages(),
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+import typing as t
+
+import pytest
+
+from tre.api_client import ApiClient
+
+BASE_URL = "https://tre.example.com"
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path, monkeypatch):
+    """Run each test with its own home directory (so ~/.config/tre starts empty) and without TRECLI_ settings"""
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("USERPROFILE", str(home))
+    for name in list(os.environ):
+        if name.startswith("TRECLI_"):
+            monkeypatch.delenv(name)
+    # don't wait between retries
+    monkeypatch.setenv("TRECLI_RETRY_BACKOFF_BASE", "0")
+    return home
+
+
+class StubApiClient(ApiClient):
+    """An ApiClient that sends requests to handler (an httpx.MockTransport handler) with a fixed token per scope"""
+
+    def __init__(self, handler: t.Callable, base_url: str = BASE_URL):
+        import httpx
+        super().__init__(base_url, True)
+        self.handler = handler
+        self._http_clients[True] = httpx.Client(transport=httpx.MockTransport(handler))
+
+    def get_auth_token(self, log, scope):
+        return f"token-for-{scope}"
+
+
+@pytest.fixture
+def stub_api_client():
+    """Create a StubApiClient for a request handler"""
+    clients = []
+
+    def create(handler: t.Callable, base_url: str = BASE_URL) -> StubApiClient:
+        client = StubApiClient(handler, base_url)
+        clients.append(client)
+        return client
+
+    yield create
+    for client in clients:
+        client.close()
+
+
+@pytest.fixture
+def use_stub_api(monkeypatch, stub_api_client):
+    """Use a StubApiClient for handler as the ApiClient from the config (including for AsyncApiClient)"""
+    def use(handler: t.Callable) -> StubApiClient:
+        import httpx
+        from tre import async_api_client
+        client = stub_api_client(handler)
+        monkeypatch.setattr(ApiClient, "get_api_client_from_config", staticmethod(lambda: client))
+        monkeypatch.setattr(async_api_client, "create_async_http_client", lambda verify=True: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        return client
+    return use
+
+
+class StubOperations:
+    """A request handler serving operations (and workspaces) where each operation completes after a number of polls"""
+
+    def __init__(self):
+        self.operations: "dict[str, dict]" = {}
+        self.final_statuses: "dict[str, str]" = {}
+        self.remaining_polls: "dict[str, int]" = {}
+        self.requests = []
+
+    def add(self, resource_path: str, operation_id: str, polls: int = 1, final_status: str = "deployed", action: str = "install", created: float = 1000) -> dict:
+        operation = {
+            "id": operation_id,
+            "resourcePath": resource_path,
+            "action": action,
+            "status": "deploying" if polls > 0 else final_status,
+            "createdWhen": created,
+            "updatedWhen": created,
+            "steps": [{"stepId": "main", "resourceTemplateName": "tre-workspace-base", "status": "deploying" if polls > 0 else final_status}],
+        }
+        self.operations[operation_id] = operation
+        self.final_statuses[operation_id] = final_status
+        self.remaining_polls[operation_id] = polls
+        return operation
+
+    def _poll(self, operation_id: str) -> dict:
+        operation = self.operations[operation_id]
+        if self.remaining_polls[operation_id] > 0:
+            self.remaining_polls[operation_id] -= 1
+            if self.remaining_polls[operation_id] == 0:
+                operation["status"] = self.final_statuses[operation_id]
+                operation["updatedWhen"] = operation["createdWhen"] + 60
+                operation["steps"][0]["status"] = operation["status"]
+        return dict(operation)
+
+    def handler(self, request):
+        import httpx
+        self.requests.append(request)
+        path = request.url.path[len("/api"):]
+        if "/operations" in path:
+            resource_path, _, operation_id = path.partition("/operations")
+            operation_id = operation_id.strip("/")
+            if operation_id:
+                if operation_id not in self.operations:
+                    return httpx.Response(404, json={"detail": "Not Found"})
+                return httpx.Response(200, json={"operation": self._poll(operation_id)})
+            return httpx.Response(200, json={"operations": [
+                self._poll(operation["id"]) for operation in list(self.operations.values()) if operation["resourcePath"] == resource_path]})
+        if path.startswith("/workspaces/"):
+            workspace_id = path.split("/")[2]
+            return httpx.Response(200, json={"workspace": {"id": workspace_id, "properties": {"scope_id": f"api://{workspace_id}"}}})
+        return httpx.Response(404, json={"detail": "Not Found"})
+
+    def get_request_paths(self) -> "list[str]":
+        return [request.url.path for request in self.requests]
+
+
+@pytest.fixture
+def stub_operations(use_stub_api, monkeypatch) -> StubOperations:
+    """Use a StubOperations handler as the API, polling it at the minimum interval"""
+    operations = StubOperations()
+    use_stub_api(operations.handler)
+    monkeypatch.setenv("TRECLI_POLL_INTERVAL", "0.1")
+    monkeypatch.setenv("TRECLI_MAX_POLL_INTERVAL", "0.1")
+    return operations
+
+
+class StubEstate:
+    """A request handler serving the resources in a TRE (and their operations), with ETags for each response"""
+
+    def __init__(self):
+        # resource path -> resource
+        self.resources: "dict[str, dict]" = {}
+        # resource path -> operations
+        self.operations: "dict[str, list[dict]]" = {}
+        # paths that return 403 (and their children)
+        self.forbidden: "set[str]" = set()
+        self.requests = []
+        self.responses = []
+
+    def add(self, resource_path: str, template_name: str = "tre-template", template_version: str = "1.0", **properties) -> dict:
+        resource_id = resource_path.rsplit("/", 1)[-1]
+        resource = {
+            "id": resource_id,
+            "templateName": template_name,
+            "templateVersion": template_version,
+            "properties": {"display_name": resource_id, "scope_id": f"api://{resource_id}", **properties},
+        }
+        self.resources[resource_path] = resource
+        self.operations.setdefault(resource_path, [])
+        return resource
+
+    def add_operation(self, resource_path: str, operation_id: str, status: str = "deployed", action: str = "install",
+                      created: float = 1000, duration: float = 60, steps: "list[dict]" = None) -> dict:
+        operation = {
+            "id": operation_id,
+            "resourcePath": resource_path,
+            "action": action,
+            "status": status,
+            "createdWhen": created,
+            "updatedWhen": created + duration,
+            "steps": steps if steps is not None else [],
+        }
+        self.operations[resource_path].append(operation)
+        return operation
+
+    def _get_children(self, parent_path: str, collection: str) -> "list[dict]":
+        prefix = f"{parent_path}/{collection}/"
+        return [resource for path, resource in self.resources.items() if path.startswith(prefix) and "/" not in path[len(prefix):]]
+
+    def _get_content(self, path: str) -> t.Optional[dict]:
+        if path.endswith("/operations"):
+            resource_path = path[:-len("/operations")]
+            return {"operations": self.operations[resource_path]} if resource_path in self.resources else None
+        if path.endswith("/requests"):
+            return {"airlockRequests": []}
+        for collection, key in [("workspaces", "workspaces"), ("shared-services", "sharedServices"), ("workspace-services", "workspaceServices"), ("user-resources", "userResources")]:
+            if path == f"/{collection}" or path.endswith(f"/{collection}"):
+                return {key: self._get_children(path[:-len(collection) - 1], collection)}
+        if path in self.resources:
+            key = {"workspaces": "workspace", "shared-services": "sharedService", "workspace-services": "workspaceService", "user-resources": "userResource"}[path.split("/")[-2]]
+            return {key: self.resources[path]}
+        return None
+
+    def handler(self, request):
+        self.requests.append(request)
+        response = self._respond(request)
+        self.responses.append(response)
+        return response
+
+    def _respond(self, request):
+        import httpx
+        path = request.url.path[len("/api"):]
+        if any(path == forbidden or path.startswith(forbidden + "/") for forbidden in self.forbidden):
+            return httpx.Response(403, json={"detail": "Forbidden"})
+        content = self._get_content(path)
+        if content is None:
+            return httpx.Response(404, json={"detail": "Not Found"})
+        body = json.dumps(content).encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, headers={"ETag": etag, "Content-Type": "application/json"}, content=body)
+
+    def get_request_paths(self) -> "list[str]":
+        return [request.url.path for request in self.requests]
+
+
+@pytest.fixture
+def stub_estate(use_stub_api) -> StubEstate:
+    """Use a StubEstate handler as the API"""
+    estate = StubEstate()
+    use_stub_api(estate.handler)
+    return estate
@@ -0,0 +1,86 @@
+import json
+import logging
+
+import click
+import httpx
+import pytest
+
+from tre.api_client import ApiClient, ApiException, create_http_client
+
+log = logging.getLogger(__name__)
+
+
+def test_http_client_options_from_environment(monkeypatch):
+    monkeypatch.setenv("TRECLI_HTTP_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("TRECLI_HTTP_MAX_KEEPALIVE_CONNECTIONS", "3")
+    monkeypatch.setenv("TRECLI_HTTP_TIMEOUT", "12")
+    monkeypatch.setenv("TRECLI_HTTP_CONNECT_TIMEOUT", "4")
+    with create_http_client() as client:
+        pool = client._transport._pool
+        assert pool._max_connections == 7
+        assert pool._max_keepalive_connections == 3
+        assert client.timeout.read == 12
+        assert client.timeout.connect == 4
+
+
+def test_http_client_is_reused():
+    api_client = ApiClient("https://tre.example.com", True)
+    try:
+        assert api_client.get_http_client() is api_client.get_http_client()
+        # token requests always verify SSL, so use a separate client when verify is disabled
+        api_client.verify = False
+        assert api_client.get_http_client(verify=True) is not api_client.get_http_client()
+    finally:
+        api_client.close()
+
+
+def test_api_client_is_shared_by_nested_commands(monkeypatch, isolated_home):
+    config_dir = isolated_home / ".config" / "tre"
+    config_dir.mkdir(parents=True)
+    (config_dir / "environment.json").write_text(json.dumps({
+        "base-url": "https://tre.example.com",
+        "login-method": "client-credentials",
+        "verify": True,
+        "client-id": "client-id",
+        "client-secret": "secret",
+        "aad-tenant-id": "tenant-id",
+        "api-scope": "api://tre",
+    }))
+    clients = []
+    closed = []
+    monkeypatch.setattr(ApiClient, "close", lambda self: closed.append(self))
+
+    @click.group()
+    def group():
+        clients.append(ApiClient.get_api_client_from_config())
+
+    @group.command()
+    def command():
+        clients.append(ApiClient.get_api_client_from_config())
+
+    group.main(["command"], standalone_mode=False)
+    assert len(clients) == 2 and clients[0] is clients[1]
+    assert closed == [clients[0]]
+
+
+def test_call_api(stub_api_client):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"workspaces": []})
+
+    api_client = stub_api_client(handler)
+    response = api_client.call_api(log, "POST", "/api/workspaces", json_data={"templateName": "base"}, scope_id="scope")
+    assert response.status_code == 200
+    assert str(requests[0].url) == "https://tre.example.com/api/workspaces"
+    assert requests[0].headers["Authorization"] == "Bearer token-for-scope"
+    assert json.loads(requests[0].content) == {"templateName": "base"}
+
+
+def test_call_api_error(stub_api_client):
+    api_client = stub_api_client(lambda request: httpx.Response(404, text="not found"))
+    with pytest.raises(ApiException) as e:
+        api_client.call_api(log, "GET", "/api/workspaces/missing")
+    assert json.loads(e.value.message) == {"status_code": 404, "body": "not found"}
+    assert api_client.call_api(log, "GET", "/api/workspaces/missing", throw_on_error=False).status_code == 404
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+
+import click
+import httpx
+import pytest
+
+from tre.api_client import ApiException
+from tre.async_api_client import AsyncApiClient
+from tre.fanout import fan_out
+
+log = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def async_api_client(stub_api_client):
+    """Create an AsyncApiClient (wrapping a StubApiClient) for a request handler"""
+    def create(handler) -> AsyncApiClient:
+        client = AsyncApiClient(stub_api_client(handler))
+        client._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return client
+    return create
+
+
+def _run(client: AsyncApiClient, coroutine_func):
+    async def run():
+        async with client:
+            return await coroutine_func()
+    return asyncio.run(run())
+
+
+def test_call_api(async_api_client):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"workspaces": []})
+
+    client = async_api_client(handler)
+    response = _run(client, lambda: client.call_api(log, "POST", "/api/workspaces", json_data={"templateName": "base"}))
+    assert response.json() == {"workspaces": []}
+    assert requests[0].headers["Authorization"] == "Bearer token-for-None"
+    assert requests[0].headers["Content-Type"] == "application/json"
+    assert json.loads(requests[0].read()) == {"templateName": "base"}
+
+
+def test_call_api_error(async_api_client):
+    client = async_api_client(lambda request: httpx.Response(404, json={"detail": "Not Found"}))
+    with pytest.raises(ApiException):
+        _run(client, lambda: client.call_api(log, "GET", "/api/workspaces/ws1"))
+    client = async_api_client(lambda request: httpx.Response(404, json={"detail": "Not Found"}))
+    assert _run(client, lambda: client.call_api(log, "GET", "/api/workspaces/ws1", throw_on_error=False)).status_code == 404
+
+
+def test_call_api_retries(async_api_client):
+    responses = [httpx.Response(503), httpx.Response(200, json={})]
+    client = async_api_client(lambda request: responses.pop(0))
+    assert _run(client, lambda: client.call_api(log, "GET", "/api/workspaces")).status_code == 200
+    assert responses == []
+
+
+def test_workspace_scope_is_looked_up_once_for_concurrent_calls(async_api_client):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path == "/api/workspaces/ws1":
+            return httpx.Response(200, json={"workspace": {"id": "ws1", "properties": {"scope_id": "api://ws1"}}})
+        return httpx.Response(200, json={})
+
+    client = async_api_client(handler)
+
+    async def call(index):
+        scope_id = await client.get_workspace_scope(log, "ws1")
+        return await client.call_api(log, "GET", f"/api/workspaces/ws1/workspace-services/{index}", scope_id=scope_id)
+
+    _run(client, lambda: fan_out(call, range(5)))
+    workspace_requests = [request for request in requests if request.url.path == "/api/workspaces/ws1"]
+    assert len(workspace_requests) == 1
+    assert all(request.headers["Authorization"] == "Bearer token-for-api://ws1" for request in requests[1:])
+
+
+def test_responses_are_revalidated_with_etags(async_api_client):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, headers={"ETag": '"v1"'}, json={"workspaces": [{"id": "ws1"}]})
+
+    client = async_api_client(handler)
+    first = _run(client, lambda: client.call_api(log, "GET", "/api/workspaces"))
+    client = async_api_client(handler)
+    second = _run(client, lambda: client.call_api(log, "GET", "/api/workspaces"))
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert second.status_code == 200
+    assert second.json() == first.json()
+
+
+def test_max_age_is_used_from_the_click_context(async_api_client):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"workspaces": []})
+
+    with click.Context(click.Command("test")) as ctx:
+        ctx.meta["tre.max_age"] = 60
+        client = async_api_client(handler)
+        _run(client, lambda: client.call_api(log, "GET", "/api/workspaces"))
+        client = async_api_client(handler)
+        response = _run(client, lambda: client.call_api(log, "GET", "/api/workspaces"))
+    assert response.json() == {"workspaces": []}
+    assert len(requests) == 1
+
+
+def test_started_operations_are_journalled(async_api_client):
+    def handler(request):
+        return httpx.Response(
+            202,
+            headers={"Location": "/api/workspaces/ws1/operations/op1"},
+            json={"operation": {"id": "op1", "resourcePath": "/workspaces/ws1", "action": "install", "createdWhen": 1}})
+
+    client = async_api_client(handler)
+    _run(client, lambda: client.call_api(log, "POST", "/api/workspaces", json_data={}, scope_id="api://root"))
+    entries = client.api_client.operation_journal.get_entries()
+    assert [(entry["id"], entry["url"], entry["scopeId"]) for entry in entries] == [("op1", "/api/workspaces/ws1/operations/op1", "api://root")]
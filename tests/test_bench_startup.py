@@ -0,0 +1,91 @@
+import json
+import subprocess
+import sys
+
+import httpx
+import pytest
+
+from benchmarks import bench_startup
+from benchmarks.stub_api import StubTreApi
+
+
+def test_summarise():
+    summary = bench_startup._summarise("tre --help", "help", [3.0, 1.0, 2.0, 10.0], candidates=4)
+    assert summary == {
+        "name": "tre --help",
+        "kind": "help",
+        "unit": "ms",
+        "samples": [3.0, 1.0, 2.0, 10.0],
+        "min": 1.0,
+        "median": 2.5,
+        "mean": 4.0,
+        "candidates": 4,
+    }
+
+
+def test_compare(tmp_path):
+    baseline_file = tmp_path / "baseline.json"
+    baseline_file.write_text(json.dumps({"results": [
+        {"name": "slower", "median": 100.0},
+        {"name": "within-limit", "median": 100.0},
+        {"name": "faster", "median": 100.0},
+    ]}))
+    results = [
+        {"name": "slower", "median": 130.0},
+        {"name": "within-limit", "median": 125.0},
+        {"name": "faster", "median": 50.0},
+        {"name": "new", "median": 1000.0},
+    ]
+    assert bench_startup._compare(results, str(baseline_file), 1.25) == ["slower: 100.0ms -> 130.0ms"]
+
+
+def test_command_modules_are_the_lazily_loaded_command_modules():
+    modules = bench_startup._get_command_modules()
+    assert modules == sorted(set(modules))
+    assert "tre.commands.workspaces.workspaces" in modules
+    assert all(module.startswith("tre.commands.") for module in modules)
+
+
+@pytest.fixture
+def stub():
+    with StubTreApi(workspace_count=3, child_count=2, operation_count=2) as stub:
+        yield stub
+
+
+def test_stub_api_responses(stub):
+    with httpx.Client(base_url=stub.base_url) as client:
+        workspaces = client.get("/api/workspaces").json()["workspaces"]
+        assert len(workspaces) == 3
+        assert [workspace["properties"]["scope_id"] for workspace in workspaces] == stub.workspace_scopes()
+        workspace_id = workspaces[0]["id"]
+        assert client.get(f"/api/workspaces/{workspace_id}").json()["workspace"]["id"] == workspace_id
+        assert len(client.get(f"/api/workspaces/{workspace_id}/workspace-services").json()["workspaceServices"]) == 2
+        assert len(client.get(f"/api/workspaces/{workspace_id}/operations").json()["operations"]) == 2
+        assert client.get("/not-the-api").status_code == 404
+
+
+def test_completion_against_the_stub_api(tmp_path, stub):
+    bench_startup._create_home(tmp_path, stub)
+    env = {
+        "HOME": str(tmp_path),
+        "USERPROFILE": str(tmp_path),
+        "PYTHONPATH": str(bench_startup.REPO_ROOT),
+        "_TRE_COMPLETE": "bash_complete",
+        "COMP_WORDS": "tre workspace ",
+        "COMP_CWORD": "2",
+    }
+    _, output = bench_startup._time_process(bench_startup.CLI_COMMAND, env)
+    assert len(output.splitlines()) == 3
+
+
+def test_import_time():
+    assert bench_startup._import_time_ms("tre.output", {"PYTHONPATH": str(bench_startup.REPO_ROOT)}) > 0
+
+
+def test_failing_command_raises():
+    with pytest.raises(RuntimeError):
+        bench_startup._time_process([sys.executable, "-c", "raise SystemExit(2)"], {})
+
+
+def test_help_runs():
+    subprocess.run([sys.executable, str(bench_startup.REPO_ROOT / "benchmarks" / "bench_startup.py"), "--help"], check=True, stdout=subprocess.DEVNULL)
@@ -0,0 +1,54 @@
+import os
+import stat
+import threading
+import time
+
+from tre.cache import file_lock, get_config_dir, read_json_file, write_file_atomic, write_json_file_atomic
+
+
+def test_get_config_dir(isolated_home):
+    config_dir = get_config_dir()
+    assert config_dir == isolated_home / ".config" / "tre"
+    assert config_dir.is_dir()
+
+
+def test_write_and_read_json_file(tmp_path):
+    path = tmp_path / "file.json"
+    write_json_file_atomic(path, {"a": [1, 2]})
+    assert read_json_file(path) == {"a": [1, 2]}
+    if os.name != "nt":
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    # no temp files are left behind
+    assert [p.name for p in tmp_path.glob("*file.json*")] == ["file.json"]
+
+
+def test_read_json_file_missing_or_invalid(tmp_path):
+    assert read_json_file(tmp_path / "missing.json") is None
+    (tmp_path / "invalid.json").write_text("{not json")
+    assert read_json_file(tmp_path / "invalid.json") is None
+
+
+def test_write_file_atomic_bytes(tmp_path):
+    path = tmp_path / "file.bin"
+    write_file_atomic(path, b"\x00\x01")
+    assert path.read_bytes() == b"\x00\x01"
+
+
+def test_file_lock_is_exclusive(tmp_path):
+    path = tmp_path / "file.json"
+    events = []
+
+    def hold_lock(name: str):
+        with file_lock(path):
+            events.append(f"{name} start")
+            time.sleep(0.05)
+            events.append(f"{name} end")
+
+    threads = [threading.Thread(target=hold_lock, args=(name,)) for name in ["a", "b"]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # the second holder only starts once the first has finished
+    assert events[0].split()[0] == events[1].split()[0]
+    assert events[2].split()[0] == events[3].split()[0]
@@ -0,0 +1,132 @@
+import json
+import logging
+import threading
+
+import httpx
+import pytest
+
+from tre import completion
+from tre.api_client import ApiClient
+from tre.completion import CompletionCache, complete_from_api
+
+log = logging.getLogger(__name__)
+LIST_URL = "/api/workspaces"
+
+
+def _workspaces_handler(requests: list, ids=("ws-a1", "ws-a2", "ws-b1")):
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"workspaces": [{"id": workspace_id} for workspace_id in ids]})
+    return handler
+
+
+@pytest.fixture
+def background_refreshes(monkeypatch):
+    """Record the background refresh processes that would be started"""
+    started = []
+    monkeypatch.setattr(completion.subprocess, "Popen", lambda args, **kwargs: started.append(json.loads(args[-1])))
+    return started
+
+
+@pytest.fixture
+def use_client(monkeypatch, stub_api_client):
+    def use(handler):
+        client = stub_api_client(handler)
+        monkeypatch.setattr(ApiClient, "get_api_client_from_config", staticmethod(lambda: client))
+        return client
+    return use
+
+
+def test_candidates_are_fetched_and_cached(use_client, background_refreshes):
+    requests = []
+    client = use_client(_workspaces_handler(requests))
+    assert complete_from_api(log, LIST_URL, "workspaces", "ws-a") == ["ws-a1", "ws-a2"]
+    assert complete_from_api(log, LIST_URL, "workspaces", "ws-b") == ["ws-b1"]
+    assert len(requests) == 1
+    assert CompletionCache(client.base_url, LIST_URL).read()["values"] == ["ws-a1", "ws-a2", "ws-b1"]
+    assert background_refreshes == []
+
+
+def test_stale_candidates_are_returned_and_refreshed_in_the_background(use_client, background_refreshes, monkeypatch):
+    requests = []
+    client = use_client(_workspaces_handler(requests))
+    CompletionCache(client.base_url, LIST_URL).write(["ws-old"])
+    monkeypatch.setenv("TRECLI_COMPLETION_CACHE_TTL", "-1")
+
+    assert complete_from_api(log, LIST_URL, "workspaces", "") == ["ws-old"]
+    # a refresh is already in progress, so another isn't started
+    assert complete_from_api(log, LIST_URL, "workspaces", "") == ["ws-old"]
+    assert requests == []
+    assert background_refreshes == [{"list_url": LIST_URL, "list_key": "workspaces", "value_key": "id", "workspace_id": None}]
+
+
+def test_slow_api_is_abandoned_after_the_budget(use_client, background_refreshes, monkeypatch):
+    release = threading.Event()
+
+    def handler(request):
+        release.wait(5)
+        return httpx.Response(200, json={"workspaces": [{"id": "ws-a1"}]})
+
+    use_client(handler)
+    monkeypatch.setenv("TRECLI_COMPLETION_BUDGET_MS", "10")
+    try:
+        assert complete_from_api(log, LIST_URL, "workspaces", "") == []
+    finally:
+        release.set()
+    assert len(background_refreshes) == 1
+
+
+def test_api_errors_return_no_candidates(use_client, background_refreshes):
+    client = use_client(lambda request: httpx.Response(500, json={"detail": "error"}))
+    assert complete_from_api(log, LIST_URL, "workspaces", "") == []
+    assert CompletionCache(client.base_url, LIST_URL).read() is None
+
+
+def test_no_candidates_without_config(monkeypatch):
+    def get_api_client_from_config():
+        raise RuntimeError("not logged in")
+    monkeypatch.setattr(ApiClient, "get_api_client_from_config", staticmethod(get_api_client_from_config))
+    assert complete_from_api(log, LIST_URL, "workspaces", "") == []
+
+
+def test_workspace_scope_is_used(use_client, background_refreshes):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path == "/api/workspaces/ws1":
+            return httpx.Response(200, json={"workspace": {"id": "ws1", "properties": {"scope_id": "api://ws1"}}})
+        return httpx.Response(200, json={"workspaceServices": [{"id": "svc1", "templateName": "tre-service-guacamole"}]})
+
+    use_client(handler)
+    list_url = "/api/workspaces/ws1/workspace-services"
+    assert complete_from_api(log, list_url, "workspaceServices", "", value_key="templateName", workspace_id="ws1") == ["tre-service-guacamole"]
+    assert requests[-1].headers["Authorization"] == "Bearer token-for-api://ws1"
+
+
+def test_only_one_refresh_runs_at_a_time():
+    cache = CompletionCache("https://tre.example.com", LIST_URL)
+    assert cache.try_start_refresh()
+    assert not cache.try_start_refresh()
+    cache.end_refresh()
+    assert cache.try_start_refresh()
+
+
+def test_background_refresh_process(use_client):
+    requests = []
+    client = use_client(_workspaces_handler(requests))
+    cache = CompletionCache(client.base_url, LIST_URL)
+    cache.try_start_refresh()
+
+    completion._main(json.dumps({"list_url": LIST_URL, "list_key": "workspaces", "value_key": "id", "workspace_id": None}))
+
+    assert cache.read()["values"] == ["ws-a1", "ws-a2", "ws-b1"]
+    # the refresh has ended, so another can start
+    assert cache.try_start_refresh()
+
+
+def test_clear():
+    cache = CompletionCache("https://tre.example.com", LIST_URL)
+    cache.write(["ws1"])
+    CompletionCache.clear()
+    assert cache.read() is None
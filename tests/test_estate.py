@@ -0,0 +1,110 @@
+import asyncio
+import logging
+
+import pytest
+
+from tre.api_client import ApiClient
+from tre.async_api_client import AsyncApiClient
+from tre.estate import SHARED_SERVICE, USER_RESOURCE, WORKSPACE, WORKSPACE_SERVICE, EstateCrawler, Resource
+
+log = logging.getLogger(__name__)
+
+
+@pytest.mark.parametrize("resource_path, kind, workspace_id", [
+    ("/workspaces/ws1", WORKSPACE, None),
+    ("/workspaces/ws1/workspace-services/svc1", WORKSPACE_SERVICE, "ws1"),
+    ("workspaces/ws1/workspace-services/svc1/user-resources/ur1/", USER_RESOURCE, "ws1"),
+    ("/shared-services/ss1", SHARED_SERVICE, None),
+])
+def test_resource_from_path(resource_path, kind, workspace_id):
+    resource = Resource.from_path(resource_path)
+    assert resource.kind == kind
+    assert resource.workspace_id == workspace_id
+    assert resource.url == "/api/" + resource_path.strip("/")
+    assert resource.id == resource_path.strip("/").rsplit("/", 1)[-1]
+
+
+@pytest.mark.parametrize("resource_path", ["/workspaces", "/workspaces/ws1/user-resources/ur1", "/other/x", "/workspaces/ws1/workspace-services"])
+def test_invalid_resource_path(resource_path):
+    with pytest.raises(ValueError):
+        Resource.from_path(resource_path)
+
+
+@pytest.fixture
+def estate(stub_estate):
+    stub_estate.add("/workspaces/ws1")
+    stub_estate.add("/workspaces/ws1/workspace-services/svc1")
+    stub_estate.add("/workspaces/ws1/workspace-services/svc1/user-resources/ur1")
+    stub_estate.add("/workspaces/ws1/workspace-services/svc2")
+    stub_estate.add("/workspaces/ws2")
+    stub_estate.add("/shared-services/ss1")
+    return stub_estate
+
+
+def _crawl(func, conditional: bool = False):
+    async def crawl():
+        async with AsyncApiClient(ApiClient.get_api_client_from_config()) as client:
+            return await func(EstateCrawler(log, client, conditional=conditional))
+    return asyncio.run(crawl())
+
+
+def test_get_resources(estate):
+    resources = _crawl(lambda crawler: crawler.get_resources())
+    assert [resource.resource_path for resource in resources] == [
+        "/workspaces/ws1",
+        "/workspaces/ws1/workspace-services/svc1",
+        "/workspaces/ws1/workspace-services/svc1/user-resources/ur1",
+        "/workspaces/ws1/workspace-services/svc2",
+        "/workspaces/ws2",
+        "/shared-services/ss1",
+    ]
+    # the workspace scopes are taken from the workspaces list
+    assert "/api/workspaces/ws1" not in estate.get_request_paths()
+    ws1_requests = [request for request in estate.requests if request.url.path.startswith("/api/workspaces/ws1/")]
+    assert all(request.headers["Authorization"] == "Bearer token-for-api://ws1" for request in ws1_requests)
+
+
+def test_get_resources_for_workspaces(estate):
+    resources = _crawl(lambda crawler: crawler.get_resources(workspace_ids=["ws2"]))
+    assert [resource.resource_path for resource in resources] == ["/workspaces/ws2"]
+    resources = _crawl(lambda crawler: crawler.get_resources(include_workspace_children=False, include_shared_services=False))
+    assert [resource.resource_path for resource in resources] == ["/workspaces/ws1", "/workspaces/ws2"]
+
+
+def test_inaccessible_workspaces_are_skipped(estate, capsys):
+    estate.forbidden.add("/workspaces/ws1/workspace-services")
+
+    async def get_resources(crawler):
+        return await crawler.get_resources(), crawler.errors
+
+    resources, errors = _crawl(get_resources)
+    assert [resource.resource_path for resource in resources] == ["/workspaces/ws1", "/workspaces/ws2", "/shared-services/ss1"]
+    assert [url for url, _ in errors] == ["/api/workspaces/ws1/workspace-services"]
+    assert "Skipping /api/workspaces/ws1/workspace-services" in capsys.readouterr().err
+
+
+def test_iter_operations(estate):
+    estate.add_operation("/workspaces/ws1", "op1")
+    estate.add_operation("/shared-services/ss1", "op2")
+
+    async def get_operations(crawler):
+        resources = await crawler.get_resources()
+        return {resource.resource_path: [operation["id"] for operation in operations] async for resource, operations in crawler.iter_operations(resources)}
+
+    operations = _crawl(get_operations)
+    assert len(operations) == 6
+    assert operations["/workspaces/ws1"] == ["op1"]
+    assert operations["/shared-services/ss1"] == ["op2"]
+    assert operations["/workspaces/ws2"] == []
+
+
+def test_conditional_requests(estate):
+    async def crawl_twice(crawler):
+        first = await crawler.get_json("/api/workspaces")
+        second = await crawler.get_json("/api/workspaces")
+        return first, second
+
+    first, second = _crawl(crawl_twice, conditional=True)
+    assert first == second
+    assert estate.requests[1].headers["If-None-Match"] == estate.responses[0].headers["ETag"]
+    assert estate.responses[1].status_code == 304
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from tre.fanout import fan_out, fan_out_as_completed, get_max_concurrency
+
+
+class ConcurrencyTracker:
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+
+    async def call(self, item, delay: float = 0):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(delay)
+            if isinstance(item, Exception):
+                raise item
+            return item * 2
+        finally:
+            self.running -= 1
+
+
+def test_results_are_in_item_order():
+    tracker = ConcurrencyTracker()
+    # later items complete first
+    results = asyncio.run(fan_out(lambda item: tracker.call(item, delay=(10 - item) / 1000), range(10), max_concurrency=4))
+    assert results == [item * 2 for item in range(10)]
+    assert tracker.max_running == 4
+
+
+def test_concurrency_from_environment(monkeypatch):
+    monkeypatch.setenv("TRECLI_MAX_CONCURRENCY", "3")
+    assert get_max_concurrency() == 3
+    tracker = ConcurrencyTracker()
+    asyncio.run(fan_out(tracker.call, range(10)))
+    assert tracker.max_running == 3
+
+    monkeypatch.setenv("TRECLI_MAX_CONCURRENCY", "0")
+    assert get_max_concurrency() == 1
+
+
+def test_items_are_consumed_lazily():
+    consumed = []
+
+    def items():
+        for item in range(100):
+            consumed.append(item)
+            yield item
+
+    async def first_result():
+        async for item, result in fan_out_as_completed(lambda item: ConcurrencyTracker().call(item, delay=0.01), items(), max_concurrency=2):
+            return item, result
+
+    assert asyncio.run(first_result()) == (0, 0)
+    assert len(consumed) <= 4
+
+
+def test_no_items():
+    assert asyncio.run(fan_out(ConcurrencyTracker().call, [])) == []
+
+
+def test_exception_cancels_remaining_calls():
+    tracker = ConcurrencyTracker()
+    started = []
+
+    async def call(item):
+        started.append(item)
+        return await tracker.call(item, delay=0 if isinstance(item, Exception) else 0.01)
+
+    with pytest.raises(ValueError):
+        asyncio.run(fan_out(call, [1, ValueError("failed"), 3, 4, 5, 6], max_concurrency=2))
+    assert len(started) < 6
+    assert tracker.running == 0
+
+
+def test_return_exceptions():
+    error = ValueError("failed")
+    assert asyncio.run(fan_out(ConcurrencyTracker().call, [1, error, 3], return_exceptions=True)) == [2, error, 6]
+
+
+def test_as_completed_yields_items_with_results_as_they_complete():
+    tracker = ConcurrencyTracker()
+
+    async def collect():
+        return [entry async for entry in fan_out_as_completed(lambda item: tracker.call(item, delay=item / 100), [3, 1, 2])]
+
+    assert asyncio.run(collect()) == [(1, 2), (2, 4), (3, 6)]
@@ -0,0 +1,176 @@
+import logging
+import os
+import time
+
+import click
+import httpx
+import pytest
+
+from click.testing import CliRunner
+
+from tre.http_cache import HttpCache, get_max_age, max_age_option
+
+log = logging.getLogger(__name__)
+BASE_URL = "https://tre.example.com"
+
+
+def _headers(**headers) -> httpx.Headers:
+    return httpx.Headers({name.replace("_", "-"): value for name, value in headers.items()})
+
+
+def test_set_and_get(tmp_path):
+    cache = HttpCache(tmp_path, max_size=1024)
+    key = HttpCache.get_key(BASE_URL, "/api/workspaces", None)
+    cache.set(key, _headers(content_type="application/json", etag='"v1"', x_ms_request_id="abc"), b'{"workspaces": []}')
+
+    entry = cache.get(key)
+    assert entry["headers"] == {"content-type": "application/json", "etag": '"v1"'}
+    assert entry["body"] == '{"workspaces": []}'
+    response = HttpCache.to_response(entry, "GET", f"{BASE_URL}/api/workspaces")
+    assert response.status_code == 200
+    assert response.json() == {"workspaces": []}
+    assert response.headers["etag"] == '"v1"'
+
+
+def test_keys_are_per_api_url_and_scope():
+    keys = {
+        HttpCache.get_key(BASE_URL, "/api/workspaces", None),
+        HttpCache.get_key(BASE_URL, "/api/workspaces", "api://ws1"),
+        HttpCache.get_key(BASE_URL, "/api/workspaces/ws1", None),
+        HttpCache.get_key("https://other.example.com", "/api/workspaces", None),
+    }
+    assert len(keys) == 4
+
+
+def test_mark_fresh(tmp_path):
+    cache = HttpCache(tmp_path, max_size=1024)
+    cache.set("key", _headers(etag='"v1"'), b"{}")
+    entry = cache.get("key")
+    entry["fetched_at"] = 0
+    cache.mark_fresh("key", entry, httpx.Response(304, headers={"etag": '"v2"'}))
+    entry = cache.get("key")
+    assert entry["headers"]["etag"] == '"v2"'
+    assert entry["fetched_at"] > time.time() - 60
+
+
+def test_large_responses_are_not_cached(tmp_path):
+    cache = HttpCache(tmp_path, max_size=400)
+    cache.set("key", _headers(etag='"v1"'), b"x" * 101)
+    assert cache.get("key") is None
+    assert cache.max_entry_size == 100
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = HttpCache(tmp_path, max_size=1000)
+    for index, key in enumerate(["a", "b", "c"]):
+        cache.set(key, _headers(etag='"v1"'), b"x" * 200)
+        # make the last use times distinct
+        os.utime(tmp_path / f"{key}.json", (index, index))
+    # a was added first, but used most recently
+    assert cache.get("a") is not None
+
+    cache.set("d", _headers(etag='"v1"'), b"x" * 200)
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ["a", "c", "d"])
+    assert sum(path.stat().st_size for path in tmp_path.glob("*.json")) <= 1000
+
+
+def test_clear(tmp_path):
+    cache = HttpCache(tmp_path, max_size=1024)
+    cache.set("key", _headers(etag='"v1"'), b"{}")
+    cache.clear()
+    assert cache.get("key") is None
+
+
+def test_max_age_option():
+    @click.command()
+    @max_age_option()
+    def command():
+        click.echo(repr(get_max_age()))
+
+    runner = CliRunner()
+    assert runner.invoke(command, []).output == "None\n"
+    assert runner.invoke(command, ["--max-age", "30"]).output == "30.0\n"
+    assert runner.invoke(command, [], env={"TRECLI_MAX_AGE": "5"}).output == "5.0\n"
+    assert runner.invoke(command, ["--max-age", "-1"]).exit_code != 0
+
+
+def _etag_handler(requests: list, body: dict, etag: str = '"v1"'):
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, headers={"ETag": etag}, json=body)
+    return handler
+
+
+def test_api_client_revalidates_cached_responses(stub_api_client):
+    requests = []
+    client = stub_api_client(_etag_handler(requests, {"workspaces": [{"id": "ws1"}]}))
+    first = client.call_api(log, "GET", "/api/workspaces")
+    second = client.call_api(log, "GET", "/api/workspaces")
+    assert "If-None-Match" not in requests[0].headers
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert second.status_code == 200
+    assert second.json() == first.json() == {"workspaces": [{"id": "ws1"}]}
+
+
+def test_api_client_revalidates_with_last_modified(stub_api_client):
+    requests = []
+    last_modified = "Wed, 21 Oct 2026 07:28:00 GMT"
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-Modified-Since") == last_modified:
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"Last-Modified": last_modified}, json={"workspaces": []})
+
+    client = stub_api_client(handler)
+    client.call_api(log, "GET", "/api/workspaces")
+    assert client.call_api(log, "GET", "/api/workspaces").json() == {"workspaces": []}
+    assert requests[1].headers["If-Modified-Since"] == last_modified
+
+
+def test_api_client_updates_changed_responses(stub_api_client):
+    requests = []
+    client = stub_api_client(_etag_handler(requests, {"version": 1}, etag='"v1"'))
+    client.call_api(log, "GET", "/api/workspaces/ws1")
+    client.handler = _etag_handler(requests, {"version": 2}, etag='"v2"')
+    client._http_clients[True] = httpx.Client(transport=httpx.MockTransport(client.handler))
+    assert client.call_api(log, "GET", "/api/workspaces/ws1").json() == {"version": 2}
+    assert client.call_api(log, "GET", "/api/workspaces/ws1").json() == {"version": 2}
+    assert [request.headers.get("If-None-Match") for request in requests] == [None, '"v1"', '"v2"']
+
+
+def test_api_client_uses_responses_within_max_age_without_calling_the_api(stub_api_client):
+    requests = []
+    client = stub_api_client(_etag_handler(requests, {"workspaces": []}))
+    with click.Context(click.Command("test")) as ctx:
+        ctx.meta["tre.max_age"] = 60
+        client.call_api(log, "GET", "/api/workspaces")
+        assert client.call_api(log, "GET", "/api/workspaces").json() == {"workspaces": []}
+    assert len(requests) == 1
+
+
+@pytest.mark.parametrize("method, status_code", [("POST", 200), ("GET", 404)])
+def test_api_client_only_caches_successful_gets(stub_api_client, method, status_code):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(status_code, headers={"ETag": '"v1"'}, json={})
+
+    client = stub_api_client(handler)
+    for _ in range(2):
+        client.call_api(log, method, "/api/workspaces", throw_on_error=False)
+    assert "If-None-Match" not in requests[1].headers
+
+
+def test_api_client_cache_can_be_disabled(stub_api_client, monkeypatch):
+    monkeypatch.setenv("TRECLI_HTTP_CACHE_MAX_SIZE_MB", "0")
+    requests = []
+    client = stub_api_client(_etag_handler(requests, {"workspaces": []}))
+    for _ in range(2):
+        client.call_api(log, "GET", "/api/workspaces")
+    assert "If-None-Match" not in requests[1].headers
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from tre import json_codec
+
+SAMPLES = [
+    {"id": "ws1", "properties": {"display_name": "Workspace", "tags": [], "settings": {}}, "isEnabled": True, "deleted": None},
+    {"updatedWhen": 1660000000.125, "small": 0.00001, "large": 1e16, "negative": -2.5e-7, "count": 12},
+    {"text": "ünïcödé –   \x7f \"quoted\" \\ \n"},
+    [1, 2.0, "three", [], {}],
+    {"nested": [{"a": [{"b": [1e-5, 1e22]}]}]},
+]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    monkeypatch.setenv("TRECLI_JSON_BACKEND", "auto" if request.param == "orjson" else "json")
+    monkeypatch.setattr(json_codec, "_orjson", None)
+    monkeypatch.setattr(json_codec, "_orjson_loaded", False)
+    monkeypatch.setattr(json_codec, "_orjson_loads_failed", False)
+    assert json_codec.get_backend() == request.param
+    return request.param
+
+
+@pytest.mark.parametrize("obj", SAMPLES)
+@pytest.mark.parametrize("indent", [None, 2, 4])
+def test_dumps_matches_the_json_module(backend, obj, indent):
+    assert json_codec.dumps(obj, indent=indent) == json.dumps(obj, indent=indent)
+
+
+@pytest.mark.parametrize("obj", SAMPLES)
+def test_dumps_bytes_round_trips(backend, obj):
+    assert json.loads(json_codec.dumps_bytes(obj)) == obj
+
+
+@pytest.mark.parametrize("obj", SAMPLES)
+def test_loads(backend, obj):
+    assert json_codec.loads(json.dumps(obj)) == obj
+    assert json_codec.loads(json.dumps(obj).encode("utf-8")) == obj
+
+
+def test_values_rejected_by_orjson(backend):
+    content = '{"value": NaN, "big": 123456789012345678901234567890}'
+    obj = json_codec.loads(content)
+    assert obj["big"] == 123456789012345678901234567890
+    # orjson would output NaN as null
+    assert json_codec.dumps(obj, indent=2) == json.dumps(obj, indent=2)
+
+
+def test_dumps_with_non_string_keys(backend):
+    assert json_codec.dumps({1: "one", 2.5: "two and a half"}, indent=2) == json.dumps({1: "one", 2.5: "two and a half"}, indent=2)
+
+
+def test_invalid_json(backend):
+    with pytest.raises(ValueError):
+        json_codec.loads(b'{"id": ')
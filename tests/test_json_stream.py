@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from tre.json_stream import iter_array_items
+
+DOCUMENT = json.dumps({
+    "count": 3,
+    "operations": [
+        {
+            "id": "op-1",
+            "status": "deployed",
+            "createdWhen": 1660000000.125,
+            "updatedWhen": 12500.0,
+            "steps": [{"stepId": "main", "status": "deployed", "progress": -1.5e-3}],
+        },
+        {"id": "op-2", "status": "deployment_failed", "message": "Fehler: \"ungültig\" – \\n", "retries": 12500},
+        {"id": "op-3", "status": None, "isEnabled": True, "deleted": False, "size": 1E+10, "tags": [], "properties": {}},
+        7,
+        -0.5,
+        "text",
+    ],
+    "nextLink": None,
+}, ensure_ascii=False).encode("utf-8")
+
+
+def _items(chunks, key="operations"):
+    return list(iter_array_items(chunks, key))
+
+
+def test_whole_document():
+    assert _items([DOCUMENT]) == json.loads(DOCUMENT)["operations"]
+
+
+@pytest.mark.parametrize("offset", range(1, len(DOCUMENT)))
+def test_split_at_every_offset(offset):
+    assert _items([DOCUMENT[:offset], DOCUMENT[offset:]]) == json.loads(DOCUMENT)["operations"]
+
+
+def test_single_byte_chunks():
+    assert _items([DOCUMENT[index:index + 1] for index in range(len(DOCUMENT))]) == json.loads(DOCUMENT)["operations"]
+
+
+def test_items_are_yielded_before_the_next_chunk_is_read():
+    read = []
+
+    def chunks():
+        for chunk in [b'{"operations": [{"id": "a"}', b', {"id": "b"}', b"]}"]:
+            read.append(chunk)
+            yield chunk
+
+    items = iter_array_items(chunks(), "operations")
+    assert next(items) == {"id": "a"}
+    assert len(read) == 1
+    assert next(items) == {"id": "b"}
+    assert len(read) == 2
+
+
+def test_number_split_at_the_end_of_an_array():
+    assert _items([b'{"values": [1, 125', b"00.", b"5e", b"-1", b"]}"], "values") == [1, 12500.5e-1]
+
+
+@pytest.mark.parametrize("content, expected", [
+    (b'{"operations": []}', []),
+    (b"{}", []),
+    (b'{"workspaces": [{"id": "a"}]}', []),
+    (b'{"operations": {"id": "a"}}', []),
+])
+def test_empty_or_missing_array(content, expected):
+    assert _items([content]) == expected
+
+
+@pytest.mark.parametrize("content", [
+    b'{"operations": [{"id": "a"}]} extra',
+    b'{"operations": [{"id": "a"}',
+    b'{"operations": [1 2]}',
+])
+def test_invalid_content(content):
+    with pytest.raises(json.JSONDecodeError):
+        _items([content])
@@ -0,0 +1,80 @@
+import json
+import re
+import sys
+
+import click
+import pytest
+
+from tre import jsonc
+from tre.jsonc import iter_jsonc, output_jsonc
+
+SAMPLES = [
+    {"id": "ws1", "properties": {"display_name": "Wörkspace \"1\"", "tags": [], "settings": {}}, "isEnabled": True, "deleted": None},
+    [1, -2.5, 1e-7, 1e22, False],
+    {1: "non-string key", "nested": [[{"a": [{}]}]]},
+    "text",
+    12,
+    None,
+]
+# not valid JSON, but output by json.dumps
+NON_FINITE_NUMBERS = [float("nan"), float("inf"), float("-inf")]
+_ANSI = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def _colored_output(capsys, content) -> str:
+    with click.Context(click.Command("test"), color=True):
+        output_jsonc(content)
+    return capsys.readouterr().out
+
+
+@pytest.mark.parametrize("obj", SAMPLES + [NON_FINITE_NUMBERS])
+def test_iter_jsonc_text_matches_json_dumps(obj):
+    assert _ANSI.sub("", "".join(iter_jsonc(obj))) == json.dumps(obj, indent=2)
+
+
+@pytest.mark.parametrize("obj", SAMPLES)
+def test_colors_match_pygments(obj):
+    pygments = pytest.importorskip("pygments")
+    from pygments import formatters, lexers
+    highlighted = pygments.highlight(json.dumps(obj, indent=2), lexers.JsonLexer(), formatters.TerminalFormatter())
+    # pygments also colors the whitespace, which has no visible effect
+    highlighted = re.sub(r"\x1b\[37m(\s*)\x1b\[39;49;00m", r"\1", highlighted)
+    assert "".join(iter_jsonc(obj)) + "\n" == highlighted
+
+
+def test_unsupported_type():
+    with pytest.raises(TypeError):
+        list(iter_jsonc({"value": object()}))
+
+
+def test_output_without_color(capsys):
+    output_jsonc({"id": "ws1"})
+    assert capsys.readouterr().out == '{\n  "id": "ws1"\n}\n\n'
+
+
+def test_output_with_color(capsys):
+    assert _colored_output(capsys, {"id": "ws1"}) == '{\n  \x1b[94m"id"\x1b[39;49;00m: \x1b[33m"ws1"\x1b[39;49;00m\n}\n\n'
+
+
+def test_large_output_is_written_in_parts(capsys, monkeypatch):
+    monkeypatch.setattr(jsonc, "_WRITE_SIZE", 10)
+    content = {"items": [f"item-{index}" for index in range(100)]}
+    assert _ANSI.sub("", _colored_output(capsys, content)) == json.dumps(content, indent=2) + "\n\n"
+
+
+def test_pygments_highlighter(capsys, monkeypatch):
+    pytest.importorskip("pygments")
+    monkeypatch.setenv("TRECLI_JSONC_HIGHLIGHTER", "pygments")
+    output = _colored_output(capsys, {"id": "ws1"})
+    assert "\x1b[37m" in output
+    assert _ANSI.sub("", output) == '{\n  "id": "ws1"\n}\n\n'
+
+
+def test_pygments_highlighter_not_installed(capsys, monkeypatch):
+    monkeypatch.setenv("TRECLI_JSONC_HIGHLIGHTER", "pygments")
+    monkeypatch.setitem(sys.modules, "pygments", None)
+    with click.Context(click.Command("test"), color=True):
+        output_jsonc({"id": "ws1"})
+    captured = capsys.readouterr()
+    assert _ANSI.sub("", captured.out) == '{\n  "id": "ws1"\n}\n\n'
+    assert "pygments is not installed" in captured.err
@@ -0,0 +1,66 @@
+import subprocess
+import sys
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from tre.lazy_group import LazyGroup
+from tre.main import cli
+
+
+def _run_python(code: str) -> str:
+    return subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+
+
+def test_help_does_not_import_commands():
+    output = _run_python(
+        "import sys\n"
+        "from tre.main import cli\n"
+        "try:\n"
+        "    cli.main(['--help'], prog_name='tre')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(name for name in sys.modules if name.startswith('tre.commands')))\n")
+    assert "workspaces" in output
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_top_level_completion_does_not_import_commands():
+    items = _run_python(
+        "import sys\n"
+        "from click.shell_completion import ShellComplete\n"
+        "from tre.main import cli\n"
+        "completions = ShellComplete(cli, {}, 'tre', '_TRE_COMPLETE').get_completions([], 'work')\n"
+        "print([item.value for item in completions])\n"
+        "print(sorted(name for name in sys.modules if name.startswith('tre.commands')))\n").strip().splitlines()
+    assert items[0] == str(sorted(name for name in cli.lazy_subcommands if name.startswith("work")))
+    assert items[1] == "[]"
+
+
+@pytest.mark.parametrize("name", sorted(cli.lazy_subcommands))
+def test_lazy_subcommand_matches_the_command(name):
+    ctx = click.Context(cli)
+    command = cli.get_command(ctx, name)
+    assert isinstance(command, click.Command)
+    # the short help listed without importing the command is the command's own help
+    _, short_help = cli.lazy_subcommands[name]
+    assert command.help.strip() == short_help
+
+
+def test_command_that_is_not_a_click_command():
+    group = LazyGroup(name="group", lazy_subcommands={"echo": ("click.echo", "Not a command")})
+    with pytest.raises(ValueError):
+        group.get_command(click.Context(group), "echo")
+
+
+def test_lazy_and_eager_commands_are_listed():
+    @click.command(name="eager", help="An eager command")
+    def eager():
+        pass
+
+    group = LazyGroup(name="group", commands=[eager], lazy_subcommands={"lazy": ("tre.commands.health.health", "A lazy command")})
+    result = CliRunner().invoke(group, ["--help"])
+    assert result.exit_code == 0
+    lines = result.output.split("Commands:")[1].split()
+    assert lines == ["eager", "An", "eager", "command", "lazy", "A", "lazy", "command"]
@@ -0,0 +1,105 @@
+import logging
+
+import pytest
+
+from click.testing import CliRunner
+
+from tre.commands import login
+from tre.commands.login import _get_workspace_scopes, get_device_flow_max_scopes
+
+log = logging.getLogger(__name__)
+
+
+def test_scopes_are_looked_up_for_unknown_workspaces(stub_estate, use_stub_api):
+    for workspace_id in ["ws1", "ws2", "ws3"]:
+        stub_estate.add(f"/workspaces/{workspace_id}")
+    client = use_stub_api(stub_estate.handler)
+
+    scopes = _get_workspace_scopes(log, client, ["ws1", "ws2", "ws3"], {})
+
+    assert scopes == ["api://ws1", "api://ws2", "api://ws3"]
+    assert sorted(stub_estate.get_request_paths()) == ["/api/workspaces/ws1", "/api/workspaces/ws2", "/api/workspaces/ws3"]
+
+
+def test_known_scopes_are_used_without_api_calls(stub_estate, use_stub_api):
+    stub_estate.add("/workspaces/ws2")
+    client = use_stub_api(stub_estate.handler)
+
+    scopes = _get_workspace_scopes(log, client, ["ws1", "ws2"], {"ws1": "api://known-ws1"})
+
+    assert scopes == ["api://known-ws1", "api://ws2"]
+    assert stub_estate.get_request_paths() == ["/api/workspaces/ws2"]
+
+
+def test_cached_scopes_are_used_without_api_calls(stub_estate, use_stub_api):
+    client = use_stub_api(stub_estate.handler)
+    _get_workspace_scopes(log, client, ["ws1"], {"ws1": "api://ws1"})
+
+    assert _get_workspace_scopes(log, client, ["ws1"], {}) == ["api://ws1"]
+    assert stub_estate.requests == []
+
+
+def test_duplicate_scopes_are_removed(stub_estate, use_stub_api):
+    client = use_stub_api(stub_estate.handler)
+    assert _get_workspace_scopes(log, client, ["ws1", "ws2"], {"ws1": "api://shared", "ws2": "api://shared"}) == ["api://shared"]
+
+
+@pytest.mark.parametrize("value, expected", [(None, 40), ("5", 5), ("0", 1)])
+def test_device_flow_max_scopes(monkeypatch, value, expected):
+    if value is not None:
+        monkeypatch.setenv("TRECLI_DEVICE_FLOW_MAX_SCOPES", value)
+    assert get_device_flow_max_scopes() == expected
+
+
+class FakeMsalApp:
+    def __init__(self):
+        self.flow_scopes = []
+
+    def initiate_device_flow(self, scopes):
+        self.flow_scopes.append(scopes)
+        return {"user_code": "code", "message": "Enter the code"}
+
+    def acquire_token_by_device_flow(self, flow):
+        pass
+
+
+@pytest.fixture
+def msal_app(monkeypatch):
+    app = FakeMsalApp()
+    monkeypatch.setattr(login, "get_msal_app", lambda *args: (app, None))
+    monkeypatch.setattr(login, "save_token_cache", lambda *args: None)
+    return app
+
+
+def _login(*args):
+    return CliRunner(mix_stderr=False).invoke(login.login_device_code, [
+        "--base-url", "https://tre.example.com",
+        "--client-id", "client-id",
+        "--aad-tenant-id", "tenant-id",
+        "--api-scope", "api://tre",
+        *args,
+    ])
+
+
+def test_all_workspaces_uses_the_scopes_from_the_list_in_batches(stub_estate, msal_app, monkeypatch):
+    for workspace_id in ["ws1", "ws2", "ws3"]:
+        stub_estate.add(f"/workspaces/{workspace_id}")
+    monkeypatch.setenv("TRECLI_DEVICE_FLOW_MAX_SCOPES", "2")
+
+    result = _login("--all-workspaces")
+
+    assert result.exit_code == 0, result.output
+    assert msal_app.flow_scopes == [
+        ["api://tre"],
+        ["api://tre", "api://ws1", "api://ws2"],
+        ["api://tre", "api://ws3"],
+    ]
+    assert "(2 of 2)" in result.output
+    # the scopes come from the list response, so the workspaces aren't fetched individually
+    assert stub_estate.get_request_paths() == ["/api/workspaces"]
+
+
+def test_workspace_and_all_workspaces_are_not_compatible(msal_app):
+    result = _login("--workspace", "ws1", "--all-workspaces")
+    assert result.exit_code == 1
+    assert msal_app.flow_scopes == []
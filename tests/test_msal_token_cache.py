@@ -0,0 +1,139 @@
+import json
+import time
+
+import pytest
+
+from tre import msal_token_cache
+from tre.msal_token_cache import find_cached_access_token, load_token_cache, save_token_cache
+
+CLIENT_ID = "client-id"
+TENANT_ID = "tenant-id"
+SCOPE = "api://tre/user_impersonation"
+
+
+def _account(home_account_id: str, environment: str = "login.microsoftonline.com") -> dict:
+    return {
+        "home_account_id": home_account_id,
+        "environment": environment,
+        "realm": TENANT_ID,
+        "local_account_id": home_account_id,
+        "username": f"{home_account_id}@example.com",
+        "authority_type": "MSSTS",
+    }
+
+
+def _access_token(home_account_id: str, secret: str, expires_in: float, target: str = SCOPE, client_id: str = CLIENT_ID) -> dict:
+    return {
+        "credential_type": "AccessToken",
+        "secret": secret,
+        "home_account_id": home_account_id,
+        "environment": "login.microsoftonline.com",
+        "client_id": client_id,
+        "target": target,
+        "realm": TENANT_ID,
+        "expires_on": str(int(time.time() + expires_in)),
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_memo(monkeypatch):
+    monkeypatch.setattr(msal_token_cache, "_access_tokens", {})
+
+
+@pytest.fixture
+def token_cache_file(tmp_path):
+    return tmp_path / "token_cache.json"
+
+
+def _write_cache(path, accounts: "list[dict]", access_tokens: "list[dict]") -> None:
+    path.write_text(json.dumps({
+        "Account": {f"{account['home_account_id']}-{account['environment']}": account for account in accounts},
+        "AccessToken": {f"{index}": token for index, token in enumerate(access_tokens)},
+    }))
+
+
+def test_find_cached_access_token(token_cache_file):
+    _write_cache(token_cache_file, [_account("a")], [_access_token("a", "token-a", 3600)])
+    assert find_cached_access_token(str(token_cache_file), CLIENT_ID, TENANT_ID, SCOPE) == "token-a"
+
+
+def test_scope_is_matched_case_insensitively_within_the_target(token_cache_file):
+    _write_cache(token_cache_file, [_account("a")], [_access_token("a", "token-a", 3600, target=f"openid {SCOPE.upper()}")])
+    assert find_cached_access_token(str(token_cache_file), CLIENT_ID, TENANT_ID, SCOPE) == "token-a"
+
+
+@pytest.mark.parametrize("token", [
+    _access_token("a", "expired", -60),
+    # within the refresh margin (default 300 seconds)
+    _access_token("a", "expiring", 60),
+    _access_token("a", "other-scope", 3600, target="api://other/.default"),
+    _access_token("a", "other-client", 3600, client_id="other-client"),
+])
+def test_unusable_tokens_are_ignored(token_cache_file, token):
+    _write_cache(token_cache_file, [_account("a")], [token])
+    assert find_cached_access_token(str(token_cache_file), CLIENT_ID, TENANT_ID, SCOPE) is None
+
+
+def test_only_tokens_for_the_selected_account_are_used(token_cache_file):
+    # MSAL uses the first account (for the authority host) - a token for another account
+    # mustn't be returned even if it expires later
+    _write_cache(
+        token_cache_file,
+        [_account("other", environment="login.windows.net"), _account("a"), _account("b")],
+        [_access_token("b", "token-b", 7200), _access_token("a", "token-a", 3600), _access_token("other", "token-other", 7200)])
+    assert find_cached_access_token(str(token_cache_file), CLIENT_ID, TENANT_ID, SCOPE) == "token-a"
+
+
+def test_no_token_without_an_account(token_cache_file):
+    _write_cache(token_cache_file, [], [_access_token("a", "token-a", 3600)])
+    assert find_cached_access_token(str(token_cache_file), CLIENT_ID, TENANT_ID, SCOPE) is None
+
+
+def test_missing_cache_file(token_cache_file):
+    assert find_cached_access_token(str(token_cache_file), CLIENT_ID, TENANT_ID, SCOPE) is None
+
+
+def _set_entries(cache, section: str, entries: dict) -> None:
+    # as MSAL would when adding/removing tokens
+    cache._cache[section] = entries
+    cache.has_state_changed = True
+
+
+def test_save_merges_changes_since_load(token_cache_file):
+    token_cache_file.write_text(json.dumps({"AccessToken": {"a": {"secret": "a"}, "b": {"secret": "b"}}, "RefreshToken": {"r": {"secret": "r"}}}))
+    cache = load_token_cache(str(token_cache_file))
+
+    # another process adds a token and updates the refresh token
+    on_disk = json.loads(token_cache_file.read_text())
+    on_disk["AccessToken"]["other"] = {"secret": "other"}
+    on_disk["RefreshToken"]["r"] = {"secret": "r2"}
+    token_cache_file.write_text(json.dumps(on_disk))
+
+    # this process removes b and adds c
+    _set_entries(cache, "AccessToken", {"a": {"secret": "a"}, "c": {"secret": "c"}})
+    save_token_cache(cache, str(token_cache_file))
+
+    saved = json.loads(token_cache_file.read_text())
+    assert saved["AccessToken"] == {"a": {"secret": "a"}, "c": {"secret": "c"}, "other": {"secret": "other"}}
+    # unchanged by this process, so the other process's update is kept
+    assert saved["RefreshToken"] == {"r": {"secret": "r2"}}
+    assert not cache.has_state_changed
+
+
+def test_save_after_save_only_applies_new_changes(token_cache_file):
+    cache = load_token_cache(str(token_cache_file))
+    _set_entries(cache, "AccessToken", {"a": {"secret": "a"}})
+    save_token_cache(cache, str(token_cache_file))
+
+    # another process removes a (e.g. it expired), then this process adds b
+    token_cache_file.write_text(json.dumps({"AccessToken": {}}))
+    _set_entries(cache, "AccessToken", {"a": {"secret": "a"}, "b": {"secret": "b"}})
+    save_token_cache(cache, str(token_cache_file))
+
+    assert json.loads(token_cache_file.read_text())["AccessToken"] == {"b": {"secret": "b"}}
+
+
+def test_unchanged_cache_is_not_saved(token_cache_file):
+    cache = load_token_cache(str(token_cache_file))
+    save_token_cache(cache, str(token_cache_file))
+    assert not token_cache_file.exists()
@@ -0,0 +1,108 @@
+import json
+import logging
+
+import click
+import pytest
+
+from click.testing import CliRunner
+
+from tre.commands.operation import operation_show
+from tre.commands.operations.wait import operations_wait
+from tre.operation_events import OperationEvents, events_enabled
+from tre.polling import polling_options
+
+log = logging.getLogger(__name__)
+
+
+def _events(output: str) -> "list[dict]":
+    return [json.loads(line) for line in output.splitlines()]
+
+
+def _operation(status: str, updated: float, steps: "list[tuple[str, str, float]]" = ()) -> dict:
+    return {
+        "id": "op1",
+        "resourcePath": "/workspaces/ws1",
+        "action": "install",
+        "status": status,
+        "createdWhen": 1000,
+        "updatedWhen": updated,
+        "message": f"{status} message",
+        "steps": [
+            {"stepId": step_id, "resourceTemplateName": "tre-workspace-base", "status": step_status, "updatedWhen": step_updated}
+            for step_id, step_status, step_updated in steps
+        ],
+    }
+
+
+def test_events_for_status_changes(capsys):
+    events = OperationEvents()
+    events.observe(_operation("not_deployed", 1000, [("main", "not_deployed", 1000)]))
+    events.observe(_operation("deploying", 1010, [("main", "deploying", 1010)]))
+    # unchanged
+    events.observe(_operation("deploying", 1010, [("main", "deploying", 1010)]))
+    events.observe(_operation("deployed", 1075.5, [("main", "deployed", 1075)]))
+
+    assert [
+        (event["type"], event["status"], event["previousStatus"], event["elapsed"], event["previousStatusDuration"])
+        for event in _events(capsys.readouterr().out)
+    ] == [
+        ("operation", "not_deployed", None, 0, None),
+        ("step", "not_deployed", None, 0, None),
+        ("operation", "deploying", "not_deployed", 10, 10),
+        ("step", "deploying", "not_deployed", 10, 10),
+        ("operation", "deployed", "deploying", 75.5, 65.5),
+        ("step", "deployed", "deploying", 75, 65),
+    ]
+
+
+def test_event_properties(capsys):
+    OperationEvents().observe(_operation("deploying", 1010, [("main", "deploying", 1010)]))
+    operation_event, step_event = _events(capsys.readouterr().out)
+    assert operation_event.keys() == {
+        "timestamp", "type", "operationId", "resourcePath", "action", "status", "previousStatus", "elapsed", "previousStatusDuration", "message"}
+    assert (operation_event["operationId"], operation_event["resourcePath"], operation_event["action"], operation_event["message"]) == (
+        "op1", "/workspaces/ws1", "install", "deploying message")
+    assert (step_event["stepId"], step_event["resourceTemplateName"]) == ("main", "tre-workspace-base")
+
+
+def test_observed_time_is_used_without_updated_when(capsys):
+    events = OperationEvents()
+    operation = _operation("deploying", None)
+    del operation["createdWhen"]
+    events.observe(operation)
+    event, = _events(capsys.readouterr().out)
+    assert event["elapsed"] is None
+    assert event["previousStatusDuration"] is None
+
+
+def test_events_option():
+    @click.command()
+    @polling_options()
+    def command():
+        click.echo(events_enabled())
+
+    assert CliRunner().invoke(command, []).output == "False\n"
+    assert CliRunner().invoke(command, ["--events"]).output == "True\n"
+    assert not events_enabled()
+
+
+def test_operation_show_outputs_events_instead_of_the_result(stub_operations, capsys):
+    stub_operations.add("/workspaces/ws1", "op1", polls=2)
+    with click.Context(click.Command("test")) as ctx:
+        ctx.meta["tre.events"] = True
+        operation_show(log, "/api/workspaces/ws1/operations/op1", False, "json", None)
+    events = _events(capsys.readouterr().out)
+    assert [(event["type"], event["status"]) for event in events] == [
+        ("operation", "deploying"), ("step", "deploying"), ("operation", "deployed"), ("step", "deployed")]
+
+
+@pytest.mark.parametrize("output_format", ["json", "table"])
+def test_wait_outputs_events_for_each_operation(stub_operations, output_format):
+    stub_operations.add("/workspaces/ws1", "op1", polls=1)
+    stub_operations.add("/workspaces/ws2", "op2", polls=2)
+    result = CliRunner(mix_stderr=False).invoke(operations_wait, [
+        "/api/workspaces/ws1/operations/op1", "/api/workspaces/ws2/operations/op2", "--events", "--output", output_format])
+    assert result.exit_code == 0, result.stderr
+    events = [event for event in _events(result.stdout) if event["type"] == "operation"]
+    assert sorted((event["operationId"], event["status"]) for event in events) == [
+        ("op1", "deployed"), ("op2", "deployed"), ("op2", "deploying")]
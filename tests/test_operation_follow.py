@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+import time
+
+import pytest
+
+from tre import operation_follow
+from tre.api_client import ApiClient
+from tre.async_api_client import AsyncApiClient
+from tre.estate import Resource
+from tre.operation_follow import OperationFollower, _iter_list_content, follow_operations
+
+log = logging.getLogger(__name__)
+TABLE_QUERY = "operations[].{id:id, status:status}"
+
+
+@pytest.fixture
+def estate(stub_estate):
+    stub_estate.add("/workspaces/ws1")
+    stub_estate.add("/workspaces/ws1/workspace-services/svc1")
+    stub_estate.add_operation("/workspaces/ws1", "completed", created=1000)
+    stub_estate.add_operation("/workspaces/ws1", "in-progress", status="deploying", created=2000)
+    stub_estate.add_operation("/workspaces/ws1/workspace-services/svc1", "svc-in-progress", status="deploying", created=3000)
+    return stub_estate
+
+
+@pytest.fixture
+def poll(estate):
+    """Create a function polling an OperationFollower for a resource"""
+    loop = asyncio.new_event_loop()
+    clients = []
+
+    def create(resource_path: str, recursive: bool = False, **kwargs):
+        client = AsyncApiClient(ApiClient.get_api_client_from_config())
+        clients.append(client)
+        follower = OperationFollower(log, client, Resource.from_path(resource_path), recursive, **kwargs)
+        return lambda: [operation["id"] for operation in loop.run_until_complete(follower.poll())]
+
+    yield create
+    for client in clients:
+        loop.run_until_complete(client.close())
+    loop.close()
+
+
+def _update(operation: dict, status: str) -> None:
+    operation["status"] = status
+    operation["updatedWhen"] = time.time()
+
+
+def test_first_poll_returns_operations_in_progress(poll):
+    assert poll("/workspaces/ws1")() == ["in-progress"]
+
+
+def test_new_and_changed_operations_are_returned(poll, estate):
+    follow = poll("/workspaces/ws1")
+    follow()
+    assert follow() == []
+
+    _update(estate.operations["/workspaces/ws1"][1], "deployed")
+    estate.add_operation("/workspaces/ws1", "new", status="deploying", created=time.time())
+    assert follow() == ["in-progress", "new"]
+    assert follow() == []
+
+
+def test_step_changes_are_returned(poll, estate):
+    operation = estate.operations["/workspaces/ws1"][1]
+    operation["steps"] = [{"stepId": "main", "status": "deploying"}]
+    follow = poll("/workspaces/ws1")
+    follow()
+    operation["steps"][0]["status"] = "deployed"
+    assert follow() == ["in-progress"]
+
+
+def test_unchanged_operations_are_not_transferred_again(poll, estate):
+    follow = poll("/workspaces/ws1")
+    follow()
+    follow()
+    assert [response.status_code for response in estate.responses] == [200, 304]
+
+
+def test_recursive_includes_child_resources(poll, estate):
+    follow = poll("/workspaces/ws1", recursive=True, resource_refresh_polls=2)
+    assert sorted(follow()) == ["in-progress", "svc-in-progress"]
+
+    # new child resources are picked up when the resources are refreshed
+    estate.add("/workspaces/ws1/workspace-services/svc2")
+    estate.add_operation("/workspaces/ws1/workspace-services/svc2", "svc2-in-progress", status="deploying")
+    assert follow() == []
+    assert follow() == ["svc2-in-progress"]
+
+
+def test_list_content():
+    polls = [[{"id": "op1"}], [], [{"id": "op2"}, {"id": "op3"}]]
+    content = b"".join(_iter_list_content(polls))
+    assert json.loads(content + b"]}") == {"operations": [{"id": "op1"}, {"id": "op2"}, {"id": "op3"}]}
+
+
+@pytest.fixture
+def between_polls(monkeypatch):
+    """Run each of the given functions between polls (instead of sleeping), and then stop following"""
+    def use(*changes):
+        remaining = list(changes)
+
+        def sleep(interval):
+            if len(remaining) == 0:
+                raise KeyboardInterrupt()
+            remaining.pop(0)()
+
+        monkeypatch.setattr(operation_follow.time, "sleep", sleep)
+    return use
+
+
+def test_follow_table_has_a_single_header(estate, between_polls, capsys):
+    operation = estate.operations["/workspaces/ws1"][1]
+    between_polls(lambda: _update(operation, "deployed"))
+    follow_operations(log, "/api/workspaces/ws1/operations", False, 5, "table", None, TABLE_QUERY)
+    assert capsys.readouterr().out.splitlines() == [
+        "id           status",
+        "-----------  ---------",
+        "in-progress  deploying",
+        "in-progress  deployed",
+    ]
+
+
+def test_follow_ndjson(estate, between_polls, capsys):
+    operation = estate.operations["/workspaces/ws1"][1]
+    between_polls(lambda: None, lambda: _update(operation, "deployed"))
+    follow_operations(log, "/api/workspaces/ws1/operations", True, 5, "ndjson", TABLE_QUERY, TABLE_QUERY)
+    # ordered by updatedWhen within each poll
+    assert [json.loads(line) for line in capsys.readouterr().out.splitlines()] == [
+        {"id": "in-progress", "status": "deploying"},
+        {"id": "svc-in-progress", "status": "deploying"},
+        {"id": "in-progress", "status": "deployed"},
+    ]
+
+
+def test_follow_json_outputs_a_document_per_poll(estate, between_polls, capsys):
+    operation = estate.operations["/workspaces/ws1"][1]
+    between_polls(lambda: _update(operation, "deployed"))
+    follow_operations(log, "/api/workspaces/ws1/operations", False, 5, "json", "operations[].status", TABLE_QUERY)
+    assert [json.loads(document) for document in capsys.readouterr().out.split("\n") if document] == [["deploying"], ["deployed"]]
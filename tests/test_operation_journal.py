@@ -0,0 +1,132 @@
+import json
+import logging
+
+import httpx
+import pytest
+
+from click.testing import CliRunner
+
+from tre.commands.operations.operation import operation_resume
+from tre.commands.operations.pending import operations_pending
+from tre.operation_journal import OperationJournal
+
+log = logging.getLogger(__name__)
+BASE_URL = "https://tre.example.com"
+
+
+def _accepted(operation: dict) -> httpx.Response:
+    return httpx.Response(202, json={"operation": operation})
+
+
+def test_add_and_remove(tmp_path):
+    journal = OperationJournal(BASE_URL, tmp_path / "journal.json")
+    journal.add("/api/workspaces/ws2/operations/op2", "api://root", _accepted({"id": "op2", "resourcePath": "/workspaces/ws2", "action": "install", "createdWhen": 20}))
+    journal.add("/api/workspaces/ws1/operations/op1", None, _accepted({"id": "op1", "resourcePath": "/workspaces/ws1", "action": "upgrade", "createdWhen": 10}))
+
+    # oldest first
+    assert journal.get_entries() == [
+        {"id": "op1", "resourcePath": "/workspaces/ws1", "action": "upgrade", "url": "/api/workspaces/ws1/operations/op1", "scopeId": None, "startedWhen": 10},
+        {"id": "op2", "resourcePath": "/workspaces/ws2", "action": "install", "url": "/api/workspaces/ws2/operations/op2", "scopeId": "api://root", "startedWhen": 20},
+    ]
+    # entries are per API
+    assert OperationJournal("https://other.example.com", tmp_path / "journal.json").get_entries() == []
+
+    journal.remove("op1")
+    journal.remove("not-in-journal")
+    assert [entry["id"] for entry in journal.get_entries()] == ["op2"]
+    journal.remove("op2")
+    assert json.loads((tmp_path / "journal.json").read_text()) == {}
+
+
+@pytest.mark.parametrize("content", [b"", b"not json", b'{"workspace": {}}', b'{"operation": {"status": "deploying"}}'])
+def test_responses_without_an_operation_are_ignored(tmp_path, content):
+    journal = OperationJournal(BASE_URL, tmp_path / "journal.json")
+    journal.add("/api/workspaces/ws1/operations/op1", None, httpx.Response(202, content=content))
+    assert journal.get_entries() == []
+
+
+def test_api_client_records_started_operations(stub_api_client):
+    operation = {"id": "op1", "resourcePath": "/workspaces/ws1", "action": "install", "createdWhen": 10}
+    client = stub_api_client(lambda request: httpx.Response(202, headers={"Location": "/api/workspaces/ws1/operations/op1"}, json={"operation": operation}))
+    client.call_api(log, "POST", "/api/workspaces", json_data={}, scope_id="api://root")
+    assert [(entry["id"], entry["url"], entry["scopeId"]) for entry in client.operation_journal.get_entries()] == [
+        ("op1", "/api/workspaces/ws1/operations/op1", "api://root")]
+
+
+@pytest.fixture
+def journal(stub_operations) -> OperationJournal:
+    return OperationJournal(BASE_URL)
+
+
+@pytest.fixture
+def start_operation(journal, stub_operations):
+    """Start an operation (as for a command run with --no-wait), recording it in the journal"""
+    def start(resource_path: str, operation_id: str, **kwargs):
+        operation = stub_operations.add(resource_path, operation_id, **kwargs)
+        journal.add(f"/api{resource_path}/operations/{operation_id}", None, _accepted(operation))
+    return start
+
+
+def test_pending_lists_operations_that_have_not_completed(journal, start_operation):
+    start_operation("/workspaces/ws1", "op1", polls=5, created=10)
+    start_operation("/workspaces/ws2", "op2", polls=1, created=20)
+    start_operation("/workspaces/ws3", "op3", polls=5, created=30)
+    result = CliRunner(mix_stderr=False).invoke(operations_pending, ["--output", "json", "--query", "operations[].id"])
+    assert result.exit_code == 0, result.stderr
+    assert json.loads(result.stdout) == ["op1", "op3"]
+    assert "Operation op2 (install /workspaces/ws2) has completed: deployed" in result.stderr
+    assert [entry["id"] for entry in journal.get_entries()] == ["op1", "op3"]
+
+
+def test_pending_removes_operations_that_no_longer_exist(journal, start_operation, stub_operations):
+    start_operation("/workspaces/ws1", "op1", polls=5)
+    del stub_operations.operations["op1"]
+    result = CliRunner(mix_stderr=False).invoke(operations_pending, ["--output", "json"])
+    assert json.loads(result.stdout) == {"operations": []}
+    assert journal.get_entries() == []
+
+
+def test_pending_wait(journal, start_operation):
+    start_operation("/workspaces/ws1", "op1", polls=2)
+    start_operation("/workspaces/ws2", "op2", polls=3)
+    result = CliRunner(mix_stderr=False).invoke(operations_pending, ["--wait", "--output", "ndjson", "--query", "operations[].id"])
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout.splitlines() == ['"op1"', '"op2"']
+    assert journal.get_entries() == []
+
+
+def test_resume_single_pending_operation(journal, start_operation):
+    start_operation("/workspaces/ws1", "op1", polls=2)
+    result = CliRunner(mix_stderr=False).invoke(operation_resume, ["--output", "json", "--query", "operation.status"])
+    assert result.exit_code == 0, result.stderr
+    assert json.loads(result.stdout) == "deployed"
+    assert journal.get_entries() == []
+
+
+def test_resume_by_id_or_url(journal, start_operation):
+    start_operation("/workspaces/ws1", "op1", polls=1)
+    start_operation("/workspaces/ws2", "op2", polls=1)
+    runner = CliRunner(mix_stderr=False)
+    assert runner.invoke(operation_resume, ["--output", "none"]).exit_code == 2
+    assert runner.invoke(operation_resume, ["op2", "--output", "none"]).exit_code == 0
+    assert runner.invoke(operation_resume, ["/api/workspaces/ws1/operations/op1", "--output", "none"]).exit_code == 0
+    assert journal.get_entries() == []
+
+
+def test_resume_operation_not_in_the_journal(journal, stub_operations):
+    stub_operations.add("/workspaces/ws1/workspace-services/svc1", "op1", polls=1)
+    runner = CliRunner(mix_stderr=False)
+    result = runner.invoke(operation_resume, ["op1"])
+    assert result.exit_code == 1
+    assert "not a pending operation" in result.stderr
+
+    result = runner.invoke(operation_resume, ["/api/workspaces/ws1/workspace-services/svc1/operations/op1", "--output", "none"])
+    assert result.exit_code == 0, result.stderr
+    assert stub_operations.requests[-1].headers["Authorization"] == "Bearer token-for-api://ws1"
+
+
+def test_failed_operation_is_removed(journal, start_operation):
+    start_operation("/workspaces/ws1", "op1", polls=1, final_status="deployment_failed")
+    result = CliRunner(mix_stderr=False).invoke(operation_resume, ["--output", "none"])
+    assert result.exit_code == 1
+    assert journal.get_entries() == []
@@ -0,0 +1,95 @@
+import json
+import time
+
+import click
+import pytest
+
+from click.testing import CliRunner
+
+from tre.commands.operations.list import _iter_merged_content, _parse_since, operations_list
+
+
+def _since(value):
+    return _parse_since(None, None, value)
+
+
+@pytest.mark.parametrize("value, seconds_ago", [("30s", 30), ("15m", 15 * 60), ("2h", 2 * 60 * 60), ("1.5d", 36 * 60 * 60)])
+def test_since_relative_time(value, seconds_ago):
+    assert _since(value) == pytest.approx(time.time() - seconds_ago, abs=5)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1660000000", 1660000000),
+    ("1660000000.5", 1660000000.5),
+    ("2022-08-08T23:06:40Z", 1660000000),
+    ("2022-08-08T23:06:40+00:00", 1660000000),
+    ("2022-08-09T01:06:40+02:00", 1660000000),
+])
+def test_since_absolute_time(value, expected):
+    assert _since(value) == expected
+
+
+@pytest.mark.parametrize("value", ["yesterday", "2w", "-1h", "2022-13-01"])
+def test_invalid_since(value):
+    with pytest.raises(click.BadParameter):
+        _since(value)
+
+
+def test_no_since():
+    assert _since(None) is None
+
+
+def test_merged_content_is_most_recently_updated_first():
+    lists = [
+        [{"id": "a3", "updatedWhen": 30}, {"id": "a1", "updatedWhen": 10}],
+        [{"id": "b4", "updatedWhen": 40}, {"id": "b2", "updatedWhen": 20}, {"id": "b0"}],
+    ]
+    content = json.loads(b"".join(_iter_merged_content(lists)))
+    assert [operation["id"] for operation in content["operations"]] == ["b4", "a3", "b2", "a1", "b0"]
+    assert json.loads(b"".join(_iter_merged_content([]))) == {"operations": []}
+
+
+@pytest.fixture
+def estate(stub_estate):
+    stub_estate.add("/workspaces/ws1")
+    stub_estate.add("/workspaces/ws1/workspace-services/svc1")
+    stub_estate.add("/workspaces/ws2")
+    stub_estate.add("/shared-services/ss1")
+    stub_estate.add_operation("/workspaces/ws1", "ws1-old", created=1000, duration=10)
+    stub_estate.add_operation("/workspaces/ws1", "ws1-new", created=5000, duration=10, status="deploying")
+    stub_estate.add_operation("/workspaces/ws1/workspace-services/svc1", "svc1", created=3000, duration=10)
+    stub_estate.add_operation("/workspaces/ws2", "ws2", created=4000, duration=10, status="deployment_failed")
+    stub_estate.add_operation("/shared-services/ss1", "ss1", created=2000, duration=10)
+    return stub_estate
+
+
+def _list_ids(args: "list[str]") -> "list[str]":
+    result = CliRunner(mix_stderr=False).invoke(operations_list, args + ["--output", "json", "--query", "operations[].id"])
+    assert result.exit_code == 0, result.stderr
+    return json.loads(result.stdout)
+
+
+def test_list_all(estate):
+    assert _list_ids(["--all"]) == ["ws1-new", "ws2", "svc1", "ss1", "ws1-old"]
+
+
+def test_list_for_workspaces(estate):
+    assert _list_ids(["--workspace", "ws1"]) == ["ws1-new", "svc1", "ws1-old"]
+    assert _list_ids(["--workspace", "ws1", "--workspace", "ws2"]) == ["ws1-new", "ws2", "svc1", "ws1-old"]
+
+
+def test_list_filters(estate):
+    assert _list_ids(["--all", "--since", "2500"]) == ["ws1-new", "ws2", "svc1"]
+    assert _list_ids(["--all", "--status", "deploying", "--status", "deployment_failed"]) == ["ws1-new", "ws2"]
+
+
+def test_list_limit(estate):
+    result = CliRunner(mix_stderr=False).invoke(operations_list, ["--all", "--limit", "2", "--output", "ndjson", "--query", "operations[].id"])
+    assert result.stdout.splitlines() == ['"ws1-new"', '"ws2"']
+
+
+@pytest.mark.parametrize("args", [[], ["--all", "--workspace", "ws1"]])
+def test_all_or_workspace_is_required(args):
+    result = CliRunner(mix_stderr=False).invoke(operations_list, args)
+    assert result.exit_code == 2
+    assert "Specify either --all or --workspace" in result.stderr
@@ -0,0 +1,129 @@
+import json
+
+import pytest
+
+from click.testing import CliRunner
+
+from tre.commands.operations.stats import OperationStats, _percentile, operations_stats
+from tre.estate import Resource
+
+WORKSPACE = Resource("workspace", "/workspaces/ws1", {"id": "ws1", "templateName": "tre-workspace-base", "templateVersion": "1.2.0"})
+
+
+@pytest.mark.parametrize("values, percent, expected", [
+    ([5], 50, 5),
+    ([5], 95, 5),
+    ([1, 2, 3, 4], 0, 1),
+    ([1, 2, 3, 4], 100, 4),
+    ([1, 2, 3, 4], 50, 2.5),
+    ([1, 2, 3, 4], 25, 1.75),
+    ([10, 20, 30, 40, 50], 90, 46),
+    ([0, 100], 95, 95),
+])
+def test_percentile(values, percent, expected):
+    assert _percentile(values, percent) == pytest.approx(expected)
+
+
+def test_percentile_matches_numpy():
+    numpy = pytest.importorskip("numpy")
+    values = sorted([12.5, 3, 7, 100, 41, 41, 8, 19.25, 60, 2])
+    for percent in [0, 10, 25, 50, 75, 90, 95, 99, 100]:
+        assert _percentile(values, percent) == pytest.approx(numpy.percentile(values, percent))
+
+
+def _operations(durations: "list[float]", status: str = "deployed", action: str = "install") -> "list[dict]":
+    return [
+        {"id": f"{action}-{status}-{index}", "resourcePath": WORKSPACE.resource_path, "action": action, "status": status,
+         "createdWhen": 1000 + index * 1000, "updatedWhen": 1000 + index * 1000 + duration}
+        for index, duration in enumerate(durations)
+    ]
+
+
+def test_stats_for_an_action_and_template():
+    stats = OperationStats()
+    stats.add(WORKSPACE, _operations([10, 20, 30, 40]) + _operations([5], status="deployment_failed"))
+    record, = stats.get_content()["stats"]
+    assert record == {
+        "action": "install",
+        "template": "tre-workspace-base",
+        "currentTemplateVersion": "1.2.0",
+        "step": None,
+        "stepTemplate": None,
+        "count": 5,
+        "succeeded": 4,
+        "failed": 1,
+        "failureRate": 0.2,
+        # failures are excluded from the durations
+        "mean": 25,
+        "p50": 25,
+        "p90": 37,
+        "p95": 38.5,
+        "max": 40,
+        "outliers": 0,
+    }
+
+
+def test_outliers_are_beyond_the_upper_tukey_fence():
+    stats = OperationStats()
+    # q1 = 11.75 and q3 = 15.25, so the fence is 15.25 + 1.5 * 3.5 = 20.5
+    stats.add(WORKSPACE, _operations([16, 10, 11, 40, 12, 13, 14, 15]))
+    content = stats.get_content()
+    assert content["stats"][0]["outliers"] == 1
+    outlier, = content["outliers"]
+    assert (outlier["id"], outlier["duration"], outlier["threshold"], outlier["p50"]) == ("install-deployed-3", 40, 20.5, 13.5)
+
+
+def test_no_outliers_for_small_groups():
+    stats = OperationStats()
+    stats.add(WORKSPACE, _operations([10, 10, 1000]))
+    assert stats.get_content()["outliers"] == []
+
+
+def test_operations_are_grouped_by_action_and_template():
+    stats = OperationStats()
+    stats.add(WORKSPACE, _operations([10]) + _operations([20], action="upgrade"))
+    stats.add(Resource("workspace", "/workspaces/ws2", {"id": "ws2", "templateName": "tre-workspace-airlock", "templateVersion": "0.5"}), _operations([30]))
+    assert [(record["action"], record["template"], record["p50"]) for record in stats.get_content()["stats"]] == [
+        ("install", "tre-workspace-airlock", 30), ("install", "tre-workspace-base", 10), ("upgrade", "tre-workspace-base", 20)]
+
+
+def test_in_progress_and_old_operations_are_excluded():
+    stats = OperationStats(created_after=1500)
+    stats.add(WORKSPACE, _operations([10, 20, 30]) + _operations([5], status="deploying"))
+    assert stats.get_content()["stats"][0]["count"] == 2
+
+
+def test_step_stats():
+    stats = OperationStats(include_steps=True)
+    operation = {
+        "id": "op1", "action": "install", "status": "deployment_failed", "createdWhen": 1000, "updatedWhen": 1100,
+        "steps": [
+            {"stepId": "pre", "templateStepId": "pre-step", "resourceTemplateName": "tre-shared-service-firewall", "status": "updated", "updatedWhen": 1030},
+            {"stepId": "main", "resourceTemplateName": "tre-workspace-base", "status": "deployment_failed", "updatedWhen": 1100},
+            {"stepId": "post", "resourceTemplateName": "tre-shared-service-firewall", "status": "awaiting_update"},
+        ],
+    }
+    stats.add(WORKSPACE, [operation])
+    records = {record["step"]: record for record in stats.get_content()["stats"]}
+    assert set(records) == {None, "pre-step", "main"}
+    assert (records["pre-step"]["stepTemplate"], records["pre-step"]["p50"]) == ("tre-shared-service-firewall", 30)
+    assert (records["main"]["failed"], records["main"]["p50"]) == (1, None)
+
+
+def test_stats_command(stub_estate):
+    stub_estate.add("/workspaces/ws1", template_name="tre-workspace-base")
+    stub_estate.add("/workspaces/ws1/workspace-services/svc1", template_name="tre-service-guacamole")
+    stub_estate.add("/shared-services/ss1", template_name="tre-shared-service-firewall")
+    for index, duration in enumerate([100, 200, 300]):
+        stub_estate.add_operation("/workspaces/ws1", f"op{index}", created=1000 + index, duration=duration)
+    stub_estate.add_operation("/workspaces/ws1/workspace-services/svc1", "svc-op", duration=50)
+    stub_estate.add_operation("/shared-services/ss1", "ss-op", status="deployment_failed", duration=5)
+
+    result = CliRunner(mix_stderr=False).invoke(operations_stats, ["--output", "json", "--query", "stats[].[template, count, p50, failureRate]"])
+    assert result.exit_code == 0, result.stderr
+    assert json.loads(result.stdout) == [
+        ["tre-service-guacamole", 1, 50, 0],
+        ["tre-shared-service-firewall", 1, None, 1],
+        ["tre-workspace-base", 3, 200, 0],
+    ]
+    assert "Getting operations for 3 resource(s)" in result.stderr
@@ -0,0 +1,142 @@
+import json
+
+import click
+import pytest
+
+from click.testing import CliRunner
+
+from tre.commands.operations.wait import OperationRef, operations_wait, parse_operation_refs
+
+OPERATION = {"id": "op1", "resourcePath": "/workspaces/ws1", "status": "deploying"}
+
+
+@pytest.mark.parametrize("url", [
+    "/api/workspaces/ws1/operations/op1",
+    "https://tre.example.com/api/workspaces/ws1/operations/op1",
+    "/api/workspaces/ws1/operations/op1/",
+    "/workspaces/ws1/operations/op1",
+])
+def test_operation_url(url):
+    ref = OperationRef.from_url(url)
+    assert ref.key == ("/workspaces/ws1", "op1")
+    assert ref.url == "/api/workspaces/ws1/operations/op1"
+
+
+@pytest.mark.parametrize("url", ["/api/workspaces/ws1", "/api/workspaces/ws1/operations", "op1", "/api/other/ws1/operations/op1"])
+def test_invalid_operation_url(url):
+    with pytest.raises(click.BadParameter):
+        OperationRef.from_url(url)
+
+
+@pytest.mark.parametrize("resource_path, workspace_id", [
+    ("/workspaces/ws1", None),
+    ("/workspaces/ws1/workspace-services/svc1", "ws1"),
+    ("/workspaces/ws1/workspace-services/svc1/user-resources/ur1", "ws1"),
+    ("/shared-services/ss1", None),
+])
+def test_workspace_id_for_scope(resource_path, workspace_id):
+    assert OperationRef(resource_path, "op1").get_workspace_id() == workspace_id
+
+
+@pytest.mark.parametrize("values", [
+    [json.dumps({"operation": OPERATION})],
+    [json.dumps({"operations": [OPERATION]})],
+    [json.dumps(OPERATION)],
+    [json.dumps([OPERATION])],
+    [json.dumps({"operation": OPERATION}) + "\n" + json.dumps(OPERATION) + "\n"],
+    ["/api/workspaces/ws1/operations/op1\n/api/workspaces/ws1/operations/op1\n"],
+    ["/api/workspaces/ws1/operations/op1", json.dumps(OPERATION), ""],
+])
+def test_parse_operation_refs(values):
+    refs = parse_operation_refs(values)
+    assert [ref.key for ref in refs] == [("/workspaces/ws1", "op1")]
+
+
+def test_operations_from_json_have_their_state():
+    refs = parse_operation_refs([json.dumps({"operations": [OPERATION, {**OPERATION, "id": "op2"}]}), "/api/workspaces/ws1/operations/op3"])
+    assert [(ref.operation_id, ref.status) for ref in refs] == [("op1", "deploying"), ("op2", "deploying"), ("op3", None)]
+
+
+@pytest.mark.parametrize("value", ['{"id": "op1"}', '{"operation": ', '{"id": "op1", "resourcePath": "/workspaces/ws1"}\n{"id": '])
+def test_invalid_operation_json(value):
+    with pytest.raises(click.BadParameter):
+        parse_operation_refs([value])
+
+
+def _completed_ids(output: str) -> "list[str]":
+    return [json.loads(line)["id"] for line in output.splitlines()]
+
+
+def test_wait_outputs_operations_as_they_complete(stub_operations):
+    stub_operations.add("/workspaces/ws1", "op1", polls=3)
+    stub_operations.add("/shared-services/ss1", "op2", polls=1)
+    result = CliRunner(mix_stderr=False).invoke(operations_wait, [
+        "/api/workspaces/ws1/operations/op1",
+        "/api/shared-services/ss1/operations/op2",
+        "--output", "ndjson", "--query", "operations[].{id:id, status:status}"])
+    assert result.exit_code == 0, result.stderr
+    assert [json.loads(line) for line in result.stdout.splitlines()] == [{"id": "op2", "status": "deployed"}, {"id": "op1", "status": "deployed"}]
+
+
+def test_wait_coalesces_polls_for_a_resource(stub_operations):
+    for operation_id in ["op1", "op2", "op3"]:
+        stub_operations.add("/workspaces/ws1", operation_id, polls=3)
+    operations = json.dumps({"operations": [stub_operations.operations[operation_id] for operation_id in ["op1", "op2", "op3"]]})
+    result = CliRunner(mix_stderr=False).invoke(operations_wait, ["--output", "ndjson"], input=operations)
+    assert result.exit_code == 0, result.stderr
+    assert sorted(_completed_ids(result.stdout)) == ["op1", "op2", "op3"]
+    # operations from JSON have their state, so are polled with a single list call per poll
+    assert set(stub_operations.get_request_paths()) == {"/api/workspaces/ws1/operations"}
+
+
+def test_workspace_scope_is_used_for_child_resources(stub_operations):
+    stub_operations.add("/workspaces/ws1/workspace-services/svc1", "op1")
+    result = CliRunner(mix_stderr=False).invoke(operations_wait, ["/api/workspaces/ws1/workspace-services/svc1/operations/op1", "--output", "none"])
+    assert result.exit_code == 0, result.stderr
+    assert stub_operations.requests[-1].headers["Authorization"] == "Bearer token-for-api://ws1"
+
+
+def test_wait_fails_if_an_operation_fails(stub_operations):
+    stub_operations.add("/workspaces/ws1", "op1", polls=1)
+    stub_operations.add("/workspaces/ws2", "op2", polls=2, final_status="deployment_failed")
+    result = CliRunner(mix_stderr=False).invoke(operations_wait, [
+        "/api/workspaces/ws1/operations/op1", "/api/workspaces/ws2/operations/op2", "--output", "ndjson"])
+    assert result.exit_code == 1
+    assert _completed_ids(result.stdout) == ["op1", "op2"]
+    assert "Operation op2 (install /workspaces/ws2): deployment_failed" in result.stderr
+
+
+def test_wait_fails_for_missing_operations(stub_operations):
+    stub_operations.add("/workspaces/ws1", "op1", polls=1)
+    result = CliRunner(mix_stderr=False).invoke(operations_wait, [
+        "/api/workspaces/ws1/operations/op1", "/api/workspaces/ws1/operations/missing", "--output", "ndjson"])
+    assert result.exit_code == 1
+    assert _completed_ids(result.stdout) == ["op1"]
+    assert "Error getting operation /api/workspaces/ws1/operations/missing" in result.stderr
+
+
+def test_wait_timeout(stub_operations):
+    stub_operations.add("/workspaces/ws1", "op1", polls=1000)
+    result = CliRunner(mix_stderr=False).invoke(operations_wait, ["/api/workspaces/ws1/operations/op1", "--wait-timeout", "0.3"])
+    assert result.exit_code == 1
+    assert "Timed out waiting for 1 operation(s) to complete" in result.stderr
+
+
+def test_table_rows_are_output_as_operations_complete(stub_operations):
+    stub_operations.add("/workspaces/ws1", "op1", polls=1)
+    stub_operations.add("/workspaces/ws2", "op2", polls=3)
+    result = CliRunner(mix_stderr=False).invoke(operations_wait, [
+        "/api/workspaces/ws1/operations/op1", "/api/workspaces/ws2/operations/op2", "--query", "operations[].{id:id, status:status}"])
+    assert result.exit_code == 0, result.stderr
+    assert result.stdout.splitlines() == [
+        "id    status",
+        "----  --------",
+        "op1   deployed",
+        "op2   deployed",
+    ]
+
+
+def test_no_operations():
+    result = CliRunner(mix_stderr=False).invoke(operations_wait, [], input="")
+    assert result.exit_code == 2
+    assert "No operations specified" in result.stderr
@@ -0,0 +1,296 @@
+import json
+import logging
+
+import click
+import httpx
+import pytest
+
+from tre import json_codec
+from tre import output as output_module
+from tre.output import _compile_query, _iter_records, output
+
+log = logging.getLogger(__name__)
+
+WORKSPACES = {
+    "workspaces": [
+        {"id": "ws1", "properties": {"display_name": "One", "address_space": "10.0.1.0/24"}, "isEnabled": True},
+        {"id": "ws2", "properties": {"display_name": "Two"}, "isEnabled": False},
+    ]
+}
+WORKSPACES_JSON = json.dumps(WORKSPACES).encode("utf-8")
+WORKSPACES_QUERY = "workspaces[].{id:id, name:properties.display_name}"
+
+
+@pytest.fixture
+def no_parsing(monkeypatch):
+    """Fail the test if the content is parsed"""
+    def loads(data):
+        raise AssertionError("content was parsed")
+    monkeypatch.setattr(json_codec, "loads", loads)
+
+
+def test_json_output_without_a_query_is_not_parsed(capsys, no_parsing):
+    output(WORKSPACES_JSON, output_format="json")
+    assert capsys.readouterr().out == WORKSPACES_JSON.decode("utf-8") + "\n"
+
+
+def test_json_output_with_a_query(capsys):
+    output(WORKSPACES_JSON, output_format="json", query="workspaces[].id")
+    assert json.loads(capsys.readouterr().out) == ["ws1", "ws2"]
+
+
+def test_jsonc_output(capsys):
+    output(WORKSPACES_JSON, output_format="jsonc", query="workspaces[0].id")
+    assert capsys.readouterr().out == '"ws1"\n\n'
+
+
+def test_suppressed_output(capsys, no_parsing):
+    output(WORKSPACES_JSON, output_format="none")
+    assert capsys.readouterr().out == ""
+
+
+def test_content_is_parsed_once(capsys, monkeypatch):
+    calls = []
+    loads = json_codec.loads
+    monkeypatch.setattr(json_codec, "loads", lambda data: calls.append(data) or loads(data))
+    output(WORKSPACES_JSON, output_format="table", default_table_query=WORKSPACES_QUERY)
+    assert len(calls) == 1
+
+
+def test_queries_are_compiled_once():
+    _compile_query.cache_clear()
+    for _ in range(3):
+        _compile_query(WORKSPACES_QUERY)
+    assert _compile_query.cache_info().misses == 1
+    assert _compile_query.cache_info().hits == 2
+
+
+@pytest.mark.parametrize("query, project, expected", [
+    (None, True, [WORKSPACES]),
+    ("workspaces", True, WORKSPACES["workspaces"]),
+    (WORKSPACES_QUERY, True, [{"id": "ws1", "name": "One"}, {"id": "ws2", "name": "Two"}]),
+    (WORKSPACES_QUERY, False, WORKSPACES["workspaces"]),
+    ("workspaces[].properties.address_space", True, ["10.0.1.0/24"]),
+    ("workspaces[0].{id:id}", True, [{"id": "ws1"}]),
+    ("workspaces[0].{id:id}", False, [WORKSPACES["workspaces"][0]]),
+    ("{count: length(workspaces)}", True, [{"count": 2}]),
+    ("{count: length(workspaces)}", False, [WORKSPACES]),
+    ("missing", True, []),
+    ("missing[].id", True, []),
+])
+def test_iter_records(query, project, expected):
+    assert list(_iter_records(WORKSPACES, query, project)) == expected
+
+
+def test_unhandled_output_format():
+    with pytest.raises(click.ClickException):
+        output(WORKSPACES_JSON, output_format="yaml", query="workspaces")
+
+
+def test_ndjson_outputs_whole_items_by_default(capsys):
+    output(WORKSPACES_JSON, output_format="ndjson", default_table_query=WORKSPACES_QUERY)
+    assert [json.loads(line) for line in capsys.readouterr().out.splitlines()] == WORKSPACES["workspaces"]
+
+
+def test_ndjson_with_a_query(capsys):
+    output(WORKSPACES_JSON, output_format="ndjson", query=WORKSPACES_QUERY, default_table_query="workspaces")
+    assert capsys.readouterr().out == '{"id":"ws1","name":"One"}\n{"id":"ws2","name":"Two"}\n'
+
+
+def test_csv(capsys):
+    output(WORKSPACES_JSON, output_format="csv", default_table_query="workspaces[].{id:id, enabled:isEnabled, address:properties.address_space, properties:properties}")
+    assert capsys.readouterr().out.splitlines() == [
+        "id,enabled,address,properties",
+        'ws1,true,10.0.1.0/24,"{""display_name"":""One"",""address_space"":""10.0.1.0/24""}"',
+        'ws2,false,,"{""display_name"":""Two""}"',
+    ]
+
+
+def test_tsv_has_no_header(capsys):
+    output(WORKSPACES_JSON, output_format="tsv", default_table_query=WORKSPACES_QUERY)
+    assert capsys.readouterr().out == "ws1\tOne\nws2\tTwo\n"
+
+
+def test_csv_columns_are_taken_from_the_first_record(capsys):
+    content = json.dumps({"items": [{"a": 1, "b": 2}, {"b": 3, "c": 4}]})
+    output(content, output_format="csv", query="items")
+    assert capsys.readouterr().out == "a,b\n1,2\n,3\n"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("workspaces[].[id, isEnabled]", "ws1,true\nws2,false\n"),
+    ("workspaces[].id", "ws1\nws2\n"),
+    ("workspaces[0].id", "ws1\n"),
+])
+def test_csv_of_lists_and_values(capsys, query, expected):
+    output(WORKSPACES_JSON, output_format="csv", query=query)
+    assert capsys.readouterr().out == expected
+
+
+@pytest.mark.parametrize("output_format", ["ndjson", "csv", "tsv"])
+def test_record_output_limit(capsys, output_format):
+    output(WORKSPACES_JSON, output_format=output_format, query="workspaces[].id", limit=1)
+    assert capsys.readouterr().out.splitlines() == ['"ws1"' if output_format == "ndjson" else "ws1"]
+
+
+TABLE_RECORDS = [
+    {"id": "ws1", "cost": 1.5, "count": 10, "version": "1.0"},
+    {"id": "workspace-2", "cost": 100.25, "count": 7, "version": "0.12.3"},
+    {"id": "ws3", "cost": None, "count": -3, "version": None},
+]
+
+
+def test_table_matches_tabulate(capsys):
+    tabulate = pytest.importorskip("tabulate").tabulate
+    content = json.dumps({"items": [{"id": "ws1", "cost": 1.5, "count": 10}, {"id": "workspace-2", "cost": 100.25, "count": 7}]})
+    output(content, output_format="table", default_table_query="items[].{id:id, cost:cost, count:count}")
+    rows = [["ws1", 1.5, 10], ["workspace-2", 100.25, 7]]
+    assert capsys.readouterr().out == tabulate(rows, ["id", "cost", "count"]) + "\n"
+
+
+def test_table_aligns_numbers_on_the_decimal_point(capsys):
+    output(json.dumps({"items": TABLE_RECORDS}), output_format="table", query="items")
+    assert capsys.readouterr().out.splitlines() == [
+        "id             cost    count  version",
+        "-----------  ------  -------  ---------",
+        "ws1            1.5        10  1.0",
+        "workspace-2  100.25        7  0.12.3",
+        "ws3                       -3",
+    ]
+
+
+def test_table_of_lists(capsys):
+    output(WORKSPACES_JSON, output_format="table", query="workspaces[].[id, properties.display_name]")
+    assert capsys.readouterr().out == "ws1  One\nws2  Two\n"
+
+
+def test_table_limit(capsys):
+    output(json.dumps({"items": TABLE_RECORDS}), output_format="table", query="items[].id", limit=2)
+    assert capsys.readouterr().out == "ws1\nworkspace-2\n"
+
+
+def test_empty_table(capsys):
+    output('{"items": []}', output_format="table", query="items")
+    assert capsys.readouterr().out == ""
+
+
+def test_table_columns_and_widths_are_taken_from_the_sample(capsys, monkeypatch):
+    monkeypatch.setenv("TRECLI_TABLE_SAMPLE_SIZE", "2")
+    records = [{"id": "a", "size": 1}, {"id": "b", "size": 2}, {"id": "longer-id", "size": 3, "extra": "dropped"}]
+    output(json.dumps({"items": records}), output_format="table", query="items")
+    assert capsys.readouterr().out.splitlines() == [
+        "id      size",
+        "----  ------",
+        "a          1",
+        "b          2",
+        "longer-id       3",
+    ]
+
+
+def test_table_rows_are_written_before_all_records_are_produced(capsys):
+    def records():
+        yield {"id": "a"}
+        # the first row has been output
+        assert capsys.readouterr().out.splitlines()[-1] == "a"
+        yield {"id": "b"}
+
+    output_module._output_table(records(), sample_size=1)
+    assert capsys.readouterr().out == "b\n"
+
+
+def _chunks(content: bytes, size: int = 7):
+    return (content[index:index + size] for index in range(0, len(content), size))
+
+
+OPERATIONS = {"operations": [
+    {"id": "op1", "status": "deployed", "steps": [{"stepId": "a"}, {"stepId": "b"}]},
+    {"id": "op2", "status": "failed", "steps": []},
+    {"id": "op3", "status": "failed", "steps": None},
+]}
+OPERATIONS_JSON = json.dumps(OPERATIONS).encode("utf-8")
+
+
+@pytest.mark.parametrize("query, project", [
+    ("operations[].{id:id, status:status}", True),
+    ("operations[].{id:id, status:status}", False),
+    ("operations[?status=='failed'].id", True),
+    ("operations[?status=='failed']", False),
+    ("operations[?steps].id", True),
+    ("operations[].steps", True),
+    ("operations[].missing", True),
+])
+def test_streamed_records_match_records(query, project):
+    assert output_module.is_streamable_query(query)
+    streamed = list(output_module._iter_streamed_records(_chunks(OPERATIONS_JSON), query, project))
+    assert streamed == list(_iter_records(OPERATIONS, query, project))
+
+
+@pytest.mark.parametrize("query", ["operations", "operations[0].id", "{ids: operations[].id}", "length(operations)", "operations[].id | [0]", "operations[].steps[].stepId"])
+def test_queries_that_cannot_be_streamed(query):
+    assert not output_module.is_streamable_query(query)
+    assert output_module._iter_streamed_records(_chunks(OPERATIONS_JSON), query) is None
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, False), (False, False), ([], False), ({}, False), ("", False),
+    (0, True), (True, True), ([0], True), ({"a": None}, True), ("false", True),
+])
+def test_is_truthy(value, expected):
+    assert output_module._is_truthy(value) == expected
+
+
+@pytest.mark.parametrize("output_format, query", [
+    ("json", None),
+    ("json", "operations[].id"),
+    ("ndjson", None),
+    ("ndjson", "operations[?status=='failed'].id"),
+    ("csv", "operations[].{id:id, status:status}"),
+    ("table", None),
+    ("table", "operations[0]"),
+])
+def test_chunked_content_is_output_as_for_whole_content(capsys, output_format, query):
+    output(OPERATIONS_JSON, output_format=output_format, query=query, default_table_query="operations[].{id:id, status:status}")
+    expected = capsys.readouterr().out
+    output(_chunks(OPERATIONS_JSON), output_format=output_format, query=query, default_table_query="operations[].{id:id, status:status}")
+    assert capsys.readouterr().out == expected
+
+
+def test_records_are_output_as_chunks_are_read(capsys):
+    def chunks():
+        yield b'{"operations": [{"id": "op1"}, '
+        assert capsys.readouterr().out == '{"id":"op1"}\n'
+        yield b'{"id": "op2"}]}'
+
+    output(chunks(), output_format="ndjson", query="operations[]", incremental=True)
+    assert capsys.readouterr().out == '{"id":"op2"}\n'
+
+
+def test_stream_api_caches_the_streamed_content(stub_api_client):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"ETag": '"v1"'}, content=OPERATIONS_JSON)
+
+    client = stub_api_client(handler)
+    for _ in range(2):
+        with client.stream_api(log, "GET", "/api/operations") as response:
+            assert b"".join(response.iter_bytes()) == OPERATIONS_JSON
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+
+
+def test_stream_api_does_not_cache_large_content(stub_api_client, monkeypatch):
+    monkeypatch.setenv("TRECLI_HTTP_CACHE_MAX_SIZE_MB", str(len(OPERATIONS_JSON) / 1024 / 1024))
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, headers={"ETag": '"v1"'}, content=OPERATIONS_JSON)
+
+    client = stub_api_client(handler)
+    for _ in range(2):
+        with client.stream_api(log, "GET", "/api/operations") as response:
+            assert b"".join(response.iter_bytes()) == OPERATIONS_JSON
+    assert "If-None-Match" not in requests[1].headers
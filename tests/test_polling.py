@@ -0,0 +1,172 @@
+import json
+import logging
+
+import click
+import httpx
+import pytest
+
+from click.testing import CliRunner
+
+from tre.api_client import ApiClient
+from tre.commands import operation as operation_module
+from tre.commands.operation import operation_show
+from tre.polling import OperationDurations, PollingPolicy, is_operation_state_success, is_operation_state_terminal, polling_options
+
+log = logging.getLogger(__name__)
+OPERATION_URL = "/api/workspaces/ws1/operations/op1"
+
+
+@pytest.mark.parametrize("elapsed, expected", [(0, 1), (1, 1), (4, 2), (20, 10), (100, 30)])
+def test_delay_backs_off_with_elapsed_time(elapsed, expected):
+    assert PollingPolicy(interval=1, max_interval=30).get_delay(elapsed) == expected
+
+
+@pytest.mark.parametrize("elapsed, expected", [(0, 30), (540, 30), (590, 5), (600, 1), (620, 10), (1000, 30)])
+def test_delay_uses_the_expected_duration(elapsed, expected):
+    policy = PollingPolicy(interval=1, max_interval=30, expected_duration=600)
+    assert policy.get_delay(elapsed) == expected
+
+
+def test_max_interval_is_at_least_the_interval():
+    assert PollingPolicy(interval=10, max_interval=5).get_delay(100) == 10
+
+
+def test_policy_from_options_and_environment(monkeypatch):
+    @click.command()
+    @polling_options()
+    def command():
+        policy = PollingPolicy.from_context()
+        click.echo(json.dumps([policy.interval, policy.max_interval, policy.timeout]))
+
+    runner = CliRunner()
+    assert json.loads(runner.invoke(command, []).output) == [1, 30, None]
+    assert json.loads(runner.invoke(command, ["--poll-interval", "2", "--max-poll-interval", "10", "--wait-timeout", "60"]).output) == [2, 10, 60]
+    assert json.loads(runner.invoke(command, [], env={"TRECLI_POLL_INTERVAL": "3", "TRECLI_WAIT_TIMEOUT": "5"}).output) == [3, 30, 5]
+    assert runner.invoke(command, ["--poll-interval", "0"]).exit_code != 0
+
+    monkeypatch.setenv("TRECLI_MAX_POLL_INTERVAL", "7")
+    assert PollingPolicy.from_context().max_interval == 7
+
+
+@pytest.mark.parametrize("state, terminal, success", [
+    ("deploying", False, False),
+    ("awaiting_deployment", False, False),
+    ("deployed", True, True),
+    ("deleted", True, True),
+    ("deployment_failed", True, False),
+    ("some_new_state", True, False),
+])
+def test_operation_states(state, terminal, success):
+    assert is_operation_state_terminal(state) == terminal
+    assert is_operation_state_success(state) == success
+
+
+def _operation(status: str, action: str = "install", template: str = "tre-workspace-base", created: float = 100, updated: float = 700) -> dict:
+    return {
+        "id": "op1",
+        "action": action,
+        "status": status,
+        "createdWhen": created,
+        "updatedWhen": updated,
+        "steps": [{"stepId": "main", "resourceTemplateName": template, "status": status}],
+    }
+
+
+def test_durations_are_learned(tmp_path):
+    durations = OperationDurations("https://tre.example.com", tmp_path / "durations.json")
+    assert durations.get_expected_duration(_operation("deploying")) is None
+    durations.record(_operation("deployed", created=100, updated=700))
+    assert durations.get_expected_duration(_operation("deploying")) == 600
+    # exponential moving average
+    durations.record(_operation("deployed", created=100, updated=200))
+    assert durations.get_expected_duration(_operation("deploying")) == 450
+    # durations are per action and template
+    assert durations.get_expected_duration(_operation("deploying", action="uninstall")) is None
+    assert durations.get_expected_duration(_operation("deploying", template="tre-workspace-airlock")) is None
+
+
+@pytest.mark.parametrize("created, updated", [(None, 700), (100, None), (700, 100)])
+def test_invalid_durations_are_ignored(tmp_path, created, updated):
+    durations = OperationDurations("https://tre.example.com", tmp_path / "durations.json")
+    durations.record(_operation("deployed", created=created, updated=updated))
+    assert durations.get_expected_duration(_operation("deploying")) is None
+
+
+def test_durations_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRECLI_POLL_LEARN_DURATIONS", "false")
+    durations = OperationDurations("https://tre.example.com", tmp_path / "durations.json")
+    durations.record(_operation("deployed"))
+    assert not (tmp_path / "durations.json").exists()
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Record the delays between polls instead of sleeping"""
+    delays = []
+    monkeypatch.setattr(operation_module.time, "sleep", delays.append)
+    return delays
+
+
+@pytest.fixture
+def use_responses(monkeypatch, stub_api_client):
+    """Use a StubApiClient returning each of responses in turn (then the last response)"""
+    def use(responses: "list[httpx.Response]"):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return responses[min(len(requests), len(responses)) - 1]
+
+        client = stub_api_client(handler)
+        monkeypatch.setattr(ApiClient, "get_api_client_from_config", staticmethod(lambda: client))
+        return requests
+    return use
+
+
+def test_operation_show_waits_for_completion(use_responses, delays, capsys):
+    requests = use_responses([
+        httpx.Response(200, json={"operation": _operation("deploying")}),
+        httpx.Response(200, json={"operation": _operation("deploying")}),
+        httpx.Response(200, json={"operation": _operation("deployed")}),
+    ])
+    content = operation_show(log, OPERATION_URL, False, "json", None, polling_policy=PollingPolicy(interval=1, max_interval=30))
+    assert json.loads(content)["operation"]["status"] == "deployed"
+    assert len(requests) == 3
+    assert len(delays) == 2
+    # the duration is learned for next time
+    assert OperationDurations("https://tre.example.com").get_expected_duration(_operation("deploying")) == 600
+
+
+def test_operation_show_retries_transient_errors(use_responses, delays, capsys):
+    requests = use_responses([
+        httpx.Response(200, json={"operation": _operation("deploying")}),
+        httpx.Response(500),
+        httpx.Response(200, json={"operation": _operation("deployed")}),
+    ])
+    operation_show(log, OPERATION_URL, False, "none", None, polling_policy=PollingPolicy())
+    # the error is reported and the operation polled again
+    assert len(requests) == 3
+    assert "Error refreshing operation: 500" in capsys.readouterr().err
+
+
+def test_operation_show_gives_up_after_consecutive_errors(use_responses, delays):
+    use_responses([httpx.Response(200, json={"operation": _operation("deploying")}), httpx.Response(500)])
+    with pytest.raises(click.ClickException) as e:
+        operation_show(log, OPERATION_URL, False, "none", None, polling_policy=PollingPolicy(max_errors=3))
+    assert "after 3 consecutive errors" in e.value.message
+
+
+def test_operation_show_times_out(use_responses, delays, capsys, monkeypatch):
+    now = [1000.0]
+
+    def sleep(delay):
+        delays.append(delay)
+        now[0] += delay
+
+    monkeypatch.setattr(operation_module.time, "time", lambda: now[0])
+    monkeypatch.setattr(operation_module.time, "sleep", sleep)
+    use_responses([httpx.Response(200, json={"operation": _operation("deploying")})])
+    with pytest.raises(SystemExit):
+        operation_show(log, OPERATION_URL, False, "none", None, polling_policy=PollingPolicy(interval=1, max_interval=30, timeout=10))
+    assert sum(delays) == 10
+    assert "Timed out after 10s" in capsys.readouterr().err
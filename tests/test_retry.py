@@ -0,0 +1,206 @@
+import logging
+import time
+
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from tre import api_client
+from tre.api_client import ApiException
+from tre.retry import CircuitBreaker, CircuitOpenError, RetryPolicy, _get_retry_after
+
+log = logging.getLogger(__name__)
+
+
+@pytest.mark.parametrize("method, headers, expected", [
+    ("GET", {}, True),
+    ("head", {}, True),
+    ("OPTIONS", {}, True),
+    ("POST", {}, False),
+    ("DELETE", {}, False),
+    ("PATCH", {}, False),
+    ("PATCH", {"etag": "abc"}, True),
+    ("PATCH", {"If-Match": "abc"}, True),
+])
+def test_is_idempotent_request(method, headers, expected):
+    assert RetryPolicy().is_idempotent_request(method, headers) == expected
+
+
+@pytest.mark.parametrize("status_code, expected", [(429, True), (502, True), (503, True), (504, True), (500, False), (404, False), (200, False)])
+def test_is_retryable_response(status_code, expected):
+    assert RetryPolicy().is_retryable_response(httpx.Response(status_code)) == expected
+
+
+@pytest.mark.parametrize("retry_after, expected", [
+    (None, None),
+    ("5", 5),
+    ("1.5", 1.5),
+    ("-3", 0),
+    ("soon", None),
+])
+def test_get_retry_after(retry_after, expected):
+    headers = {"retry-after": retry_after} if retry_after is not None else {}
+    assert _get_retry_after(httpx.Response(503, headers=headers)) == expected
+
+
+def test_get_retry_after_http_date():
+    retry_after = formatdate(time.time() + 60, usegmt=True)
+    assert 55 < _get_retry_after(httpx.Response(503, headers={"retry-after": retry_after})) <= 60
+    past = formatdate(time.time() - 60, usegmt=True)
+    assert _get_retry_after(httpx.Response(503, headers={"retry-after": past})) == 0
+
+
+def test_delay_uses_exponential_backoff_with_jitter():
+    policy = RetryPolicy(backoff_base=0.5, max_backoff=3)
+    for attempt, limit in [(0, 0.5), (1, 1), (2, 2), (3, 3), (10, 3)]:
+        delays = [policy.get_delay(attempt) for _ in range(50)]
+        assert all(0 <= delay <= limit for delay in delays)
+    assert len(set(policy.get_delay(2) for _ in range(10))) > 1
+
+
+def test_delay_honours_retry_after_up_to_max_backoff():
+    policy = RetryPolicy(max_backoff=10)
+    assert policy.get_delay(0, httpx.Response(429, headers={"retry-after": "7"})) == 7
+    assert policy.get_delay(0, httpx.Response(429, headers={"retry-after": "60"})) == 10
+
+
+def test_can_retry():
+    policy = RetryPolicy(max_attempts=3, max_total_backoff=10)
+    assert policy.can_retry(0, 0, 1)
+    assert policy.can_retry(1, 0, 1)
+    assert not policy.can_retry(2, 0, 1)
+    assert not policy.can_retry(0, 8, 3)
+
+
+def test_policy_from_environment(monkeypatch):
+    monkeypatch.setenv("TRECLI_RETRY_MAX_ATTEMPTS", "2")
+    monkeypatch.setenv("TRECLI_RETRY_BACKOFF_BASE", "0.1")
+    monkeypatch.setenv("TRECLI_RETRY_MAX_BACKOFF", "4")
+    monkeypatch.setenv("TRECLI_RETRY_MAX_TOTAL_BACKOFF", "8")
+    policy = RetryPolicy.from_env()
+    assert (policy.max_attempts, policy.backoff_base, policy.max_backoff, policy.max_total_backoff) == (2, 0.1, 4, 8)
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return tmp_path / "circuit_breaker.json"
+
+
+def test_circuit_opens_after_threshold_failures(state_file):
+    breaker = CircuitBreaker("https://tre.example.com", threshold=3, cooldown=60, state_file=state_file)
+    for _ in range(2):
+        breaker.record_failure()
+        breaker.check()
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError) as e:
+        breaker.check()
+    assert 59 < e.value.open_for <= 60
+    # the state is shared with other processes
+    with pytest.raises(CircuitOpenError):
+        CircuitBreaker("https://tre.example.com", threshold=3, cooldown=60, state_file=state_file).check()
+    # but is per API
+    CircuitBreaker("https://other.example.com", threshold=3, cooldown=60, state_file=state_file).check()
+
+
+def test_success_resets_failures(state_file):
+    breaker = CircuitBreaker("https://tre.example.com", threshold=2, cooldown=60, state_file=state_file)
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.check()
+
+
+def test_circuit_is_half_open_after_cooldown(state_file):
+    breaker = CircuitBreaker("https://tre.example.com", threshold=3, cooldown=0, state_file=state_file)
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.check()
+
+    # a single further failure re-opens the circuit
+    breaker.cooldown = 60
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_circuit_breaker_can_be_disabled(state_file):
+    breaker = CircuitBreaker("https://tre.example.com", threshold=0, cooldown=60, state_file=state_file)
+    for _ in range(10):
+        breaker.record_failure()
+    breaker.check()
+    assert not state_file.exists()
+
+
+def test_clear(state_file):
+    breaker = CircuitBreaker("https://tre.example.com", threshold=1, cooldown=60, state_file=state_file)
+    breaker.record_failure()
+    CircuitBreaker.clear(state_file)
+    breaker.check()
+
+
+def _responses_handler(requests: list, responses: "list[httpx.Response]"):
+    def handler(request):
+        requests.append(request)
+        return responses[min(len(requests), len(responses)) - 1]
+    return handler
+
+
+def test_api_client_retries_idempotent_requests(stub_api_client):
+    requests = []
+    client = stub_api_client(_responses_handler(requests, [httpx.Response(503), httpx.Response(502), httpx.Response(200, json={})]))
+    assert client.call_api(log, "GET", "/api/workspaces").status_code == 200
+    assert len(requests) == 3
+
+
+def test_api_client_does_not_retry_post(stub_api_client):
+    requests = []
+    client = stub_api_client(_responses_handler(requests, [httpx.Response(503), httpx.Response(200, json={})]))
+    assert client.call_api(log, "POST", "/api/workspaces", throw_on_error=False).status_code == 503
+    assert len(requests) == 1
+
+
+def test_api_client_returns_the_last_response_after_max_attempts(stub_api_client, monkeypatch):
+    monkeypatch.setenv("TRECLI_RETRY_MAX_ATTEMPTS", "3")
+    requests = []
+    client = stub_api_client(_responses_handler(requests, [httpx.Response(429)]))
+    assert client.call_api(log, "GET", "/api/workspaces", throw_on_error=False).status_code == 429
+    assert len(requests) == 3
+
+
+def test_api_client_waits_for_retry_after(stub_api_client, monkeypatch):
+    delays = []
+    monkeypatch.setattr(api_client.time, "sleep", delays.append)
+    requests = []
+    client = stub_api_client(_responses_handler(requests, [httpx.Response(429, headers={"retry-after": "2"}), httpx.Response(200, json={})]))
+    assert client.call_api(log, "GET", "/api/workspaces").status_code == 200
+    assert delays == [2]
+
+
+def test_api_client_retries_connection_errors(stub_api_client):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if len(requests) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={})
+
+    # requests that failed to connect were never sent, so are retried even if not idempotent
+    client = stub_api_client(handler)
+    assert client.call_api(log, "POST", "/api/workspaces").status_code == 200
+    assert len(requests) == 2
+
+
+def test_api_client_fails_fast_when_the_circuit_is_open(stub_api_client, monkeypatch):
+    monkeypatch.setenv("TRECLI_RETRY_MAX_ATTEMPTS", "1")
+    monkeypatch.setenv("TRECLI_CIRCUIT_BREAKER_THRESHOLD", "2")
+    requests = []
+    client = stub_api_client(_responses_handler(requests, [httpx.Response(503)]))
+    for _ in range(2):
+        client.call_api(log, "GET", "/api/workspaces", throw_on_error=False)
+    with pytest.raises(ApiException) as e:
+        client.call_api(log, "GET", "/api/workspaces")
+    assert "circuit_open" in str(e.value)
+    assert len(requests) == 2
@@ -0,0 +1,99 @@
+import base64
+import json
+import logging
+import time
+
+import pytest
+
+from tre.token_cache import AccessTokenCache, get_jwt_expiry, get_token_expiry
+
+log = logging.getLogger(__name__)
+KEY = AccessTokenCache.get_key("tenant-id", "client-id", "api://tre")
+
+
+def _jwt(claims: dict) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode("utf-8")).decode("ascii").rstrip("=")
+    return f"header.{payload}.signature"
+
+
+def test_get_jwt_expiry():
+    assert get_jwt_expiry(_jwt({"exp": 1700000000})) == 1700000000
+
+
+@pytest.mark.parametrize("token", ["not-a-jwt", "a.not-base64!.c", _jwt({"sub": "no exp"})])
+def test_get_jwt_expiry_invalid(token):
+    assert get_jwt_expiry(token) is None
+
+
+def test_get_token_expiry_prefers_expires_in():
+    before = time.time()
+    assert get_token_expiry({"access_token": _jwt({"exp": 1}), "expires_in": 3600}) >= before + 3600
+
+
+def test_get_token_expiry_falls_back_to_exp_claim():
+    assert get_token_expiry({"access_token": _jwt({"exp": 1700000000})}) == 1700000000
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return tmp_path / "access_token_cache.json"
+
+
+def _acquire(token: str, expires_in: float = 3600):
+    calls = []
+
+    def acquire():
+        calls.append(token)
+        return {"access_token": token, "expires_in": expires_in}
+    return acquire, calls
+
+
+def test_token_is_acquired_once_and_cached(cache_file):
+    cache = AccessTokenCache(cache_file)
+    acquire, calls = _acquire("token-1")
+    assert cache.get_or_acquire_token(log, KEY, acquire) == "token-1"
+    assert cache.get_or_acquire_token(log, KEY, acquire) == "token-1"
+    assert calls == ["token-1"]
+
+
+def test_token_is_shared_between_processes(cache_file):
+    acquire, _ = _acquire("token-1")
+    AccessTokenCache(cache_file).get_or_acquire_token(log, KEY, acquire)
+
+    # a new process (with an empty in-memory cache) uses the token from the file
+    acquire_again, calls = _acquire("token-2")
+    assert AccessTokenCache(cache_file).get_or_acquire_token(log, KEY, acquire_again) == "token-1"
+    assert calls == []
+
+
+def test_token_is_refreshed_within_the_refresh_margin(cache_file, monkeypatch):
+    monkeypatch.setenv("TRECLI_TOKEN_REFRESH_MARGIN", "300")
+    cache = AccessTokenCache(cache_file)
+    acquire, _ = _acquire("token-1", expires_in=200)
+    cache.get_or_acquire_token(log, KEY, acquire)
+    acquire_again, calls = _acquire("token-2")
+    assert cache.get_or_acquire_token(log, KEY, acquire_again) == "token-2"
+    assert calls == ["token-2"]
+
+
+def test_expired_entries_are_dropped_from_the_file(cache_file):
+    cache_file.write_text(json.dumps({"old": {"access_token": "old", "expires_on": time.time() - 10}}))
+    acquire, _ = _acquire("token-1")
+    AccessTokenCache(cache_file).get_or_acquire_token(log, KEY, acquire)
+    assert list(json.loads(cache_file.read_text())) == [KEY]
+
+
+def test_tokens_are_cached_per_key(cache_file):
+    cache = AccessTokenCache(cache_file)
+    cache.get_or_acquire_token(log, KEY, _acquire("token-1")[0])
+    other_key = AccessTokenCache.get_key("tenant-id", "client-id", "api://workspace")
+    assert cache.get_or_acquire_token(log, other_key, _acquire("token-2")[0]) == "token-2"
+    assert cache.get_token(KEY) == "token-1"
+
+
+def test_clear(cache_file):
+    cache = AccessTokenCache(cache_file)
+    cache.get_or_acquire_token(log, KEY, _acquire("token-1")[0])
+    cache.clear()
+    assert cache.get_token(KEY) is None
+    assert not cache_file.exists()
@@ -0,0 +1,83 @@
+import json
+import logging
+
+import httpx
+
+from tre.workspace_scope_cache import WorkspaceScopeCache
+
+log = logging.getLogger(__name__)
+BASE_URL = "https://tre.example.com"
+
+
+def test_set_and_get_scope(tmp_path):
+    cache = WorkspaceScopeCache(tmp_path / "cache.json")
+    cache.set_scopes(BASE_URL, {"ws1": "scope1", "ws2": "scope2"})
+    assert cache.get_scope(BASE_URL, "ws1") == "scope1"
+    assert cache.get_scope(BASE_URL, "ws2") == "scope2"
+    assert cache.get_scope(BASE_URL, "ws3") is None
+    # entries are per API
+    assert cache.get_scope("https://other.example.com", "ws1") is None
+
+
+def test_expired_scope(tmp_path, monkeypatch):
+    cache = WorkspaceScopeCache(tmp_path / "cache.json")
+    cache.set_scope(BASE_URL, "ws1", "scope1")
+    monkeypatch.setenv("TRECLI_WORKSPACE_SCOPE_CACHE_TTL", "-1")
+    assert cache.get_scope(BASE_URL, "ws1") is None
+
+
+def test_invalidate_scope_with_suffix(tmp_path):
+    cache = WorkspaceScopeCache(tmp_path / "cache.json")
+    cache.set_scopes(BASE_URL, {"ws1": "api://scope1", "ws2": "api://scope2"})
+    cache.invalidate_scope(BASE_URL, "api://scope1/user_impersonation")
+    assert cache.get_scope(BASE_URL, "ws1") is None
+    assert cache.get_scope(BASE_URL, "ws2") == "api://scope2"
+
+
+def test_clear(tmp_path):
+    cache = WorkspaceScopeCache(tmp_path / "cache.json")
+    cache.set_scope(BASE_URL, "ws1", "scope1")
+    cache.clear()
+    assert cache.get_scope(BASE_URL, "ws1") is None
+
+
+def _workspace_handler(requests: list):
+    def handler(request):
+        requests.append(request)
+        workspace_id = request.url.path.rsplit("/", 1)[-1]
+        if request.headers["Authorization"] == "Bearer token-for-stale-scope":
+            return httpx.Response(403)
+        return httpx.Response(200, json={"workspace": {"id": workspace_id, "properties": {"scope_id": f"scope-{workspace_id}"}}})
+    return handler
+
+
+def test_workspace_scope_is_looked_up_once(stub_api_client):
+    requests = []
+    api_client = stub_api_client(_workspace_handler(requests))
+    assert api_client.get_workspace_scope(log, "ws1") == "scope-ws1"
+    assert api_client.get_workspace_scope(log, "ws1") == "scope-ws1"
+    assert len(requests) == 1
+
+    # and by other processes
+    other_api_client = stub_api_client(_workspace_handler(requests))
+    assert other_api_client.get_workspace_scope(log, "ws1") == "scope-ws1"
+    assert len(requests) == 1
+
+
+def test_cached_scope_is_invalidated_when_rejected(stub_api_client):
+    requests = []
+    api_client = stub_api_client(_workspace_handler(requests))
+    api_client.set_cached_workspace_scope("ws1", "stale-scope")
+    scope = api_client.get_workspace_scope(log, "ws1")
+    assert scope == "stale-scope"
+    response = api_client.call_api(log, "GET", "/api/workspaces/ws1/workspace-services", scope_id=scope, throw_on_error=False)
+    assert response.status_code == 403
+    # the next lookup gets the current scope from the API
+    assert api_client.get_workspace_scope(log, "ws1") == "scope-ws1"
+
+
+def test_cache_file_location(stub_api_client, isolated_home):
+    api_client = stub_api_client(_workspace_handler([]))
+    api_client.get_workspace_scope(log, "ws1")
+    entries = json.loads((isolated_home / ".config" / "tre" / "workspace_scope_cache.json").read_text())
+    assert entries[f"{BASE_URL}|ws1"]["scope_id"] == "scope-ws1"
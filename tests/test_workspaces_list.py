@@ -0,0 +1,86 @@
+import json
+
+import click
+import pytest
+
+from click.testing import CliRunner
+
+from tre.commands.workspaces.workspaces import _parse_expand, workspaces_list
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, set()),
+    ("services", {"services"}),
+    ("airlock, services", {"airlock", "services"}),
+    ("user-resources", {"services", "user-resources"}),
+    ("services,,airlock,", {"airlock", "services"}),
+])
+def test_parse_expand(value, expected):
+    assert _parse_expand(None, None, value) == expected
+
+
+def test_invalid_expand():
+    with pytest.raises(click.BadParameter) as e:
+        _parse_expand(None, None, "services,operations,other")
+    assert "operations, other" in e.value.message
+
+
+@pytest.fixture
+def estate(stub_estate):
+    stub_estate.add("/workspaces/ws1")
+    stub_estate.add("/workspaces/ws1/workspace-services/svc1")
+    stub_estate.add("/workspaces/ws1/workspace-services/svc1/user-resources/ur1")
+    stub_estate.add("/workspaces/ws1/workspace-services/svc2")
+    stub_estate.add("/workspaces/ws2")
+    return stub_estate
+
+
+def _list(args: "list[str]"):
+    result = CliRunner(mix_stderr=False).invoke(workspaces_list, args + ["--output", "json"])
+    assert result.exit_code == 0, result.stderr
+    return json.loads(result.stdout)
+
+
+def test_list_without_expand(estate):
+    assert [workspace["id"] for workspace in _list([])["workspaces"]] == ["ws1", "ws2"]
+    assert estate.get_request_paths() == ["/api/workspaces"]
+
+
+def test_expand_services(estate):
+    workspaces = {workspace["id"]: workspace for workspace in _list(["--expand", "services"])["workspaces"]}
+    assert [service["id"] for service in workspaces["ws1"]["workspaceServices"]] == ["svc1", "svc2"]
+    assert workspaces["ws2"]["workspaceServices"] == []
+    assert "userResources" not in workspaces["ws1"]["workspaceServices"][0]
+    assert "airlockRequests" not in workspaces["ws1"]
+    assert not any(path.endswith("/user-resources") for path in estate.get_request_paths())
+
+
+def test_expand_user_resources_and_airlock(estate):
+    workspaces = {workspace["id"]: workspace for workspace in _list(["--expand", "user-resources,airlock"])["workspaces"]}
+    services = {service["id"]: service for service in workspaces["ws1"]["workspaceServices"]}
+    assert [user_resource["id"] for user_resource in services["svc1"]["userResources"]] == ["ur1"]
+    assert services["svc2"]["userResources"] == []
+    assert workspaces["ws1"]["airlockRequests"] == []
+    # the workspace scopes are taken from the workspaces list
+    child_requests = [request for request in estate.requests if request.url.path.startswith("/api/workspaces/ws1/")]
+    assert all(request.headers["Authorization"] == "Bearer token-for-api://ws1" for request in child_requests)
+
+
+def test_expand_with_a_query(estate):
+    result = CliRunner(mix_stderr=False).invoke(workspaces_list, [
+        "--expand", "services", "--output", "ndjson", "--query", "workspaces[].{id:id, services:length(workspaceServices)}"])
+    assert sorted(json.loads(line)["services"] for line in result.stdout.splitlines()) == [0, 2]
+
+
+def test_expand_limit(estate):
+    result = CliRunner(mix_stderr=False).invoke(workspaces_list, ["--expand", "services", "--limit", "1", "--output", "ndjson"])
+    assert result.exit_code == 0, result.stderr
+    assert len(result.stdout.splitlines()) == 1
+
+
+def test_expand_error_listing_workspaces(estate):
+    estate.forbidden.add("/workspaces")
+    result = CliRunner(mix_stderr=False).invoke(workspaces_list, ["--expand", "services"])
+    # the error (JSON) is output instead of a partial list
+    assert result.exit_code == 2
+    assert json.loads(result.stdout)["status_code"] == 403
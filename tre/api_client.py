@@ -1,13 +1,73 @@
 import sys
 import click
+import functools
 import json
-import msal
 import os
+import time
+import typing as t
 
-from httpx import Client, Response
 from logging import Logger
 from pathlib import Path
 
+from tre import json_codec
+from tre.http_cache import HttpCache, get_max_age
+from tre.msal_token_cache import find_cached_access_token, get_msal_app, save_token_cache
+from tre.operation_journal import OperationJournal
+from tre.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from tre.token_cache import AccessTokenCache, get_access_token_cache
+from tre.workspace_scope_cache import WorkspaceScopeCache
+
+if t.TYPE_CHECKING:
+    # httpx is imported on first use to keep CLI startup fast
+    from httpx import AsyncClient, Client, Response
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _http2_enabled() -> bool:
+    if os.getenv("TRECLI_HTTP2", "").lower() not in ["1", "true", "yes"]:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        click.echo("TRECLI_HTTP2 is set but the 'h2' package is not installed - falling back to HTTP/1.1", err=True)
+        return False
+    return True
+
+
+def _get_http_client_options(verify: bool) -> dict:
+    from httpx import Limits, Timeout
+    limits = Limits(
+        max_connections=_env_int("TRECLI_HTTP_MAX_CONNECTIONS", 20),
+        max_keepalive_connections=_env_int("TRECLI_HTTP_MAX_KEEPALIVE_CONNECTIONS", 10),
+        keepalive_expiry=_env_float("TRECLI_HTTP_KEEPALIVE_EXPIRY", 30.0),
+    )
+    timeout = Timeout(
+        _env_float("TRECLI_HTTP_TIMEOUT", 30.0),
+        connect=_env_float("TRECLI_HTTP_CONNECT_TIMEOUT", 10.0),
+    )
+    return {"verify": verify, "limits": limits, "timeout": timeout, "http2": _http2_enabled()}
+
+
+def create_http_client(verify: bool = True) -> "Client":
+    """Create a pooled HTTP client configured from the TRECLI_HTTP_* environment variables."""
+    from httpx import Client
+    return Client(**_get_http_client_options(verify))
+
+
+def create_async_http_client(verify: bool = True) -> "AsyncClient":
+    """Create a pooled async HTTP client configured from the TRECLI_HTTP_* environment variables."""
+    from httpx import AsyncClient
+    return AsyncClient(**_get_http_client_options(verify))
+
 
 class ApiException(click.ClickException):
     """An exception that Click can handle and show to the user containing API call error info."""
@@ -24,15 +84,101 @@ class ApiException(click.ClickException):
         click.echo(self.message, file=file)
 
 
+class StreamedResponse:
+    """A response from ApiClient.stream_api whose content is read incrementally with iter_bytes().
+
+    If the response is cacheable then on_content is called with the full content once it has all
+    been read, unless it is larger than max_content_size (so that memory use remains bounded).
+    """
+
+    def __init__(self, response: "Response", on_content: t.Callable[[bytes], None] = None, max_content_size: int = 0):
+        self.response = response
+        self._on_content = on_content
+        self._max_content_size = max_content_size
+
+    @property
+    def status_code(self) -> int:
+        return self.response.status_code
+
+    @property
+    def headers(self):
+        return self.response.headers
+
+    def iter_bytes(self) -> t.Iterator[bytes]:
+        chunks = [] if self._on_content is not None else None
+        size = 0
+        for chunk in self.response.iter_bytes():
+            if chunks is not None:
+                size += len(chunk)
+                if size > self._max_content_size:
+                    chunks = None
+                else:
+                    chunks.append(chunk)
+            yield chunk
+        if chunks is not None:
+            self._on_content(b"".join(chunks))
+
+    def close(self) -> None:
+        self.response.close()
+
+    def __enter__(self) -> "StreamedResponse":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
 class ApiClient:
     def __init__(self,
                  base_url: str,
                  verify: bool):
         self.base_url = base_url
         self.verify = verify
+        self._http_clients: "dict[bool, Client]" = {}
+        self.retry_policy = RetryPolicy.from_env()
+        self.circuit_breaker = CircuitBreaker(base_url)
+        self.http_cache = HttpCache()
+        self.operation_journal = OperationJournal(base_url)
+        self._workspace_scope_cache = WorkspaceScopeCache()
+        # scope_ids returned from the workspace scope cache during this process
+        self._cached_scope_ids: "set[str]" = set()
+
+    def get_http_client(self, verify: bool = None) -> "Client":
+        """Get the pooled HTTP client for this ApiClient, creating it on first use.
+
+        Connections are kept alive and reused for all calls made through this ApiClient.
+        """
+        if verify is None:
+            verify = self.verify
+        client = self._http_clients.get(verify)
+        if client is None:
+            client = create_http_client(verify)
+            self._http_clients[verify] = client
+        return client
+
+    def close(self) -> None:
+        for client in self._http_clients.values():
+            client.close()
+        self._http_clients = {}
 
     @staticmethod
     def get_api_client_from_config() -> "ApiClient":
+        # Share a single ApiClient (and its connection pool) across all the nested
+        # commands for the current invocation. ctx.meta is shared by all contexts
+        # in the hierarchy, and the client is closed when the root context closes.
+        ctx = click.get_current_context(silent=True)
+        if ctx is None:
+            return ApiClient._load_api_client_from_config()
+
+        client = ctx.meta.get("tre.api_client")
+        if client is None:
+            client = ApiClient._load_api_client_from_config()
+            ctx.meta["tre.api_client"] = client
+            ctx.find_root().call_on_close(client.close)
+        return client
+
+    @staticmethod
+    def _load_api_client_from_config() -> "ApiClient":
 
         config_path = Path("~/.config/tre/environment.json").expanduser()
         if not config_path.exists():
@@ -80,27 +226,242 @@ class ApiClient:
         json_data=None,
         scope_id: str = None,
         throw_on_error: bool = True,
-    ) -> Response:
-        with Client(verify=self.verify) as client:
-            headers = headers.copy()
-            headers['Authorization'] = f"Bearer {self.get_auth_token(log, scope_id)}"
-            response = client.request(method, f'{self.base_url}{url}', headers=headers, json=json_data)
-            if throw_on_error and response.is_error:
-                error_info = {
-                    'status_code': response.status_code,
-                    'body': response.text,
-                }
-                raise ApiException(message=json.dumps(error_info, indent=2))
-            return response
+    ) -> "Response":
+        return self._call_api(log, method, url, headers, json_data, scope_id, throw_on_error, stream=False)
+
+    def stream_api(
+        self,
+        log: Logger,
+        method: str,
+        url: str,
+        headers: "dict[str, str]" = {},
+        scope_id: str = None,
+        throw_on_error: bool = True,
+    ) -> "StreamedResponse":
+        """Call the API without reading the response content, which can then be read incrementally
+        with iter_bytes(). The result should be used as a context manager to close the response:
+
+            with client.stream_api(log, "GET", "/api/workspaces") as response:
+                output(response.iter_bytes(), ...)
+        """
+        return self._call_api(log, method, url, headers, None, scope_id, throw_on_error, stream=True)
+
+    def _call_api(
+        self,
+        log: Logger,
+        method: str,
+        url: str,
+        headers: "dict[str, str]",
+        json_data,
+        scope_id: t.Optional[str],
+        throw_on_error: bool,
+        stream: bool,
+    ):
+        headers = headers.copy()
+
+        max_age = get_max_age()
+        cache_key, cache_entry, cached_response = self.get_cached_response(log, method, url, headers, scope_id, max_age)
+        if cached_response is not None:
+            return StreamedResponse(cached_response) if stream else cached_response
+
+        headers['Authorization'] = f"Bearer {self.get_auth_token(log, scope_id)}"
+        content = None
+        if json_data is not None:
+            content = json_codec.dumps_bytes(json_data)
+            headers['Content-Type'] = 'application/json'
+        response = self._send_with_retry(log, method, url, headers, content, stream)
+        response, on_content = self.handle_response(log, method, url, scope_id, response, cache_key, cache_entry, max_age, stream)
+
+        if throw_on_error and response.is_error:
+            # read the (error) response content for a streamed response
+            response.read()
+            response.close()
+            error_info = {
+                'status_code': response.status_code,
+                'body': response.text,
+            }
+            raise ApiException(message=json_codec.dumps(error_info, indent=2))
+        if stream:
+            return StreamedResponse(response, on_content, self.http_cache.max_entry_size)
+        return response
+
+    def get_cached_response(
+        self,
+        log: Logger,
+        method: str,
+        url: str,
+        headers: "dict[str, str]",
+        scope_id: t.Optional[str],
+        max_age: t.Optional[float],
+    ) -> "tuple[t.Optional[str], t.Optional[dict], t.Optional[Response]]":
+        """Look up the HTTP cache for a request, returning (cache key, cache entry, cached response).
+
+        The cached response is only returned if it is within max_age, in which case the API doesn't
+        need to be called. Otherwise the validators of the cache entry (if any) are added to headers
+        so that the response can be revalidated. Requests that aren't GETs, or that already have
+        validators (e.g. from EstateCrawler), don't use the cache.
+        Shared by ApiClient and AsyncApiClient (which calls it on a worker thread, as it reads files).
+        """
+        if method.upper() != "GET" or not self.http_cache.enabled or "If-None-Match" in headers or "If-Modified-Since" in headers:
+            return None, None, None
+        cache_key = HttpCache.get_key(self.base_url, url, scope_id)
+        cache_entry = self.http_cache.get(cache_key)
+        if cache_entry is not None:
+            if max_age is not None and cache_entry["fetched_at"] + max_age >= time.time():
+                log.debug(f"Using cached response for {method} {url}")
+                return cache_key, cache_entry, HttpCache.to_response(cache_entry, method, f'{self.base_url}{url}')
+            if "etag" in cache_entry["headers"]:
+                headers['If-None-Match'] = cache_entry["headers"]["etag"]
+            if "last-modified" in cache_entry["headers"]:
+                headers['If-Modified-Since'] = cache_entry["headers"]["last-modified"]
+        return cache_key, cache_entry, None
+
+    def handle_response(
+        self,
+        log: Logger,
+        method: str,
+        url: str,
+        scope_id: t.Optional[str],
+        response: "Response",
+        cache_key: t.Optional[str],
+        cache_entry: t.Optional[dict],
+        max_age: t.Optional[float],
+        stream: bool = False,
+    ) -> "tuple[Response, t.Optional[t.Callable[[bytes], None]]]":
+        """Update the HTTP cache, operation journal and workspace scope cache for a response.
+
+        Returns the response to use (the cached response if the API returned 304) and, for a streamed
+        response that should be cached, the function to call with its content once it has been read.
+        Shared by ApiClient and AsyncApiClient (which calls it on a worker thread, as it writes files).
+        """
+        on_content = None
+        if cache_key is not None:
+            if response.status_code == 304 and cache_entry is not None:
+                log.debug(f"Cached response for {method} {url} is still current")
+                if not response.is_closed:
+                    # release the connection of a streamed response
+                    response.close()
+                self.http_cache.mark_fresh(cache_key, cache_entry, response)
+                response = HttpCache.to_response(cache_entry, method, f'{self.base_url}{url}')
+            elif response.status_code == 200 and (
+                    "etag" in response.headers or "last-modified" in response.headers or max_age is not None):
+                on_content = functools.partial(self.http_cache.set, cache_key, response.headers)
+                if not stream:
+                    on_content(response.content)
+
+        if response.status_code == 202 and "location" in response.headers and not stream:
+            # record the operation that has been started so that waiting for it can be resumed
+            self.operation_journal.add(response.headers["location"], scope_id, response)
+        if response.status_code in [401, 403] and scope_id is not None:
+            self.invalidate_cached_scope(log, scope_id)
+        return response, on_content
+
+    def _send_with_retry(
+        self,
+        log: Logger,
+        method: str,
+        url: str,
+        headers: "dict[str, str]",
+        content: t.Optional[bytes],
+        stream: bool = False,
+    ) -> "Response":
+        """Send a request, retrying idempotent requests on transient failures as per self.retry_policy
+
+        If stream is True then the content of the returned response is not read.
+        """
+        from httpx import ConnectError, NetworkError, RemoteProtocolError, TimeoutException
+
+        try:
+            self.circuit_breaker.check()
+        except CircuitOpenError as e:
+            raise ApiException(message=json_codec.dumps({'error': 'circuit_open', 'message': str(e)}, indent=2))
+
+        policy = self.retry_policy
+        is_idempotent = policy.is_idempotent_request(method, headers)
+        attempt = 0
+        total_backoff = 0.0
+        while True:
+            try:
+                client = self.get_http_client()
+                request = client.build_request(method, f'{self.base_url}{url}', headers=headers, content=content)
+                response = client.send(request, stream=stream)
+            except (TimeoutException, NetworkError, RemoteProtocolError) as e:
+                # Requests that failed to connect were never sent, so are safe to retry
+                delay = policy.get_delay(attempt)
+                if (is_idempotent or isinstance(e, ConnectError)) and policy.can_retry(attempt, total_backoff, delay):
+                    log.debug(f"{method} {url} failed with {type(e).__name__} (attempt {attempt + 1}/{policy.max_attempts}) - retrying in {delay:.2f}s")
+                    time.sleep(delay)
+                    attempt += 1
+                    total_backoff += delay
+                    continue
+                self.circuit_breaker.record_failure()
+                log.debug(f"{method} {url} failed after {attempt} retries ({total_backoff:.2f}s total backoff)")
+                raise ApiException(message=json_codec.dumps({'error': type(e).__name__, 'message': str(e)}, indent=2))
+
+            if not policy.is_retryable_response(response):
+                break
+            delay = policy.get_delay(attempt, response)
+            if not (is_idempotent and policy.can_retry(attempt, total_backoff, delay)):
+                break
+            log.debug(f"{method} {url} returned {response.status_code} (attempt {attempt + 1}/{policy.max_attempts}) - retrying in {delay:.2f}s")
+            # release the connection of a streamed response before retrying
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+            total_backoff += delay
+
+        if policy.is_retryable_response(response):
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+        if attempt > 0:
+            log.debug(f"{method} {url} returned {response.status_code} after {attempt} retries ({total_backoff:.2f}s total backoff)")
+        return response
 
     def get_workspace_scope(self, log, workspace_id: str) -> str:
+        workspace_id = str(workspace_id)
+        workspace_scope = self.get_cached_workspace_scope(log, workspace_id)
+        if workspace_scope is not None:
+            return self.get_workspace_auth_scope(workspace_scope)
+
         workspace_response = self.call_api(
             log,
             "GET",
             f'/api/workspaces/{workspace_id}',
         )
-        workspace_json = workspace_response.json()
+        workspace_json = json_codec.loads(workspace_response.content)
         workspace_scope = workspace_json["workspace"]["properties"]["scope_id"]
+        self.set_cached_workspace_scope(workspace_id, workspace_scope)
+        return self.get_workspace_auth_scope(workspace_scope)
+
+    def get_cached_workspace_scope(self, log, workspace_id: str) -> t.Optional[str]:
+        """Get the scope_id for a workspace from the workspace scope cache (if present)"""
+        workspace_scope = self._workspace_scope_cache.get_scope(self.base_url, workspace_id)
+        if workspace_scope is not None:
+            log.debug(f"Using cached scope for workspace {workspace_id}")
+            self._cached_scope_ids.add(workspace_scope)
+        return workspace_scope
+
+    def set_cached_workspace_scope(self, workspace_id: str, workspace_scope: str) -> None:
+        self._workspace_scope_cache.set_scope(self.base_url, workspace_id, workspace_scope)
+
+    def set_cached_workspace_scopes(self, workspace_scopes: "dict[str, str]") -> None:
+        """Cache the scope_id for each workspace id in workspace_scopes (e.g. from the workspaces list response)"""
+        if len(workspace_scopes) > 0:
+            self._workspace_scope_cache.set_scopes(self.base_url, workspace_scopes)
+
+    def invalidate_cached_scope(self, log, scope_id: str) -> None:
+        # If the scope came from the cache it may be out of date, so remove it
+        # to ensure the next lookup gets the current value from the API
+        for cached_scope_id in self._cached_scope_ids:
+            if scope_id.startswith(cached_scope_id):
+                log.debug(f"Removing cached workspace scope '{cached_scope_id}'")
+                self._workspace_scope_cache.invalidate_scope(self.base_url, cached_scope_id)
+                self._cached_scope_ids.discard(cached_scope_id)
+                break
+
+    def get_workspace_auth_scope(self, workspace_scope: str) -> str:
+        """Get the scope to request a token for to call the API for a workspace with the given scope_id"""
         return workspace_scope
 
     def get_auth_token() -> str:
@@ -124,26 +485,33 @@ class ClientCredentialsApiClient(ApiClient):
         self._scope = scope
 
     def get_auth_token(self, log, scope):
-        with Client() as client:
-            headers = {'Content-Type': "application/x-www-form-urlencoded"}
-            # Use Client Credentials flow
-            payload = f"grant_type=client_credentials&client_id={self._client_id}&client_secret={self._client_secret}&scope={scope or self._scope}/.default"
-            url = f"https://login.microsoftonline.com/{self._aad_tenant_id}/oauth2/v2.0/token"
-
-            log.debug('POSTing to token endpoint')
-            response = client.post(url, headers=headers, content=payload)
-            try:
-                if response.status_code == 200:
-                    log.debug('Parsing response')
-                    response_json = response.json()
-                    token = response_json["access_token"]
-                    return token
-                msg = f"Sign-in failed: {response.status_code}: {response.text}"
-                log.error(msg)
-                raise RuntimeError(msg)
-            except json.JSONDecodeError:
-                log.debug(
-                    f'Failed to parse response as JSON: {response.content}')
+        effective_scope = scope or self._scope
+        key = AccessTokenCache.get_key(self._aad_tenant_id, self._client_id, effective_scope)
+        return get_access_token_cache().get_or_acquire_token(
+            log,
+            key,
+            lambda: self._request_token(log, effective_scope))
+
+    def _request_token(self, log, scope) -> dict:
+        # The token endpoint is always called with SSL verification enabled
+        client = self.get_http_client(verify=True)
+        headers = {'Content-Type': "application/x-www-form-urlencoded"}
+        # Use Client Credentials flow
+        payload = f"grant_type=client_credentials&client_id={self._client_id}&client_secret={self._client_secret}&scope={scope}/.default"
+        url = f"https://login.microsoftonline.com/{self._aad_tenant_id}/oauth2/v2.0/token"
+
+        log.debug('POSTing to token endpoint')
+        response = client.post(url, headers=headers, content=payload)
+        try:
+            if response.status_code == 200:
+                log.debug('Parsing response')
+                return response.json()
+            msg = f"Sign-in failed: {response.status_code}: {response.text}"
+            log.error(msg)
+            raise RuntimeError(msg)
+        except json.JSONDecodeError:
+            log.debug(
+                f'Failed to parse response as JSON: {response.content}')
 
         raise RuntimeError("Failed to get auth token")
 
@@ -166,21 +534,18 @@ class DeviceCodeApiClient(ApiClient):
 
         effective_scope = scope or self._scope
 
-        cache = msal.SerializableTokenCache()
-        if os.path.exists(self._token_cache_file):
-            cache.deserialize(open(self._token_cache_file, "r").read())
+        # Fast path: use an unexpired access token straight from the token cache file
+        token = find_cached_access_token(self._token_cache_file, self._client_id, self._aad_tenant_id, effective_scope)
+        if token is not None:
+            log.debug("Using cached access token")
+            return token
 
-        app = msal.PublicClientApplication(
-            client_id=self._client_id,
-            authority=f"https://login.microsoftonline.com/{self._aad_tenant_id}",
-            token_cache=cache)
+        app, cache = get_msal_app(self._token_cache_file, self._client_id, self._aad_tenant_id)
 
         accounts = app.get_accounts()
         if accounts:
             auth_result = app.acquire_token_silent(scopes=[effective_scope], account=accounts[0])
-            if cache.has_state_changed:
-                with open(self._token_cache_file, "w") as cache_file:
-                    cache_file.write(cache.serialize())
+            save_token_cache(cache, self._token_cache_file)
             if auth_result is not None:
                 return auth_result["access_token"]
 
@@ -194,16 +559,13 @@ class DeviceCodeApiClient(ApiClient):
             click.echo(flow['message'], err=True)
             auth_result = app.acquire_token_by_device_flow(flow)
 
-            if cache.has_state_changed:
-                with open(self._token_cache_file, "w") as cache_file:
-                    cache_file.write(cache.serialize())
+            save_token_cache(cache, self._token_cache_file)
             if auth_result is not None:
                 return auth_result["access_token"]
 
         raise RuntimeError(f"Failed to get auth token for scope '{scope}'")
 
-    def get_workspace_scope(self, log, workspace_id: str) -> str:
+    def get_workspace_auth_scope(self, workspace_scope: str) -> str:
         # device code flow wants "/user_impersonation" suffix, but client creds doesn't
         # Override here to append
-        workspace_scope = super().get_workspace_scope(log, workspace_id)
         return workspace_scope + "/user_impersonation"
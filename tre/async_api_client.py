@@ -0,0 +1,165 @@
+import asyncio
+import typing as t
+
+from logging import Logger
+
+from tre import json_codec
+from tre.api_client import ApiClient, ApiException, create_async_http_client
+from tre.http_cache import get_max_age
+from tre.retry import CircuitOpenError
+
+if t.TYPE_CHECKING:
+    from httpx import AsyncClient, Response
+
+
+class AsyncApiClient:
+    """An asyncio counterpart to ApiClient for making many API calls concurrently.
+
+    Authentication, the workspace scope cache, the retry policy and the circuit breaker
+    are shared with the ApiClient that is wrapped, as are the HTTP response cache (so GETs are
+    revalidated with ETags) and the operation journal (so 202 responses are recorded). These read
+    and write files (under file locks), so they are run on worker threads rather than blocking the
+    event loop. Use as an async context manager:
+
+        async with AsyncApiClient(ApiClient.get_api_client_from_config()) as client:
+            response = await client.call_api(log, "GET", "/api/workspaces")
+    """
+
+    def __init__(self, api_client: ApiClient):
+        self.api_client = api_client
+        self.base_url = api_client.base_url
+        self._http_client: "t.Optional[AsyncClient]" = None
+        # Token acquisition may block (token cache file locks, MSAL, device code flow)
+        # so it is run on a worker thread, one at a time
+        self._auth_lock = asyncio.Lock()
+        # workspace id -> task looking up the scope, so that concurrent calls share a lookup
+        self._workspace_scope_tasks: "dict[str, asyncio.Task]" = {}
+
+    async def __aenter__(self) -> "AsyncApiClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def get_http_client(self) -> "AsyncClient":
+        if self._http_client is None:
+            self._http_client = create_async_http_client(self.api_client.verify)
+        return self._http_client
+
+    async def close(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def get_auth_token(self, log: Logger, scope: t.Optional[str]) -> str:
+        async with self._auth_lock:
+            return await asyncio.to_thread(self.api_client.get_auth_token, log, scope)
+
+    async def call_api(
+        self,
+        log: Logger,
+        method: str,
+        url: str,
+        headers: "dict[str, str]" = {},
+        json_data=None,
+        scope_id: str = None,
+        throw_on_error: bool = True,
+    ) -> "Response":
+        headers = headers.copy()
+        # --max-age is read here as the click context isn't available on the worker threads
+        max_age = get_max_age()
+        cache_key, cache_entry, cached_response = await asyncio.to_thread(
+            self.api_client.get_cached_response, log, method, url, headers, scope_id, max_age)
+        if cached_response is not None:
+            return cached_response
+
+        headers['Authorization'] = f"Bearer {await self.get_auth_token(log, scope_id)}"
+        content = None
+        if json_data is not None:
+            content = json_codec.dumps_bytes(json_data)
+            headers['Content-Type'] = 'application/json'
+        response = await self._send_with_retry(log, method, url, headers, content)
+        response, _ = await asyncio.to_thread(
+            self.api_client.handle_response, log, method, url, scope_id, response, cache_key, cache_entry, max_age)
+        if throw_on_error and response.is_error:
+            error_info = {
+                'status_code': response.status_code,
+                'body': response.text,
+            }
+            raise ApiException(message=json_codec.dumps(error_info, indent=2))
+        return response
+
+    async def _send_with_retry(self, log: Logger, method: str, url: str, headers: "dict[str, str]", content: t.Optional[bytes]) -> "Response":
+        """Send a request, retrying idempotent requests on transient failures (see ApiClient._send_with_retry)"""
+        from httpx import ConnectError, NetworkError, RemoteProtocolError, TimeoutException
+
+        circuit_breaker = self.api_client.circuit_breaker
+        try:
+            await asyncio.to_thread(circuit_breaker.check)
+        except CircuitOpenError as e:
+            raise ApiException(message=json_codec.dumps({'error': 'circuit_open', 'message': str(e)}, indent=2))
+
+        policy = self.api_client.retry_policy
+        is_idempotent = policy.is_idempotent_request(method, headers)
+        attempt = 0
+        total_backoff = 0.0
+        while True:
+            try:
+                response = await self.get_http_client().request(method, f'{self.base_url}{url}', headers=headers, content=content)
+            except (TimeoutException, NetworkError, RemoteProtocolError) as e:
+                delay = policy.get_delay(attempt)
+                if (is_idempotent or isinstance(e, ConnectError)) and policy.can_retry(attempt, total_backoff, delay):
+                    log.debug(f"{method} {url} failed with {type(e).__name__} (attempt {attempt + 1}/{policy.max_attempts}) - retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    total_backoff += delay
+                    continue
+                await asyncio.to_thread(circuit_breaker.record_failure)
+                log.debug(f"{method} {url} failed after {attempt} retries ({total_backoff:.2f}s total backoff)")
+                raise ApiException(message=json_codec.dumps({'error': type(e).__name__, 'message': str(e)}, indent=2))
+
+            if not policy.is_retryable_response(response):
+                break
+            delay = policy.get_delay(attempt, response)
+            if not (is_idempotent and policy.can_retry(attempt, total_backoff, delay)):
+                break
+            log.debug(f"{method} {url} returned {response.status_code} (attempt {attempt + 1}/{policy.max_attempts}) - retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+            total_backoff += delay
+
+        if policy.is_retryable_response(response):
+            await asyncio.to_thread(circuit_breaker.record_failure)
+        else:
+            await asyncio.to_thread(circuit_breaker.record_success)
+        if attempt > 0:
+            log.debug(f"{method} {url} returned {response.status_code} after {attempt} retries ({total_backoff:.2f}s total backoff)")
+        return response
+
+    async def get_workspace_scope(self, log: Logger, workspace_id: str) -> str:
+        workspace_id = str(workspace_id)
+        workspace_scope = await asyncio.to_thread(self.api_client.get_cached_workspace_scope, log, workspace_id)
+        if workspace_scope is None:
+            task = self._workspace_scope_tasks.get(workspace_id)
+            if task is None:
+                task = asyncio.ensure_future(self._fetch_workspace_scope(log, workspace_id))
+                self._workspace_scope_tasks[workspace_id] = task
+            workspace_scope = await task
+        return self.api_client.get_workspace_auth_scope(workspace_scope)
+
+    async def _fetch_workspace_scope(self, log: Logger, workspace_id: str) -> str:
+        try:
+            workspace_response = await self.call_api(
+                log,
+                "GET",
+                f'/api/workspaces/{workspace_id}',
+            )
+            workspace_scope = json_codec.loads(workspace_response.content)["workspace"]["properties"]["scope_id"]
+            await asyncio.to_thread(self.api_client.set_cached_workspace_scope, workspace_id, workspace_scope)
+            return workspace_scope
+        finally:
+            self._workspace_scope_tasks.pop(workspace_id, None)
+
+    async def set_cached_workspace_scopes(self, workspace_scopes: "dict[str, str]") -> None:
+        """Cache the scope_id for each workspace id in workspace_scopes (e.g. from the workspaces list response)"""
+        await asyncio.to_thread(self.api_client.set_cached_workspace_scopes, workspace_scopes)
@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import typing as t
+
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def get_config_dir() -> Path:
+    """Get the ~/.config/tre folder, creating it if needed."""
+    config_dir = Path("~/.config/tre").expanduser()
+    config_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return config_dir
+
+
+def read_json_file(path: Path):
+    """Read a JSON file, returning None if it doesn't exist or can't be parsed."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def write_file_atomic(path: Path, content: t.Union[str, bytes]) -> None:
+    """Write content to path via a temp file + rename so readers never see a partial file.
+
+    The file is only readable/writable by the current user.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        if isinstance(content, bytes):
+            temp_file = os.fdopen(fd, "wb")
+        else:
+            temp_file = os.fdopen(fd, "w", encoding="utf-8")
+        with temp_file:
+            temp_file.write(content)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.chmod(temp_path, 0o600)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json_file_atomic(path: Path, data) -> None:
+    write_file_atomic(path, json.dumps(data))
+
+
+@contextmanager
+def file_lock(path: Path):
+    """Hold an exclusive (cross-process) lock associated with path for the duration of the block."""
+    lock_path = path.with_name(path.name + ".lock")
+    with os.fdopen(os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600), "r+") as lock_file:
+        if os.name == "nt":
+            import msvcrt
+            lock_file.seek(0)
+            # LK_LOCK retries for ~10 seconds before raising
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
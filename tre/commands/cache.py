@@ -0,0 +1,25 @@
+import click
+
+from tre.completion import CompletionCache
+from tre.http_cache import HttpCache
+from tre.retry import CircuitBreaker
+from tre.token_cache import get_access_token_cache
+from tre.workspace_scope_cache import WorkspaceScopeCache
+
+
+@click.group(name="cache", help="Manage the CLI's local caches")
+def cache() -> None:
+    pass
+
+
+@click.command(name="clear", help="Clear cached workspace scopes, API responses, completion candidates, client-credentials access tokens and circuit breaker state")
+def cache_clear() -> None:
+    WorkspaceScopeCache().clear()
+    HttpCache().clear()
+    CompletionCache.clear()
+    get_access_token_cache().clear()
+    CircuitBreaker.clear()
+    click.echo("Cache cleared", err=True)
+
+
+cache.add_command(cache_clear)
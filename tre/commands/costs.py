@@ -43,10 +43,10 @@ def costs_overall(from_date, to_date, granularity, output_format, query):
     response = client.call_api(log, 'GET', url)
     # TODO - default table format
     output(
-        response.text,
+        response.content,
         output_format=output_format,
         query=query)
-    return response.text
+    return response.content
 
 
 @click.command(name="workspace", help="Show costs for a workspace")
@@ -82,10 +82,10 @@ def workspace_costs(workspace_id, from_date, to_date, granularity, output_format
     response = client.call_api(log, 'GET', url)
     # TODO - default table format
     output(
-        response.text,
+        response.content,
         output_format=output_format,
         query=query)
-    return response.text
+    return response.content
 
 
 costs.add_command(costs_overall)
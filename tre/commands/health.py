@@ -14,8 +14,8 @@ def health(output_format, query) -> None:
     client = ApiClient.get_api_client_from_config()
     response = client.call_api(log, 'GET', '/api/health')
     output(
-        response.text,
+        response.content,
         output_format=output_format,
         query=query,
         default_table_query="services")
-    return response.text
+    return response.content
@@ -1,13 +1,49 @@
+import asyncio
 import click
 import json
 import logging
-import msal
 import os
 
 from pathlib import Path
-from httpx import Client
 
+from tre import json_codec
 from tre.api_client import ApiClient
+from tre.async_api_client import AsyncApiClient
+from tre.cache import get_config_dir
+from tre.fanout import fan_out
+from tre.msal_token_cache import get_msal_app, save_token_cache
+
+
+def get_device_flow_max_scopes() -> int:
+    """Maximum number of workspace scopes to request in a single device code flow."""
+    return max(1, int(os.getenv("TRECLI_DEVICE_FLOW_MAX_SCOPES", "40")))
+
+
+def _get_workspace_scopes(log: logging.Logger, client: ApiClient, workspace_ids: "list[str]", scope_ids: "dict[str, str]") -> "list[str]":
+    """Get the auth scopes for the workspaces.
+
+    scope_ids contains the known scope_id for workspaces (e.g. from the workspaces list response). The scopes
+    for other workspaces are taken from the workspace scope cache, or looked up concurrently.
+    """
+    client.set_cached_workspace_scopes(scope_ids)
+    workspace_scopes = {}
+    missing = []
+    for workspace_id in workspace_ids:
+        scope_id = scope_ids.get(workspace_id) or client.get_cached_workspace_scope(log, workspace_id)
+        if scope_id is None:
+            missing.append(workspace_id)
+        else:
+            workspace_scopes[workspace_id] = client.get_workspace_auth_scope(scope_id)
+
+    if len(missing) > 0:
+        async def get_scopes():
+            async with AsyncApiClient(client) as async_client:
+                return await fan_out(lambda workspace_id: async_client.get_workspace_scope(log, workspace_id), missing)
+        for workspace_id, workspace_scope in zip(missing, asyncio.run(get_scopes())):
+            workspace_scopes[workspace_id] = workspace_scope
+
+    # remove any duplicates
+    return list(dict.fromkeys(workspace_scopes[workspace_id] for workspace_id in workspace_ids))
 
 
 @click.group(name="login", help="Set the TRE credentials and base URL")
@@ -49,17 +85,9 @@ def login_device_code(base_url: str, client_id: str, aad_tenant_id: str, api_sco
             raise click.ClickException("Cannot use `--all-workspaces and --workspace")
 
     # Set up token cache
-    Path('~/.config/tre').expanduser().mkdir(parents=True, exist_ok=True)
-    token_cache_file = Path('~/.config/tre/token_cache.json').expanduser()
-
-    cache = msal.SerializableTokenCache()
-    if os.path.exists(token_cache_file):
-        cache.deserialize(open(token_cache_file, "r").read())
+    token_cache_file = get_config_dir() / 'token_cache.json'
 
-    app = msal.PublicClientApplication(
-        client_id=client_id,
-        authority=f"https://login.microsoftonline.com/{aad_tenant_id}",
-        token_cache=cache)
+    app, cache = get_msal_app(str(token_cache_file.absolute()), client_id, aad_tenant_id)
 
     click.echo(f'api_scope: {api_scope}')
     flow = app.initiate_device_flow(scopes=[api_scope])
@@ -84,11 +112,11 @@ def login_device_code(base_url: str, client_id: str, aad_tenant_id: str, api_sco
         encoding='utf-8')
 
     # Save the token cache
-    if cache.has_state_changed:
-        with open(token_cache_file, "w") as cache_file:
-            cache_file.write(cache.serialize())
+    save_token_cache(cache, token_cache_file)
 
     client = None
+    # workspace id -> scope_id for workspaces whose scope is already known
+    scope_ids = {}
 
     if all_workspaces:
         click.echo("Getting current workspaces: ...")
@@ -96,25 +124,35 @@ def login_device_code(base_url: str, client_id: str, aad_tenant_id: str, api_sco
         response = client.call_api(log, "GET", "/api/workspaces")
         if not response.is_success:
             raise click.ClickException(f"Failed to list workspaces: {response.text}")
-        workspaces = [workspace["id"] for workspace in response.json()["workspaces"] if "scope_id" in workspace["properties"]]
+        # The list response includes the scope for each workspace so there's no need to look them up
+        scope_ids = {
+            workspace["id"]: workspace["properties"]["scope_id"]
+            for workspace in json_codec.loads(response.content)["workspaces"]
+            if "scope_id" in workspace["properties"]
+        }
+        workspaces = list(scope_ids)
 
     if workspaces is not None and len(workspaces) > 0:
         click.echo(f"Logging in to workspaces: {workspaces}...")
         if client is None:
             client = ApiClient.get_api_client_from_config()
 
-        workspace_scopes = [client.get_workspace_scope(log, workspace) for workspace in workspaces]
+        workspace_scopes = _get_workspace_scopes(log, client, list(workspaces), scope_ids)
 
-        flow = app.initiate_device_flow(scopes=[api_scope] + workspace_scopes)
-        if "user_code" not in flow:
-            raise click.ClickException("unable to initiate device flow")
+        # Request the scopes in batches to keep the size of each device code flow request reasonable
+        max_scopes = get_device_flow_max_scopes()
+        batches = [workspace_scopes[index:index + max_scopes] for index in range(0, len(workspace_scopes), max_scopes)]
+        for batch_index, batch in enumerate(batches):
+            if len(batches) > 1:
+                click.echo(f"Logging in to workspaces ({batch_index + 1} of {len(batches)})...")
+            flow = app.initiate_device_flow(scopes=[api_scope] + batch)
+            if "user_code" not in flow:
+                raise click.ClickException("unable to initiate device flow")
 
-        click.echo(flow['message'])
-        app.acquire_token_by_device_flow(flow)
+            click.echo(flow['message'])
+            app.acquire_token_by_device_flow(flow)
 
-        if cache.has_state_changed:
-            with open(token_cache_file, "w") as cache_file:
-                cache_file.write(cache.serialize())
+            save_token_cache(cache, token_cache_file)
 
     click.echo("Successfully logged in")
 
@@ -194,6 +232,7 @@ def _get_auth_token_client_credentials(
     api_scope: str,
     verify: bool
 ):
+    from httpx import Client
     with Client(verify=verify) as client:
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
         # Use Client Credentials flow
@@ -1,50 +1,21 @@
 import sys
-from time import sleep
+import time
+import typing as t
 
 import click
-from tre.api_client import ApiClient
+from tre import json_codec
+from tre.api_client import ApiClient, ApiException
+from tre.completion import complete_from_api
 from tre.output import output
+from tre.polling import OperationDurations, PollingPolicy, is_operation_state_success, is_operation_state_terminal
+from tre.retry import RETRYABLE_STATUS_CODES
 
+if t.TYPE_CHECKING:
+    from httpx import Response
 
-def get_operation_id_completion(ctx, log, list_url, param, incomplete, scope_id: str = None):
-    client = ApiClient.get_api_client_from_config()
-    response = client.call_api(log, 'GET', list_url, scope_id=scope_id)
-    if response.is_success:
-        ids = [workspace["id"] for workspace in response.json()["operations"]]
-        return [id for id in ids if id.startswith(incomplete)]
-
-
-def is_operation_state_terminal(state: str) -> bool:
-    # In the absence of a field on the operation indicating whether it is completed or not,
-    # we maintain a list here.
-    # Note that we test against 'active' states
-    # This way, a new state will be considered terminal (and not a success)
-    # so we avoid a case where waiting for copmletion continues indefinitely
-    # when there is a new state (and we return a non-successful status to
-    # highlight it)
-    return state not in [
-        'deleting',
-        'deploying',
-        'awaiting_action',
-        'invoking_action',
-        'pipeline_deploying',
-        'pipeline_running',
-        'not_deployed',
-        'awaiting_deployment',
-        'awaiting_deletion',
-        'awaiting_update',
-        'updating'
-    ]
-
-
-def is_operation_state_success(state: str) -> bool:
-    return state in [
-        'deleted',
-        'deployed',
-        'action_succeeded',
-        'pipeline_succeeded',
-        'updated'
-    ]
+
+def get_operation_id_completion(ctx, log, list_url, param, incomplete, workspace_id: str = None):
+    return complete_from_api(log, list_url, 'operations', incomplete, workspace_id=workspace_id)
 
 
 def default_operation_table_query_list():
@@ -55,7 +26,27 @@ def default_operation_table_query_single():
     return r"operation.{id:id, status:status, action:action, resourcePath:resourcePath, message:message}"
 
 
-def operation_show(log, operation_url, no_wait, output_format, query, suppress_output: bool = False, scope_id: str = None):
+def _poll_operation(log, client: ApiClient, operation_url: str, scope_id: t.Optional[str]) -> t.Optional["Response"]:
+    """Get the operation, returning None if the call failed with an error that may be transient"""
+    try:
+        response = client.call_api(log, 'GET', operation_url, scope_id=scope_id, throw_on_error=False)
+    except ApiException as e:
+        # network errors (after retries) or an open circuit breaker
+        click.echo(f'Error refreshing operation: {e.message}', err=True)
+        return None
+    if response.status_code in RETRYABLE_STATUS_CODES or response.status_code >= 500:
+        click.echo(f'Error refreshing operation: {response.status_code}', err=True)
+        return None
+    if response.is_error:
+        error_info = {
+            'status_code': response.status_code,
+            'body': response.text,
+        }
+        raise ApiException(message=json_codec.dumps(error_info, indent=2))
+    return response
+
+
+def operation_show(log, operation_url, no_wait, output_format, query, suppress_output: bool = False, scope_id: str = None, polling_policy: PollingPolicy = None):
 
     wait_for_completion = not no_wait
 
@@ -66,41 +57,84 @@ def operation_show(log, operation_url, no_wait, output_format, query, suppress_o
         operation_url,
         scope_id=scope_id
     )
-    response_json = response.json()
+    response_json = json_codec.loads(response.content)
     action = response_json['operation']['action']
     state = response_json['operation']['status']
 
-    while wait_for_completion and not is_operation_state_terminal(state):
-        click.echo(f'Operation state: {state} (action={action})',
-                   err=True, nl=False)
-        sleep(5)
-        click.echo(' - refreshing...', err=True)
-        response = client.call_api(
-            log,
-            'GET',
-            operation_url,
-            scope_id=scope_id
-        )
-        response_json = response.json()
-        action = response_json['operation']['action']
-        state = response_json['operation']['status']
-
-    if not suppress_output:
-        output(response.text, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
+    from tre.operation_events import OperationEvents, events_enabled
+    events = OperationEvents() if events_enabled() else None
+    if events is not None:
+        events.observe(response_json['operation'])
+
+    if wait_for_completion and not is_operation_state_terminal(state):
+        if polling_policy is None:
+            polling_policy = PollingPolicy.from_context()
+        durations = OperationDurations(client.base_url)
+        if polling_policy.expected_duration is None:
+            polling_policy.expected_duration = durations.get_expected_duration(response_json['operation'])
+        wait_started = time.time()
+        timed_out = False
+        poll_errors = 0
+
+        while not is_operation_state_terminal(state):
+            waited = time.time() - wait_started
+            if polling_policy.timeout is not None and waited >= polling_policy.timeout:
+                timed_out = True
+                break
+            delay = polling_policy.get_delay(waited)
+            if polling_policy.timeout is not None:
+                delay = min(delay, polling_policy.timeout - waited)
+            click.echo(f'Operation state: {state} (action={action})',
+                       err=True, nl=False)
+            log.debug(f'Waiting {delay:.1f}s before refreshing operation')
+            time.sleep(delay)
+            click.echo(' - refreshing...', err=True)
+            poll_response = _poll_operation(log, client, operation_url, scope_id)
+            if poll_response is None:
+                poll_errors += 1
+                if poll_errors >= polling_policy.max_errors:
+                    raise click.ClickException(f'Giving up waiting for the operation after {poll_errors} consecutive errors')
+                continue
+            poll_errors = 0
+            response = poll_response
+            response_json = json_codec.loads(response.content)
+            action = response_json['operation']['action']
+            state = response_json['operation']['status']
+            if events is not None:
+                events.observe(response_json['operation'])
+
+        if is_operation_state_success(state):
+            durations.record(response_json['operation'])
+        if timed_out:
+            click.echo(f'Timed out after {polling_policy.timeout:g}s waiting for operation to complete (state: {state})', err=True)
+
+    if is_operation_state_terminal(state):
+        client.operation_journal.remove(response_json['operation']['id'])
+
+    # with --events the events are output instead of the final result
+    if not suppress_output and events is None:
+        output(response.content, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
 
     if wait_for_completion and not is_operation_state_success(state):
         sys.exit(1)
 
-    return response.text
+    return response.content
+
 
+def operations_list(log, operations_url, output_format, query, scope_id: str = None, limit: int = None,
+                    follow: bool = False, recursive: bool = False, follow_interval: float = 5):
+    if follow:
+        # imported here as following uses asyncio, which isn't needed otherwise
+        from tre.operation_follow import follow_operations
+        follow_operations(log, operations_url, recursive, follow_interval, output_format, query, default_operation_table_query_list())
+        return
 
-def operations_list(log, operations_url, output_format, query, scope_id: str = None):
     client = ApiClient.get_api_client_from_config()
 
-    response = client.call_api(
+    with client.stream_api(
         log,
         'GET',
         operations_url,
         scope_id=scope_id
-    )
-    output(response.text, output_format=output_format, query=query, default_table_query=default_operation_table_query_list())
+    ) as response:
+        output(response.iter_bytes(), output_format=output_format, query=query, default_table_query=default_operation_table_query_list(), limit=limit)
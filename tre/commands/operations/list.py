@@ -0,0 +1,110 @@
+import asyncio
+import click
+import heapq
+import logging
+import re
+import time
+import typing as t
+
+from datetime import datetime
+
+from tre import json_codec
+from tre.api_client import ApiClient
+from tre.async_api_client import AsyncApiClient
+from tre.commands.operation import default_operation_table_query_list
+from tre.estate import EstateCrawler
+from tre.output import limit_option, output, output_option, query_option
+
+# e.g. 30s, 15m, 2h, 7d
+_RELATIVE_TIME = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def _parse_since(ctx: click.Context, param: click.Parameter, value: t.Optional[str]) -> t.Optional[float]:
+    """Convert a --since value (a relative time such as 2h, an ISO 8601 time or a Unix timestamp) to a Unix timestamp"""
+    if value is None:
+        return None
+    match = _RELATIVE_TIME.match(value)
+    if match:
+        return time.time() - float(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        # datetime.fromisoformat doesn't accept a trailing Z before Python 3.11
+        return datetime.fromisoformat(re.sub(r"Z$", "+00:00", value)).timestamp()
+    except ValueError:
+        raise click.BadParameter(f"'{value}' is not a relative time (e.g. 30m, 2h, 7d), ISO 8601 time or Unix timestamp")
+
+
+def _get_updated_when(operation: dict) -> float:
+    updated = operation.get("updatedWhen")
+    return updated if isinstance(updated, (int, float)) else 0
+
+
+async def _get_operation_lists(
+        log, api_client: ApiClient, workspace_ids: t.Optional["tuple[str, ...]"], filter_operation: t.Callable[[dict], bool]) -> "list[list[dict]]":
+    """Get the (filtered) operations for each resource, each sorted by updatedWhen (most recent first)"""
+    operation_lists = []
+    async with AsyncApiClient(api_client) as client:
+        crawler = EstateCrawler(log, client)
+        resources = await crawler.get_resources(workspace_ids=workspace_ids)
+        click.echo(f"Getting operations for {len(resources)} resource(s)...", err=True)
+        async for _, operations in crawler.iter_operations(resources):
+            operations = [operation for operation in operations if filter_operation(operation)]
+            if len(operations) > 0:
+                operations.sort(key=_get_updated_when, reverse=True)
+                operation_lists.append(operations)
+    return operation_lists
+
+
+def _iter_merged_content(operation_lists: "list[list[dict]]") -> t.Iterator[bytes]:
+    """Yield the content of an operations list response, merging the (sorted) per-resource lists with the most recently updated first"""
+    yield b'{"operations": ['
+    separator = b""
+    for operation in heapq.merge(*operation_lists, key=_get_updated_when, reverse=True):
+        # formatted as for json_codec.dumps of the whole document
+        yield separator + json_codec.dumps(operation).encode("utf-8")
+        separator = b", "
+    yield b"]}"
+
+
+@click.command(
+    name="list",
+    help="List the operations for all workspaces, workspace services, user resources and shared services (--all), "
+    "or for specific workspaces and their services/user resources (--workspace). Operations are retrieved concurrently "
+    "and output with the most recently updated first, so --limit N gives the N most recent operations.")
+@click.option('--all', 'all_resources',
+              help="List the operations for all resources",
+              flag_value=True,
+              default=False)
+@click.option('--workspace', 'workspace_ids',
+              help="List the operations for this workspace and its services/user resources (can be specified multiple times)",
+              multiple=True)
+@click.option('--since',
+              help="Only list operations updated since this time: a relative time (e.g. 30m, 2h, 7d), ISO 8601 time or Unix timestamp",
+              callback=_parse_since,
+              required=False)
+@click.option('--status', 'statuses',
+              help="Only list operations with this status, e.g. deploying (can be specified multiple times)",
+              multiple=True)
+@output_option()
+@query_option()
+@limit_option()
+def operations_list(all_resources, workspace_ids, since, statuses, output_format, query, limit):
+    log = logging.getLogger(__name__)
+
+    if all_resources == (len(workspace_ids) > 0):
+        raise click.UsageError("Specify either --all or --workspace "
+                               "(to list the operations for a single resource use e.g. `tre workspace <workspace_id> operations list`)")
+
+    def filter_operation(operation: dict) -> bool:
+        if len(statuses) > 0 and operation.get("status") not in statuses:
+            return False
+        return since is None or _get_updated_when(operation) >= since
+
+    api_client = ApiClient.get_api_client_from_config()
+    operation_lists = asyncio.run(_get_operation_lists(log, api_client, workspace_ids or None, filter_operation))
+    output(_iter_merged_content(operation_lists), output_format=output_format, query=query,
+           default_table_query=default_operation_table_query_list(), limit=limit)
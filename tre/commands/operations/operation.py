@@ -0,0 +1,52 @@
+import click
+import logging
+
+from tre.api_client import ApiClient
+from tre.commands.operation import operation_show
+from tre.output import output_option, query_option
+from tre.polling import polling_options
+
+from .wait import OperationRef
+
+
+@click.group(help="Work with operations started by the CLI")
+def operation() -> None:
+    pass
+
+
+@click.command(
+    name="resume",
+    help="Resume waiting for an operation started by the CLI (see `tre operations pending`). "
+    "OPERATION is the operation ID or URL, and can be omitted if there is a single pending operation.")
+@click.argument('operation_id', metavar="[OPERATION]", required=False)
+@polling_options()
+@output_option()
+@query_option()
+def operation_resume(operation_id, output_format, query):
+    log = logging.getLogger(__name__)
+
+    client = ApiClient.get_api_client_from_config()
+    entries = client.operation_journal.get_entries()
+    if operation_id is None:
+        if len(entries) != 1:
+            raise click.UsageError(f"There are {len(entries)} pending operations - specify the operation to resume (see `tre operations pending`)")
+        entry = entries[0]
+    else:
+        entry = next((entry for entry in entries if operation_id in [entry["id"], entry["url"]]), None)
+
+    if entry is not None:
+        operation_url = entry["url"]
+        scope_id = entry.get("scopeId")
+    elif "/operations/" in operation_id:
+        # an operation that isn't in the journal (e.g. started on another machine)
+        ref = OperationRef.from_url(operation_id)
+        operation_url = ref.url
+        workspace_id = ref.get_workspace_id()
+        scope_id = client.get_workspace_scope(log, workspace_id) if workspace_id is not None else None
+    else:
+        raise click.ClickException(f"Operation '{operation_id}' is not a pending operation - specify the operation URL to wait for it")
+
+    operation_show(log, operation_url, no_wait=False, output_format=output_format, query=query, scope_id=scope_id)
+
+
+operation.add_command(operation_resume)
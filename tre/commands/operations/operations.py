@@ -0,0 +1,17 @@
+import click
+
+from .list import operations_list
+from .pending import operations_pending
+from .stats import operations_stats
+from .wait import operations_wait
+
+
+@click.group(help="Work with operations across resources")
+def operations() -> None:
+    pass
+
+
+operations.add_command(operations_list)
+operations.add_command(operations_pending)
+operations.add_command(operations_stats)
+operations.add_command(operations_wait)
@@ -0,0 +1,61 @@
+import asyncio
+import click
+import logging
+
+from tre import json_codec
+from tre.api_client import ApiClient
+from tre.async_api_client import AsyncApiClient
+from tre.commands.operation import default_operation_table_query_list, is_operation_state_terminal
+from tre.output import output, output_option, query_option
+from tre.polling import OperationDurations, PollingPolicy, polling_options
+
+from .wait import OperationRef, OperationWaiter, wait_for_operations
+
+
+@click.command(
+    name="pending",
+    help="List operations started by the CLI that haven't completed, e.g. if the CLI exited while waiting for them. "
+    "Operations that have since completed are removed from the list. Use --wait to wait for the operations to complete.")
+@click.option('--wait', 'wait_for_completion',
+              help="Wait for the pending operations to complete",
+              flag_value=True,
+              default=False)
+@polling_options()
+@output_option()
+@query_option()
+def operations_pending(wait_for_completion, output_format, query):
+    log = logging.getLogger(__name__)
+
+    api_client = ApiClient.get_api_client_from_config()
+    journal = api_client.operation_journal
+    refs = [OperationRef.from_journal_entry(entry) for entry in journal.get_entries()]
+
+    if wait_for_completion:
+        if len(refs) == 0:
+            click.echo("No pending operations", err=True)
+            return
+        wait_for_operations(log, refs, output_format, query)
+        return
+
+    client = AsyncApiClient(api_client)
+    waiter = OperationWaiter(log, client, PollingPolicy.from_context(), OperationDurations(api_client.base_url))
+
+    async def refresh():
+        async with client:
+            await waiter.refresh(refs)
+    if len(refs) > 0:
+        asyncio.run(refresh())
+
+    operations = []
+    for ref in refs:
+        if ref.error is not None:
+            # e.g. the resource has since been deleted
+            journal.remove(ref.operation_id)
+        elif ref.operation is not None and is_operation_state_terminal(ref.status):
+            click.echo(f"Operation {ref.operation_id} ({ref.operation.get('action')} {ref.resource_path}) has completed: {ref.status}", err=True)
+            journal.remove(ref.operation_id)
+        else:
+            # the operation may not have been retrieved if there was a transient error
+            operations.append(ref.operation or {"id": ref.operation_id, "resourcePath": ref.resource_path})
+
+    output(json_codec.dumps_bytes({"operations": operations}), output_format=output_format, query=query, default_table_query=default_operation_table_query_list())
@@ -0,0 +1,180 @@
+import asyncio
+import click
+import logging
+import math
+import time
+import typing as t
+
+from tre import json_codec
+from tre.api_client import ApiClient
+from tre.async_api_client import AsyncApiClient
+from tre.commands.operation import is_operation_state_success, is_operation_state_terminal
+from tre.estate import EstateCrawler, Resource
+from tre.output import output, output_option, query_option
+
+
+def _default_stats_table_query():
+    return r"stats[].{action:action, template:template, currentVersion:currentTemplateVersion, step:step, stepTemplate:stepTemplate, " \
+        r"count:count, failureRate:failureRate, p50:p50, p90:p90, p95:p95, max:max, outliers:outliers}"
+
+
+def _percentile(sorted_values: "list[float]", percent: float) -> float:
+    """Get a percentile of sorted_values, interpolating between the closest values (as for numpy's default method)"""
+    position = (len(sorted_values) - 1) * percent / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _get_duration(start, end) -> t.Optional[float]:
+    if not isinstance(start, (int, float)) or not isinstance(end, (int, float)) or end < start:
+        return None
+    return float(end - start)
+
+
+class _Sample:
+    """A completed operation (or operation step) in a group"""
+
+    def __init__(self, operation: dict, status: str, duration: t.Optional[float]):
+        self.operation = operation
+        self.status = status
+        self.duration = duration
+
+
+class OperationStats:
+    """Duration and failure statistics for completed operations, grouped by action and template (and optionally step).
+
+    Durations are taken from the operations' createdWhen/updatedWhen, and for steps from the end of
+    the previous step (or the start of the operation) to the step's updatedWhen. Percentiles are
+    calculated from the successful operations only, as failures often end early. Outliers are
+    successful operations whose duration is beyond the upper Tukey fence (Q3 + 1.5 * IQR) for the group.
+    Operations don't record the template version that they ran with, so operations are grouped by the
+    resource's current template version (i.e. operations from before an upgrade count towards the new version).
+    """
+
+    def __init__(self, include_steps: bool = False, created_after: t.Optional[float] = None):
+        self._include_steps = include_steps
+        self._created_after = created_after
+        self._groups: "dict[tuple, list[_Sample]]" = {}
+
+    def add(self, resource: Resource, operations: "list[dict]") -> None:
+        template = resource.resource.get("templateName")
+        # the current version - the version at the time of each operation isn't available
+        template_version = resource.resource.get("templateVersion")
+        for operation in operations:
+            status = operation.get("status")
+            if not is_operation_state_terminal(status):
+                continue
+            created = operation.get("createdWhen")
+            if self._created_after is not None and (not isinstance(created, (int, float)) or created < self._created_after):
+                continue
+            action = operation.get("action")
+            duration = _get_duration(created, operation.get("updatedWhen"))
+            self._groups.setdefault((action, template, template_version, None, None), []).append(_Sample(operation, status, duration))
+
+            if self._include_steps:
+                step_start = created
+                for step in operation.get("steps") or []:
+                    step_status = step.get("status")
+                    step_end = step.get("updatedWhen")
+                    if not is_operation_state_terminal(step_status):
+                        # later steps didn't run
+                        break
+                    step_id = step.get("templateStepId") or step.get("stepId")
+                    key = (action, template, template_version, step_id, step.get("resourceTemplateName"))
+                    self._groups.setdefault(key, []).append(_Sample(operation, step_status, _get_duration(step_start, step_end)))
+                    step_start = step_end
+
+    def get_content(self) -> dict:
+        stats = []
+        outliers = []
+        for key in sorted(self._groups, key=lambda key: tuple("" if value is None else str(value) for value in key)):
+            action, template, template_version, step, step_template = key
+            samples = self._groups[key]
+            succeeded = [sample for sample in samples if is_operation_state_success(sample.status)]
+            durations = sorted(sample.duration for sample in succeeded if sample.duration is not None)
+            record = {
+                "action": action,
+                "template": template,
+                "currentTemplateVersion": template_version,
+                "step": step,
+                "stepTemplate": step_template,
+                "count": len(samples),
+                "succeeded": len(succeeded),
+                "failed": len(samples) - len(succeeded),
+                "failureRate": round((len(samples) - len(succeeded)) / len(samples), 3),
+                "mean": None,
+                "p50": None,
+                "p90": None,
+                "p95": None,
+                "max": None,
+                "outliers": 0,
+            }
+            if len(durations) > 0:
+                record["mean"] = round(sum(durations) / len(durations), 1)
+                for percent in [50, 90, 95]:
+                    record[f"p{percent}"] = round(_percentile(durations, percent), 1)
+                record["max"] = round(durations[-1], 1)
+
+            if len(durations) >= 4:
+                q1 = _percentile(durations, 25)
+                q3 = _percentile(durations, 75)
+                threshold = q3 + 1.5 * (q3 - q1)
+                for sample in succeeded:
+                    if sample.duration is not None and sample.duration > threshold:
+                        record["outliers"] += 1
+                        outliers.append({
+                            "id": sample.operation.get("id"),
+                            "resourcePath": sample.operation.get("resourcePath"),
+                            "action": action,
+                            "template": template,
+                            "currentTemplateVersion": template_version,
+                            "step": step,
+                            "stepTemplate": step_template,
+                            "createdWhen": sample.operation.get("createdWhen"),
+                            "duration": round(sample.duration, 1),
+                            "threshold": round(threshold, 1),
+                            "p50": record["p50"],
+                        })
+            stats.append(record)
+        outliers.sort(key=lambda outlier: outlier["duration"], reverse=True)
+        return {"stats": stats, "outliers": outliers}
+
+
+async def _collect_stats(log, api_client: ApiClient, stats: OperationStats, workspace_ids: t.Optional["tuple[str, ...]"]) -> int:
+    async with AsyncApiClient(api_client) as client:
+        crawler = EstateCrawler(log, client)
+        resources = await crawler.get_resources(workspace_ids=workspace_ids)
+        click.echo(f"Getting operations for {len(resources)} resource(s)...", err=True)
+        async for resource, operations in crawler.iter_operations(resources):
+            stats.add(resource, operations)
+        return len(resources)
+
+
+@click.command(
+    name="stats",
+    help="Show duration percentiles, failure rates and outliers for completed operations, grouped by action, "
+    "template and the resource's current template version (and optionally step). Operations are collected concurrently from the workspaces, workspace services, "
+    "user resources and shared services. Durations are in seconds. Use `-q outliers` to list the outlying operations.")
+@click.option('--workspace', 'workspace_ids',
+              help="Only include operations for this workspace and its services/user resources (can be specified multiple times)",
+              multiple=True)
+@click.option('--steps', 'include_steps',
+              help="Include statistics for each step of the operations",
+              flag_value=True,
+              default=False)
+@click.option('--days',
+              help="Only include operations created in the last DAYS days",
+              type=click.FloatRange(min=0),
+              required=False)
+@output_option()
+@query_option()
+def operations_stats(workspace_ids, include_steps, days, output_format, query):
+    log = logging.getLogger(__name__)
+
+    api_client = ApiClient.get_api_client_from_config()
+    created_after = time.time() - days * 24 * 60 * 60 if days is not None else None
+    stats = OperationStats(include_steps=include_steps, created_after=created_after)
+    asyncio.run(_collect_stats(log, api_client, stats, workspace_ids or None))
+
+    output(json_codec.dumps_bytes(stats.get_content()), output_format=output_format, query=query, default_table_query=_default_stats_table_query())
@@ -0,0 +1,340 @@
+import asyncio
+import click
+import logging
+import re
+import sys
+import time
+import typing as t
+
+from logging import Logger
+
+from tre import json_codec
+from tre.api_client import ApiClient, ApiException
+from tre.async_api_client import AsyncApiClient
+from tre.commands.operation import default_operation_table_query_list, is_operation_state_success, is_operation_state_terminal
+from tre.fanout import fan_out
+from tre.operation_events import OperationEvents, events_enabled
+from tre.output import OutputFormat, output, output_option, query_option
+from tre.polling import OperationDurations, PollingPolicy, polling_options
+from tre.retry import RETRYABLE_STATUS_CODES
+
+# e.g. /api/workspaces/<id>/operations/<id> or https://<tre>/api/workspaces/<id>/operations/<id>
+_OPERATION_URL = re.compile(r"^(?:.*?/api)?(/(?:workspaces|shared-services)/.+?)/operations/([^/?#]+)/?$")
+_WORKSPACE_CHILD_PATH = re.compile(r"^/workspaces/([^/]+)/workspace-services/")
+
+
+class OperationRef:
+    """An operation to wait for, identified by the path of its resource and its id"""
+
+    def __init__(self, resource_path: str, operation_id: str, operation: dict = None, scope_id: str = None):
+        self.resource_path = resource_path
+        self.operation_id = operation_id
+        self.operation = operation
+        self.scope_id = scope_id
+        # set if the operation couldn't be retrieved
+        self.error: t.Optional[str] = None
+
+    @property
+    def key(self) -> "tuple[str, str]":
+        return (self.resource_path, self.operation_id)
+
+    @property
+    def url(self) -> str:
+        return f"/api{self.resource_path}/operations/{self.operation_id}"
+
+    @property
+    def status(self) -> t.Optional[str]:
+        return self.operation["status"] if self.operation is not None else None
+
+    def get_workspace_id(self) -> t.Optional[str]:
+        """Get the id of the workspace for a workspace service or user resource (whose API calls need the workspace scope)"""
+        match = _WORKSPACE_CHILD_PATH.match(self.resource_path)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def from_operation(operation: dict) -> "OperationRef":
+        if not isinstance(operation, dict) or "id" not in operation or "resourcePath" not in operation:
+            raise click.BadParameter(f"Expected an operation with 'id' and 'resourcePath' properties: {json_codec.dumps(operation)}")
+        return OperationRef(operation["resourcePath"], operation["id"], operation)
+
+    @staticmethod
+    def from_journal_entry(entry: dict) -> "OperationRef":
+        """Create an OperationRef for an operation recorded in the OperationJournal"""
+        ref = OperationRef.from_url(entry["url"])
+        ref.scope_id = entry.get("scopeId")
+        return ref
+
+    @staticmethod
+    def from_url(url: str) -> "OperationRef":
+        match = _OPERATION_URL.match(url)
+        if match is None:
+            raise click.BadParameter(
+                f"'{url}' is not an operation URL (e.g. /api/workspaces/<workspace_id>/operations/<operation_id>) or operation JSON")
+        return OperationRef(match.group(1), match.group(2))
+
+
+def parse_operation_refs(values: t.Iterable[str]) -> "list[OperationRef]":
+    """Parse operation URLs and operation JSON into OperationRefs, removing duplicates.
+
+    Each value can be an operation URL, or JSON in any of the forms output by the CLI for operations: a single
+    operation response ({"operation": {...}}), a list response ({"operations": [...]}), an operation
+    object ({"id": ..., "resourcePath": ...}) or NDJSON with one of these per line.
+    """
+    refs = {}
+
+    def add(ref: OperationRef):
+        refs.setdefault(ref.key, ref)
+
+    def add_json(value):
+        if isinstance(value, dict) and "operation" in value:
+            add(OperationRef.from_operation(value["operation"]))
+        elif isinstance(value, dict) and "operations" in value:
+            for operation in value["operations"]:
+                add(OperationRef.from_operation(operation))
+        elif isinstance(value, list):
+            for item in value:
+                add_json(item)
+        else:
+            add(OperationRef.from_operation(value))
+
+    for value in values:
+        value = value.strip()
+        if value == "":
+            continue
+        if value[0] in "{[":
+            try:
+                add_json(json_codec.loads(value))
+                continue
+            except ValueError:
+                pass
+            # NDJSON
+            for line in value.splitlines():
+                line = line.strip()
+                if line != "":
+                    try:
+                        add_json(json_codec.loads(line))
+                    except ValueError:
+                        raise click.BadParameter(f"Invalid JSON: {line}")
+        else:
+            for line in value.splitlines():
+                if line.strip() != "":
+                    add(OperationRef.from_url(line.strip()))
+    return list(refs.values())
+
+
+def read_operation_refs(operations: "tuple[str, ...]") -> "list[OperationRef]":
+    """Get the operations from the command arguments, reading from stdin if there are none (or for '-')"""
+    values = []
+    for value in operations:
+        if value == "-":
+            values.append(sys.stdin.read())
+        else:
+            values.append(value)
+    if len(operations) == 0:
+        if sys.stdin.isatty():
+            raise click.UsageError("Specify the operations to wait for as arguments or via stdin")
+        values.append(sys.stdin.read())
+    return parse_operation_refs(values)
+
+
+class OperationWaiter:
+    """Wait for many operations concurrently, using a single AsyncApiClient.
+
+    On each tick, operations for the same resource are polled with a single call to the resource's
+    operations list, and other operations are polled individually (concurrently).
+    """
+
+    def __init__(self, log: Logger, client: AsyncApiClient, polling_policy: PollingPolicy, durations: OperationDurations, events: OperationEvents = None):
+        self._log = log
+        self._client = client
+        self._polling_policy = polling_policy
+        self._durations = durations
+        self._events = events
+        self.failed: "list[OperationRef]" = []
+        self.timed_out: "list[OperationRef]" = []
+
+    async def _get_scope_id(self, ref: OperationRef) -> t.Optional[str]:
+        if ref.scope_id is not None:
+            return ref.scope_id
+        workspace_id = ref.get_workspace_id()
+        if workspace_id is None:
+            return None
+        return await self._client.get_workspace_scope(self._log, workspace_id)
+
+    async def _get(self, url: str, scope_id: t.Optional[str]) -> t.Optional[dict]:
+        """GET url, returning None if the call failed with an error that may be transient"""
+        try:
+            response = await self._client.call_api(self._log, "GET", url, scope_id=scope_id, throw_on_error=False)
+        except ApiException as e:
+            click.echo(f"Error refreshing {url}: {e.message}", err=True)
+            return None
+        if response.status_code in RETRYABLE_STATUS_CODES or response.status_code >= 500:
+            click.echo(f"Error refreshing {url}: {response.status_code}", err=True)
+            return None
+        if response.is_error:
+            error_info = {
+                'status_code': response.status_code,
+                'body': response.text,
+            }
+            raise ApiException(message=json_codec.dumps(error_info, indent=2))
+        return json_codec.loads(response.content)
+
+    async def _poll_resource(self, resource_path: str, refs: "list[OperationRef]") -> None:
+        scope_id = await self._get_scope_id(refs[0])
+        if len(refs) > 1:
+            # Get the state of all of the operations for the resource with a single call
+            response_json = await self._get(f"/api{resource_path}/operations", scope_id)
+            if response_json is None:
+                return
+            operations = {operation["id"]: operation for operation in response_json.get("operations", [])}
+            missing = []
+            for ref in refs:
+                if ref.operation_id in operations:
+                    ref.operation = operations[ref.operation_id]
+                else:
+                    missing.append(ref)
+            refs = missing
+
+        for ref in refs:
+            try:
+                response_json = await self._get(ref.url, scope_id)
+            except ApiException as e:
+                # e.g. the operation doesn't exist - other operations for the resource are still waited for
+                self._set_error(ref, e)
+                continue
+            if response_json is not None:
+                ref.operation = response_json["operation"]
+
+    @staticmethod
+    def _set_error(ref: OperationRef, e: ApiException) -> None:
+        click.echo(f"Error getting operation {ref.url}: {e.message}", err=True)
+        ref.error = e.message
+
+    async def refresh(self, refs: "list[OperationRef]") -> None:
+        """Get the current state of the operations"""
+        by_resource: "dict[str, list[OperationRef]]" = {}
+        for ref in refs:
+            by_resource.setdefault(ref.resource_path, []).append(ref)
+
+        async def poll_resource(resource_path: str):
+            try:
+                await self._poll_resource(resource_path, by_resource[resource_path])
+            except ApiException as e:
+                # e.g. the resource doesn't exist
+                for ref in by_resource[resource_path]:
+                    self._set_error(ref, e)
+
+        await fan_out(poll_resource, list(by_resource))
+
+    async def wait(self, refs: "list[OperationRef]", completed: asyncio.Queue) -> None:
+        """Wait for the operations to complete, adding each to completed as it completes (and None at the end)"""
+        try:
+            pending = list(refs)
+            wait_started = time.time()
+            # operations specified by URL are polled immediately to get their state
+            await self.refresh([ref for ref in pending if ref.operation is None])
+            while True:
+                if self._events is not None:
+                    for ref in pending:
+                        if ref.operation is not None:
+                            self._events.observe(ref.operation)
+                for ref in list(pending):
+                    if ref.error is not None:
+                        pending.remove(ref)
+                        self.failed.append(ref)
+                        self._client.api_client.operation_journal.remove(ref.operation_id)
+                    elif ref.operation is not None and is_operation_state_terminal(ref.status):
+                        pending.remove(ref)
+                        self._complete(ref, completed)
+                if len(pending) == 0:
+                    break
+
+                waited = time.time() - wait_started
+                policy = self._polling_policy
+                if policy.timeout is not None and waited >= policy.timeout:
+                    self.timed_out = pending
+                    break
+                delay = policy.get_delay(waited)
+                if policy.timeout is not None:
+                    delay = min(delay, policy.timeout - waited)
+                click.echo(f"Waiting for {len(pending)} operation(s)...", err=True)
+                await asyncio.sleep(delay)
+                await self.refresh(pending)
+        finally:
+            completed.put_nowait(None)
+
+    def _complete(self, ref: OperationRef, completed: asyncio.Queue) -> None:
+        operation = ref.operation
+        click.echo(f"Operation {ref.operation_id} ({operation.get('action')} {ref.resource_path}): {ref.status}", err=True)
+        self._client.api_client.operation_journal.remove(ref.operation_id)
+        if is_operation_state_success(ref.status):
+            self._durations.record(operation)
+        else:
+            self.failed.append(ref)
+        completed.put_nowait(operation)
+
+
+def _iter_completed_content(waiter: OperationWaiter, client: AsyncApiClient, refs: "list[OperationRef]") -> t.Iterator[bytes]:
+    """Run the waiter, yielding the content of an operations list response as the operations complete"""
+    loop = asyncio.new_event_loop()
+    task = None
+    try:
+        completed = asyncio.Queue()
+        task = loop.create_task(waiter.wait(refs, completed))
+        yield b'{"operations": ['
+        separator = b""
+        while True:
+            operation = loop.run_until_complete(completed.get())
+            if operation is None:
+                break
+            # formatted as for json_codec.dumps of the whole document
+            yield separator + json_codec.dumps(operation).encode("utf-8")
+            separator = b", "
+        # raise any errors
+        loop.run_until_complete(task)
+        yield b"]}"
+    finally:
+        if task is not None and not task.done():
+            task.cancel()
+            loop.run_until_complete(asyncio.gather(task, return_exceptions=True))
+        loop.run_until_complete(client.close())
+        loop.close()
+
+
+@click.command(
+    name="wait",
+    help="Wait for operations to complete. Specify the operations as operation URLs or the JSON/NDJSON output "
+    "of commands run with --no-wait, as arguments or via stdin. Operations are output as they complete, "
+    "and the exit code is non-zero if any of the operations didn't succeed.")
+@click.argument('operations', nargs=-1)
+@polling_options()
+@output_option()
+@query_option()
+def operations_wait(operations, output_format, query):
+    log = logging.getLogger(__name__)
+
+    refs = read_operation_refs(operations)
+    if len(refs) == 0:
+        raise click.UsageError("No operations specified")
+    wait_for_operations(log, refs, output_format, query)
+
+
+def wait_for_operations(log: Logger, refs: "list[OperationRef]", output_format: str, query: t.Optional[str]) -> None:
+    """Wait for the operations, outputting each as it completes, and exit with a non-zero exit code if any didn't succeed"""
+    api_client = ApiClient.get_api_client_from_config()
+    client = AsyncApiClient(api_client)
+    events = OperationEvents() if events_enabled() else None
+    waiter = OperationWaiter(log, client, PollingPolicy.from_context(), OperationDurations(api_client.base_url), events)
+    content = _iter_completed_content(waiter, client, refs)
+    if output_format == OutputFormat.Suppress.value or events is not None:
+        # still wait for the operations (with --events the events are output instead)
+        for _ in content:
+            pass
+    else:
+        # each operation is written (and flushed) as it completes
+        output(content, output_format=output_format, query=query, default_table_query=default_operation_table_query_list(), incremental=True)
+
+    if len(waiter.timed_out) > 0:
+        click.echo(f"Timed out waiting for {len(waiter.timed_out)} operation(s) to complete", err=True)
+    if len(waiter.failed) > 0 or len(waiter.timed_out) > 0:
+        sys.exit(1)
@@ -1,6 +1,8 @@
 import logging
 import click
 from tre.api_client import ApiClient
+from tre.completion import complete_from_api
+from tre.http_cache import max_age_option
 from tre.output import output, output_option, query_option
 
 from .contexts import SharedServiceTemplateContext, pass_shared_service_template_context
@@ -8,11 +10,7 @@ from .contexts import SharedServiceTemplateContext, pass_shared_service_template
 
 def template_name_completion(ctx, param, incomplete):
     log = logging.getLogger(__name__)
-    client = ApiClient.get_api_client_from_config()
-    response = client.call_api(log, 'GET', '/api/shared-service-templates')
-    if response.is_success:
-        names = [workspace["name"] for workspace in response.json()["templates"]]
-        return [name for name in names if name.startswith(incomplete)]
+    return complete_from_api(log, '/api/shared-service-templates', 'templates', incomplete, value_key="name")
 
 
 @click.group(name="shared-service-template", invoke_without_command=True, help="Perform actions on an shared-service-template")
@@ -25,6 +23,7 @@ def shared_service_template(ctx: click.Context, template_name) -> None:
 @click.command(name="show", help="Show template")
 @output_option()
 @query_option()
+@max_age_option()
 @pass_shared_service_template_context
 def shared_service_template_show(shared_service_template_context: SharedServiceTemplateContext, output_format, query) -> None:
     log = logging.getLogger(__name__)
@@ -41,7 +40,7 @@ def shared_service_template_show(shared_service_template_context: SharedServiceT
         f'/api/shared-service-templates/{template_name}',
     )
 
-    output(response.text, output_format=output_format, query=query, default_table_query=r"{id: id, name:name, title: title, version:version, description:description}")
+    output(response.content, output_format=output_format, query=query, default_table_query=r"{id: id, name:name, title: title, version:version, description:description}")
 
 
 shared_service_template.add_command(shared_service_template_show)
@@ -2,7 +2,8 @@ import logging
 import click
 
 from tre.api_client import ApiClient
-from tre.output import output, output_option, query_option
+from tre.http_cache import max_age_option
+from tre.output import limit_option, output, output_option, query_option
 
 
 @click.group(name="shared-service-templates", help="List shared-service-templates ")
@@ -13,7 +14,9 @@ def shared_service_templates():
 @click.command(name="list", help="List shared-service-templates")
 @output_option()
 @query_option()
-def shared_service_templates_list(output_format, query):
+@limit_option()
+@max_age_option()
+def shared_service_templates_list(output_format, query, limit):
     log = logging.getLogger(__name__)
 
     client = ApiClient.get_api_client_from_config()
@@ -23,7 +26,7 @@ def shared_service_templates_list(output_format, query):
         'GET',
         '/api/shared-service-templates',
     )
-    output(response.text, output_format=output_format, query=query, default_table_query=r"templates[].{name:name, title: title, description:description}")
+    output(response.content, output_format=output_format, query=query, default_table_query=r"templates[].{name:name, title: title, description:description}", limit=limit)
 
 
 shared_service_templates.add_command(shared_service_templates_list)
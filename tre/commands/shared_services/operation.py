@@ -3,6 +3,7 @@ import click
 
 from tre.commands.operation import get_operation_id_completion, operation_show
 from tre.output import output_option, query_option
+from tre.polling import polling_options
 
 from .contexts import pass_shared_service_operation_context, SharedServiceOperationContext
 
@@ -10,8 +11,8 @@ from .contexts import pass_shared_service_operation_context, SharedServiceOperat
 def operation_id_completion(ctx, param, incomplete):
     log = logging.getLogger(__name__)
     parent_ctx = ctx.parent
-    workspace_id = parent_ctx.params["workspace_id"]
-    list_url = f'/api/workspaces/{workspace_id}/operations'
+    shared_service_id = parent_ctx.params["shared_service_id"]
+    list_url = f'/api/shared-services/{shared_service_id}/operations'
     return get_operation_id_completion(ctx, log, list_url, param, incomplete)
 
 
@@ -27,6 +28,7 @@ def shared_service_operation(ctx: click.Context, operation_id) -> None:
               help="If an operation is in progress, do not wait for it to complete",
               flag_value=True,
               default=False)
+@polling_options()
 @output_option()
 @query_option()
 @pass_shared_service_operation_context
@@ -1,7 +1,9 @@
 import logging
 import click
 from tre.commands.operation import operations_list
-from tre.output import output_option, query_option
+from tre.http_cache import max_age_option
+from tre.output import limit_option, output_option, query_option
+from tre.polling import follow_options
 
 from .contexts import SharedServiceContext, pass_shared_service_context
 
@@ -14,8 +16,11 @@ def shared_service_operations():
 @click.command(name="list", help="List shared_service operations")
 @output_option()
 @query_option()
+@limit_option()
+@max_age_option()
+@follow_options()
 @pass_shared_service_context
-def shared_service_operations_list(shared_service_context: SharedServiceContext, output_format, query):
+def shared_service_operations_list(shared_service_context: SharedServiceContext, output_format, query, limit, follow, follow_interval):
     log = logging.getLogger(__name__)
 
     shared_service_id = shared_service_context.shared_service_id
@@ -23,7 +28,7 @@ def shared_service_operations_list(shared_service_context: SharedServiceContext,
         raise click.UsageError('Missing shared_service ID')
 
     operations_url = f'/api/shared-services/{shared_service_id}/operations'
-    operations_list(log, operations_url, output_format, query)
+    operations_list(log, operations_url, output_format, query, limit=limit, follow=follow, follow_interval=follow_interval)
 
 
 shared_service_operations.add_command(shared_service_operations_list)
@@ -3,7 +3,9 @@ import logging
 
 from tre.api_client import ApiClient
 from tre.commands.operation import operation_show
+from tre.http_cache import max_age_option
 from tre.output import output, output_option, query_option
+from tre.polling import polling_options
 from .contexts import pass_shared_service_context, SharedServiceContext
 
 from .operation import shared_service_operation
@@ -20,6 +22,7 @@ def shared_service(ctx: click.Context, shared_service_id: str) -> None:
 @click.command(name="show", help="Show a shared_service")
 @output_option()
 @query_option()
+@max_age_option()
 @pass_shared_service_context
 def shared_service_show(shared_service_context: SharedServiceContext, output_format, query):
     log = logging.getLogger(__name__)
@@ -30,7 +33,7 @@ def shared_service_show(shared_service_context: SharedServiceContext, output_for
 
     client = ApiClient.get_api_client_from_config()
     response = client.call_api(log, 'GET', f'/api/shared-services/{shared_service_id}', )
-    output(response.text, output_format=output_format, query=query, default_table_query=r"sharedServices[].{id:id,name:templateName, version:templateVersion, is_enabled:isEnabled, status: deploymentStatus}")
+    output(response.content, output_format=output_format, query=query, default_table_query=r"sharedServices[].{id:id,name:templateName, version:templateVersion, is_enabled:isEnabled, status: deploymentStatus}")
 
 #
 # TODO - add PATCH (and ?set-enabled)
@@ -44,6 +47,7 @@ def shared_service_show(shared_service_context: SharedServiceContext, output_for
 @click.option('--no-wait',
               flag_value=True,
               default=False)
+@polling_options()
 @output_option()
 @query_option()
 @click.pass_context
@@ -63,7 +67,7 @@ def shared_service_invoke_action(shared_service_context: SharedServiceContext, c
         f'/api/shared-services/{shared_service_id}/invoke-action?action={action_name}'
     )
     if no_wait:
-        output(response.text, output_format=output_format, query=query)
+        output(response.content, output_format=output_format, query=query)
     else:
         operation_url = response.headers['location']
         operation_show(log, operation_url, no_wait=False, output_format=output_format, query=query)
@@ -74,6 +78,7 @@ def shared_service_invoke_action(shared_service_context: SharedServiceContext, c
 @click.option('--no-wait',
               flag_value=True,
               default=False)
+@polling_options()
 @click.pass_context
 @output_option()
 @query_option()
@@ -92,7 +97,7 @@ def shared_service_delete(shared_service_context: SharedServiceContext, ctx: cli
     click.echo("Deleting shared_service...\n", err=True)
     response = client.call_api(log, 'DELETE', f'/api/shared-services/{shared_service_id}')
     if no_wait:
-        output(response.text, output_format=output_format, query=query)
+        output(response.content, output_format=output_format, query=query)
     else:
         operation_url = response.headers['location']
         operation_show(log, operation_url, no_wait=False, output_format=output_format, query=query)
@@ -4,7 +4,9 @@ import logging
 
 from tre.api_client import ApiClient
 from tre.commands.operation import default_operation_table_query_single, operation_show
-from tre.output import output, output_option, query_option
+from tre.http_cache import max_age_option
+from tre.output import limit_option, output, output_option, query_option
+from tre.polling import polling_options
 
 
 @click.group(help="List/add shared_services")
@@ -15,12 +17,14 @@ def shared_services() -> None:
 @click.command(name="list", help="List shared_services")
 @output_option()
 @query_option()
-def shared_services_list(output_format, query):
+@limit_option()
+@max_age_option()
+def shared_services_list(output_format, query, limit):
     log = logging.getLogger(__name__)
 
     client = ApiClient.get_api_client_from_config()
-    response = client.call_api(log, 'GET', '/api/shared-services')
-    output(response.text, output_format=output_format, query=query, default_table_query=r"sharedServices[].{id:id,name:templateName, version:templateVersion, is_enabled:isEnabled, status: deploymentStatus}")
+    with client.stream_api(log, 'GET', '/api/shared-services') as response:
+        output(response.iter_bytes(), output_format=output_format, query=query, default_table_query=r"sharedServices[].{id:id,name:templateName, version:templateVersion, is_enabled:isEnabled, status: deploymentStatus}", limit=limit)
 
 
 @click.command(name="new", help="Create a new shared_service")
@@ -29,6 +33,7 @@ def shared_services_list(output_format, query):
 @click.option('--no-wait',
               flag_value=True,
               default=False)
+@polling_options()
 @output_option()
 @query_option()
 @click.pass_context
@@ -47,7 +52,7 @@ def shared_services_create(ctx, definition, definition_file, no_wait, output_for
     response = client.call_api(log, 'POST', '/api/shared-services', json_data=definition_dict)
 
     if no_wait:
-        output(response.text, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
+        output(response.content, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
     else:
         operation_url = response.headers['location']
         operation_show(log, operation_url, no_wait=False, output_format=output_format, query=query)
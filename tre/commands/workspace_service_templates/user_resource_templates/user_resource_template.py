@@ -1,6 +1,8 @@
 import logging
 import click
 from tre.api_client import ApiClient
+from tre.completion import complete_from_api
+from tre.http_cache import max_age_option
 from tre.output import output, output_option, query_option
 
 from .contexts import UserResourceTemplateContext, pass_user_resource_template_context
@@ -10,11 +12,8 @@ def template_name_completion(ctx, param, incomplete):
     log = logging.getLogger(__name__)
     parent_ctx = ctx.parent
     workspace_service_name = parent_ctx.params["template_name"]
-    client = ApiClient.get_api_client_from_config()
-    response = client.call_api(log, 'GET', f'/api/workspace-service-templates/{workspace_service_name}/user-resource-templates')
-    if response.is_success:
-        names = [template["name"] for template in response.json()["templates"]]
-        return [name for name in names if name.startswith(incomplete)]
+    list_url = f'/api/workspace-service-templates/{workspace_service_name}/user-resource-templates'
+    return complete_from_api(log, list_url, 'templates', incomplete, value_key="name")
 
 
 @click.group(name="user-resource-template", invoke_without_command=True, help="Perform actions on an user-resource-template")
@@ -27,6 +26,7 @@ def user_resource_template(ctx: click.Context, template_name) -> None:
 @click.command(name="show", help="Show template")
 @output_option()
 @query_option()
+@max_age_option()
 @pass_user_resource_template_context
 def user_resource_template_show(user_resource_template_context: UserResourceTemplateContext, output_format, query) -> None:
     log = logging.getLogger(__name__)
@@ -46,7 +46,7 @@ def user_resource_template_show(user_resource_template_context: UserResourceTemp
         f'/api/workspace-service-templates/{workspace_service_name}/user-resource-templates/{template_name}',
     )
 
-    output(response.text, output_format=output_format, query=query, default_table_query=r"{id: id, name:name, title: title, version:version, description:description}")
+    output(response.content, output_format=output_format, query=query, default_table_query=r"{id: id, name:name, title: title, version:version, description:description}")
 
 
 user_resource_template.add_command(user_resource_template_show)
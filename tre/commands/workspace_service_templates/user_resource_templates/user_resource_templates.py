@@ -2,7 +2,8 @@ import logging
 import click
 
 from tre.api_client import ApiClient
-from tre.output import output, output_option, query_option
+from tre.http_cache import max_age_option
+from tre.output import limit_option, output, output_option, query_option
 
 from tre.commands.workspace_service_templates.contexts import pass_workspace_service_template_context, WorkspaceServiceTemplateContext
 
@@ -15,8 +16,10 @@ def user_resource_templates():
 @click.command(name="list", help="List user-resource-templates")
 @output_option()
 @query_option()
+@limit_option()
+@max_age_option()
 @pass_workspace_service_template_context
-def user_resource_templates_list(workspace_service_template_context: WorkspaceServiceTemplateContext, output_format, query):
+def user_resource_templates_list(workspace_service_template_context: WorkspaceServiceTemplateContext, output_format, query, limit):
     log = logging.getLogger(__name__)
 
     client = ApiClient.get_api_client_from_config()
@@ -30,7 +33,7 @@ def user_resource_templates_list(workspace_service_template_context: WorkspaceSe
         'GET',
         f'/api/workspace-service-templates/{template_name}/user-resource-templates',
     )
-    output(response.text, output_format=output_format, query=query, default_table_query=r"templates[].{name:name, title: title, description:description}")
+    output(response.content, output_format=output_format, query=query, default_table_query=r"templates[].{name:name, title: title, description:description}", limit=limit)
 
 
 user_resource_templates.add_command(user_resource_templates_list)
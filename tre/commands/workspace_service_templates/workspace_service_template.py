@@ -1,6 +1,8 @@
 import logging
 import click
 from tre.api_client import ApiClient
+from tre.completion import complete_from_api
+from tre.http_cache import max_age_option
 from tre.output import output, output_option, query_option
 
 from .contexts import WorkspaceServiceTemplateContext, pass_workspace_service_template_context
@@ -11,11 +13,7 @@ from .user_resource_templates.user_resource_template import user_resource_templa
 
 def template_name_completion(ctx, param, incomplete):
     log = logging.getLogger(__name__)
-    client = ApiClient.get_api_client_from_config()
-    response = client.call_api(log, 'GET', '/api/workspace-service-templates')
-    if response.is_success:
-        names = [workspace["name"] for workspace in response.json()["templates"]]
-        return [name for name in names if name.startswith(incomplete)]
+    return complete_from_api(log, '/api/workspace-service-templates', 'templates', incomplete, value_key="name")
 
 
 @click.group(name="workspace-service-template", invoke_without_command=True, help="Perform actions on an workspace-service-template")
@@ -28,6 +26,7 @@ def workspace_service_template(ctx: click.Context, template_name) -> None:
 @click.command(name="show", help="Show template")
 @output_option()
 @query_option()
+@max_age_option()
 @pass_workspace_service_template_context
 def workspace_service_template_show(workspace_service_template_context: WorkspaceServiceTemplateContext, output_format, query) -> None:
     log = logging.getLogger(__name__)
@@ -44,7 +43,7 @@ def workspace_service_template_show(workspace_service_template_context: Workspac
         f'/api/workspace-service-templates/{template_name}',
     )
 
-    output(response.text, output_format=output_format, query=query, default_table_query=r"{id: id, name:name, title: title, version:version, description:description}")
+    output(response.content, output_format=output_format, query=query, default_table_query=r"{id: id, name:name, title: title, version:version, description:description}")
 
 
 workspace_service_template.add_command(workspace_service_template_show)
@@ -2,7 +2,9 @@ import click
 import logging
 
 from tre.api_client import ApiClient
+from tre.completion import complete_from_api
 from tre.commands.workspaces.airlock.contexts import WorkspaceAirlockContext, pass_workspace_airlock_context
+from tre.http_cache import max_age_option
 from tre.output import output, output_option, query_option
 
 _default_table_query_item = r"airlockRequest.{id:id,workspace_id:workspaceId,type:requestType,status:status,business_justification:businessJustification}"
@@ -12,12 +14,8 @@ def airlock_id_completion(ctx: click.Context, param, incomplete):
     log = logging.getLogger(__name__)
     parent_ctx = ctx.parent
     workspace_id = parent_ctx.params["workspace_id"]
-    client = ApiClient.get_api_client_from_config()
-    workspace_scope = client.get_workspace_scope(log, workspace_id)
-    response = client.call_api(log, 'GET', f'/api/workspaces/{workspace_id}/requests', scope_id=workspace_scope)
-    if response.is_success:
-        ids = [workspace["id"] for workspace in response.json()["airlockRequests"]]
-        return [id for id in ids if id.startswith(incomplete)]
+    list_url = f'/api/workspaces/{workspace_id}/requests'
+    return complete_from_api(log, list_url, 'airlockRequests', incomplete, workspace_id=workspace_id)
 
 
 @click.group(invoke_without_command=True, help="Perform actions on an airlock request")
@@ -30,6 +28,7 @@ def airlock(ctx: click.Context, airlock_id: str) -> None:
 @click.command(name="show", help="Show airlock request")
 @output_option()
 @query_option()
+@max_age_option()
 @pass_workspace_airlock_context
 def airlock_show(airlock_context: WorkspaceAirlockContext, output_format, query) -> None:
     log = logging.getLogger(__name__)
@@ -51,7 +50,7 @@ def airlock_show(airlock_context: WorkspaceAirlockContext, output_format, query)
         scope_id=workspace_scope,
     )
 
-    output(response.text, output_format=output_format, query=query, default_table_query=_default_table_query_item)
+    output(response.content, output_format=output_format, query=query, default_table_query=_default_table_query_item)
 
 
 @click.command(name="get-url", help="Get URL to access airlock request")
@@ -78,7 +77,7 @@ def airlock_get_url(airlock_context: WorkspaceAirlockContext, output_format, que
         scope_id=workspace_scope,
     )
 
-    output(response.text, output_format=output_format, query=query, default_table_query=r"{container_url:containerUrl}")
+    output(response.content, output_format=output_format, query=query, default_table_query=r"{container_url:containerUrl}")
 
 
 # TODO table output default
@@ -106,7 +105,7 @@ def airlock_submit(airlock_context: WorkspaceAirlockContext, output_format, quer
         scope_id=workspace_scope,
     )
 
-    output(response.text, output_format=output_format, query=query)
+    output(response.content, output_format=output_format, query=query)
 
 
 # TODO table output default
@@ -140,7 +139,7 @@ def airlock_review(airlock_context: WorkspaceAirlockContext, approve, reason, ou
         scope_id=workspace_scope,
     )
 
-    output(response.text, output_format=output_format, query=query)
+    output(response.content, output_format=output_format, query=query)
 
 
 # TODO cancel
@@ -3,7 +3,8 @@ import logging
 
 from tre.api_client import ApiClient
 from tre.commands.workspaces.contexts import pass_workspace_context
-from tre.output import output, output_option, query_option
+from tre.http_cache import max_age_option
+from tre.output import limit_option, output, output_option, query_option
 
 _default_table_query_list = r"airlockRequests[].{id:id,workspace_id:workspaceId,type:requestType,status:status,business_justification:businessJustification}"
 _default_table_query_item = r"airlockRequest.{id:id,workspace_id:workspaceId,type:requestType,status:status,business_justification:businessJustification}"
@@ -17,8 +18,10 @@ def airlocks() -> None:
 @click.command(name="list", help="List airlocks")
 @output_option()
 @query_option()
+@limit_option()
+@max_age_option()
 @pass_workspace_context
-def airlocks_list(workspace_context, output_format, query):
+def airlocks_list(workspace_context, output_format, query, limit):
     log = logging.getLogger(__name__)
 
     workspace_id = workspace_context.workspace_id
@@ -28,13 +31,13 @@ def airlocks_list(workspace_context, output_format, query):
     client = ApiClient.get_api_client_from_config()
     workspace_scope = client.get_workspace_scope(log, workspace_id)
 
-    response = client.call_api(
+    with client.stream_api(
         log,
         'GET',
         f'/api/workspaces/{workspace_id}/requests',
         scope_id=workspace_scope,
-    )
-    output(response.text, output_format=output_format, query=query, default_table_query=_default_table_query_list)
+    ) as response:
+        output(response.iter_bytes(), output_format=output_format, query=query, default_table_query=_default_table_query_list, limit=limit)
 
 
 @click.command(name="new", help="Create a new airlock request")
@@ -64,8 +67,8 @@ def airlock_create(workspace_context, request_type, justification, output_format
         },
         scope_id=workspace_scope)
 
-    output(response.text, output_format=output_format, query=query, default_table_query=_default_table_query_item)
-    return response.text
+    output(response.content, output_format=output_format, query=query, default_table_query=_default_table_query_item)
+    return response.content
 
 
 airlocks.add_command(airlocks_list)
@@ -2,6 +2,7 @@ import logging
 import click
 from tre.commands.operation import get_operation_id_completion, operation_show
 from tre.output import output_option, query_option
+from tre.polling import polling_options
 
 from .contexts import pass_workspace_operation_context, WorkspaceOperationContext
 
@@ -26,6 +27,7 @@ def workspace_operation(ctx: click.Context, operation_id) -> None:
               help="If an operation is in progress, do not wait for it to complete",
               flag_value=True,
               default=False)
+@polling_options()
 @output_option()
 @query_option()
 @pass_workspace_operation_context
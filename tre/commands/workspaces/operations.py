@@ -1,7 +1,9 @@
 import logging
 import click
 from tre.commands.operation import operations_list
-from tre.output import output_option, query_option
+from tre.http_cache import max_age_option
+from tre.output import limit_option, output_option, query_option
+from tre.polling import follow_options
 
 from .contexts import WorkspaceContext, pass_workspace_context
 
@@ -14,15 +16,18 @@ def workspace_operations():
 @click.command(name="list", help="List workspace operations")
 @output_option()
 @query_option()
+@limit_option()
+@max_age_option()
+@follow_options(recursive=True)
 @pass_workspace_context
-def workspace_operations_list(workspace_context: WorkspaceContext, output_format, query):
+def workspace_operations_list(workspace_context: WorkspaceContext, output_format, query, limit, follow, follow_interval, recursive):
     log = logging.getLogger(__name__)
 
     workspace_id = workspace_context.workspace_id
     if workspace_id is None:
         raise click.UsageError('Missing workspace ID')
     operations_url = f'/api/workspaces/{workspace_id}/operations'
-    operations_list(log, operations_url, output_format, query)
+    operations_list(log, operations_url, output_format, query, limit=limit, follow=follow, recursive=recursive, follow_interval=follow_interval)
 
 
 workspace_operations.add_command(workspace_operations_list)
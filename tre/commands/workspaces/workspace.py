@@ -2,9 +2,13 @@ import json
 import click
 import logging
 
+from tre import json_codec
 from tre.api_client import ApiClient
 from tre.commands.operation import default_operation_table_query_single, operation_show
+from tre.completion import complete_from_api
+from tre.http_cache import max_age_option
 from tre.output import output, output_option, query_option
+from tre.polling import polling_options
 from .contexts import pass_workspace_context, WorkspaceContext
 
 from .operation import workspace_operation
@@ -17,11 +21,7 @@ from .airlock.request import airlock
 
 def workspace_id_completion(ctx, param, incomplete):
     log = logging.getLogger(__name__)
-    client = ApiClient.get_api_client_from_config()
-    response = client.call_api(log, 'GET', '/api/workspaces')
-    if response.is_success:
-        ids = [workspace["id"] for workspace in response.json()["workspaces"]]
-        return [id for id in ids if id.startswith(incomplete)]
+    return complete_from_api(log, '/api/workspaces', 'workspaces', incomplete)
 
 
 @click.group(invoke_without_command=True, help="Perform actions on an individual workspace")
@@ -34,6 +34,7 @@ def workspace(ctx: click.Context, workspace_id: str) -> None:
 @click.command(name="show", help="Show a workspace")
 @output_option()
 @query_option()
+@max_age_option()
 @pass_workspace_context
 def workspace_show(workspace_context: WorkspaceContext, output_format, query):
     log = logging.getLogger(__name__)
@@ -46,11 +47,11 @@ def workspace_show(workspace_context: WorkspaceContext, output_format, query):
     response = client.call_api(log, 'GET', f'/api/workspaces/{workspace_id}', )
 
     output(
-        response.text,
+        response.content,
         output_format=output_format,
         query=query,
         default_table_query=r"workspace.{id:id, display_name:properties.display_name, deployment_status:deploymentStatus, workspace_url:workspaceURL}")
-    return response.text
+    return response.content
 
 
 @click.command(name="update", help="Update a workspace")
@@ -62,6 +63,7 @@ def workspace_show(workspace_context: WorkspaceContext, output_format, query):
 @click.option('--no-wait',
               flag_value=True,
               default=False)
+@polling_options()
 @output_option()
 @query_option()
 @click.pass_context
@@ -89,7 +91,7 @@ def workspace_update(workspace_context: WorkspaceContext, ctx: click.Context, et
         json_data=definition_dict)
 
     if no_wait:
-        output(response.text, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
+        output(response.content, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
     else:
         operation_url = response.headers['location']
         operation_show(log, operation_url, no_wait=False, output_format=output_format, query=query, suppress_output=suppress_output)
@@ -103,6 +105,7 @@ def workspace_update(workspace_context: WorkspaceContext, ctx: click.Context, et
 @click.option('--no-wait',
               flag_value=True,
               default=False)
+@polling_options()
 @output_option()
 @query_option()
 @pass_workspace_context
@@ -124,7 +127,7 @@ def workspace_set_enabled(workspace_context: WorkspaceContext, etag, enable, no_
 
     if no_wait:
         if not suppress_output:
-            output(response.text, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
+            output(response.content, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
     else:
         operation_url = response.headers['location']
         operation_show(log, operation_url, no_wait=False, output_format=output_format, query=query, suppress_output=suppress_output)
@@ -135,6 +138,7 @@ def workspace_set_enabled(workspace_context: WorkspaceContext, etag, enable, no_
 @click.option('--no-wait',
               flag_value=True,
               default=False)
+@polling_options()
 @click.option('--ensure-disabled',
               help="Disable before deleting if not currently enabled",
               flag_value=True,
@@ -157,7 +161,7 @@ def workspace_delete(workspace_context: WorkspaceContext, ctx: click.Context, ye
 
     if ensure_disabled:
         response = client.call_api(log, 'GET', f'/api/workspaces/{workspace_id}')
-        workspace_json = response.json()
+        workspace_json = json_codec.loads(response.content)
         if workspace_json['workspace']['isEnabled']:
             etag = workspace_json['workspace']['_etag']
             ctx.invoke(
@@ -172,7 +176,7 @@ def workspace_delete(workspace_context: WorkspaceContext, ctx: click.Context, ye
     response = client.call_api(log, 'DELETE', f'/api/workspaces/{workspace_id}')
 
     if no_wait:
-        output(response.text, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
+        output(response.content, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
     else:
         operation_url = response.headers['location']
         operation_show(log, operation_url, no_wait, output_format=output_format, query=query)
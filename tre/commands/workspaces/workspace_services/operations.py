@@ -2,7 +2,9 @@ import logging
 import click
 from tre.api_client import ApiClient
 from tre.commands.operation import operations_list
-from tre.output import output_option, query_option
+from tre.http_cache import max_age_option
+from tre.output import limit_option, output_option, query_option
+from tre.polling import follow_options
 
 from .contexts import WorkspaceServiceContext, pass_workspace_service_context
 
@@ -15,8 +17,11 @@ def workspace_service_operations():
 @click.command(name="list", help="List workspace service operations")
 @output_option()
 @query_option()
+@limit_option()
+@max_age_option()
+@follow_options(recursive=True)
 @pass_workspace_service_context
-def workspace_service_operations_list(workspace_service_context: WorkspaceServiceContext, output_format, query):
+def workspace_service_operations_list(workspace_service_context: WorkspaceServiceContext, output_format, query, limit, follow, follow_interval, recursive):
     log = logging.getLogger(__name__)
 
     workspace_id = workspace_service_context.workspace_id
@@ -28,7 +33,7 @@ def workspace_service_operations_list(workspace_service_context: WorkspaceServic
     operations_url = f'/api/workspaces/{workspace_id}/workspace-services/{workspace_service_id}/operations'
     client = ApiClient.get_api_client_from_config()
     workspace_scope = client.get_workspace_scope(log, workspace_id)
-    operations_list(log, operations_url, output_format, query, scope_id=workspace_scope)
+    operations_list(log, operations_url, output_format, query, scope_id=workspace_scope, limit=limit, follow=follow, recursive=recursive, follow_interval=follow_interval)
 
 
 workspace_service_operations.add_command(workspace_service_operations_list)
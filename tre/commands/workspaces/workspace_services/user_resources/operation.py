@@ -3,6 +3,7 @@ import click
 from tre.commands.operation import get_operation_id_completion, operation_show
 from tre.output import output_option, query_option
 from tre.api_client import ApiClient
+from tre.polling import polling_options
 
 from .contexts import pass_user_resource_operation_context, UserResourceOperationContext
 
@@ -10,15 +11,13 @@ from .contexts import pass_user_resource_operation_context, UserResourceOperatio
 def operation_id_completion(ctx, param, incomplete):
     log = logging.getLogger(__name__)
     parent_ctx = ctx.parent
-    workspace_service_id = parent_ctx.params["workspace_service_id"]
+    user_resource_id = parent_ctx.params["user_resource_id"]
     parent2_ctx = parent_ctx.parent
-    workspace_id = parent2_ctx.params["workspace_id"]
-    list_url = f'/api/workspaces/{workspace_id}/workspace-services/{workspace_service_id}/operations'
-
-    client = ApiClient.get_api_client_from_config()
-    workspace_scope = client.get_workspace_scope(log, workspace_id)
-
-    return get_operation_id_completion(ctx, log, list_url, param, incomplete, scope_id=workspace_scope)
+    workspace_service_id = parent2_ctx.params["workspace_service_id"]
+    parent3_ctx = parent2_ctx.parent
+    workspace_id = parent3_ctx.params["workspace_id"]
+    list_url = f'/api/workspaces/{workspace_id}/workspace-services/{workspace_service_id}/user-resources/{user_resource_id}/operations'
+    return get_operation_id_completion(ctx, log, list_url, param, incomplete, workspace_id=workspace_id)
 
 
 @click.group(name="operation", invoke_without_command=True, help="Perform actions on an operation")
@@ -33,6 +32,7 @@ def user_resource_operation(ctx: click.Context, operation_id) -> None:
               help="If an operation is in progress, do not wait for it to complete",
               flag_value=True,
               default=False)
+@polling_options()
 @output_option()
 @query_option()
 @pass_user_resource_operation_context
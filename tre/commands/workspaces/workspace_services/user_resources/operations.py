@@ -2,7 +2,9 @@ import logging
 import click
 from tre.api_client import ApiClient
 from tre.commands.operation import operations_list
-from tre.output import output_option, query_option
+from tre.http_cache import max_age_option
+from tre.output import limit_option, output_option, query_option
+from tre.polling import follow_options
 
 from .contexts import UserResourceContext, pass_user_resource_operation_context
 
@@ -15,8 +17,11 @@ def user_resource_operations():
 @click.command(name="list", help="List user resource operations")
 @output_option()
 @query_option()
+@limit_option()
+@max_age_option()
+@follow_options()
 @pass_user_resource_operation_context
-def user_resource_operations_list(user_resource_operation_context: UserResourceContext, output_format, query):
+def user_resource_operations_list(user_resource_operation_context: UserResourceContext, output_format, query, limit, follow, follow_interval):
     log = logging.getLogger(__name__)
 
     workspace_id = user_resource_operation_context.workspace_id
@@ -31,7 +36,7 @@ def user_resource_operations_list(user_resource_operation_context: UserResourceC
     operations_url = f'/api/workspaces/{workspace_id}/workspace-services/{workspace_service_id}/user-resources/{user_resource_id}/operations'
     client = ApiClient.get_api_client_from_config()
     workspace_scope = client.get_workspace_scope(log, workspace_id)
-    operations_list(log, operations_url, output_format, query, scope_id=workspace_scope)
+    operations_list(log, operations_url, output_format, query, scope_id=workspace_scope, limit=limit, follow=follow, follow_interval=follow_interval)
 
 
 user_resource_operations.add_command(user_resource_operations_list)
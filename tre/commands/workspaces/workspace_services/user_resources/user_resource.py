@@ -1,6 +1,8 @@
 import logging
 import click
 from tre.api_client import ApiClient
+from tre.completion import complete_from_api
+from tre.http_cache import max_age_option
 from tre.output import output, output_option, query_option
 
 from .contexts import UserResourceContext, pass_user_resource_context
@@ -14,13 +16,8 @@ def user_resource_id_completion(ctx: click.Context, param, incomplete):
     workspace_service_id = parent_ctx.params["workspace_service_id"]
     parent2_ctx = parent_ctx.parent
     workspace_id = parent2_ctx.params["workspace_id"]
-
-    client = ApiClient.get_api_client_from_config()
-    workspace_scope = client.get_workspace_scope(log, workspace_id)
-    response = client.call_api(log, 'GET', f'/api/workspaces/{workspace_id}/workspace-services/{workspace_service_id}/user-resources', scope_id=workspace_scope)
-    if response.is_success:
-        ids = [resource["id"] for resource in response.json()["userResources"]]
-        return [id for id in ids if id.startswith(incomplete)]
+    list_url = f'/api/workspaces/{workspace_id}/workspace-services/{workspace_service_id}/user-resources'
+    return complete_from_api(log, list_url, 'userResources', incomplete, workspace_id=workspace_id)
 
 
 @click.group(name="user-resource", invoke_without_command=True, help="Perform actions on a user resource")
@@ -33,6 +30,7 @@ def user_resource(ctx: click.Context, user_resource_id) -> None:
 @click.command(name="show", help="Show user resource")
 @output_option()
 @query_option()
+@max_age_option()
 @pass_user_resource_context
 def user_resource_show(user_resource_context: UserResourceContext, output_format, query) -> None:
     log = logging.getLogger(__name__)
@@ -58,7 +56,7 @@ def user_resource_show(user_resource_context: UserResourceContext, output_format
     )
 
     # TODO table query
-    output(response.text, output_format=output_format, query=query, default_table_query=r"userResource")
+    output(response.content, output_format=output_format, query=query, default_table_query=r"userResource")
 
 
 user_resource.add_command(user_resource_show)
@@ -5,7 +5,9 @@ import click
 from tre.api_client import ApiClient
 from tre.commands.operation import operation_show
 from tre.commands.workspaces.workspace_services.contexts import WorkspaceServiceContext, pass_workspace_service_context
-from tre.output import output, output_option, query_option
+from tre.http_cache import max_age_option
+from tre.output import limit_option, output, output_option, query_option
+from tre.polling import polling_options
 
 
 @click.group(name="user-resources", help="List/add user user resources ")
@@ -16,8 +18,10 @@ def user_resources():
 @click.command(name="list", help="List user resources")
 @output_option()
 @query_option()
+@limit_option()
+@max_age_option()
 @pass_workspace_service_context
-def user_resources_list(workspace_service_context: WorkspaceServiceContext, output_format, query):
+def user_resources_list(workspace_service_context: WorkspaceServiceContext, output_format, query, limit):
     log = logging.getLogger(__name__)
 
     workspace_id = workspace_service_context.workspace_id
@@ -31,14 +35,14 @@ def user_resources_list(workspace_service_context: WorkspaceServiceContext, outp
 
     workspace_scope = client.get_workspace_scope(log, workspace_id)
 
-    response = client.call_api(
+    with client.stream_api(
         log,
         'GET',
         f'/api/workspaces/{workspace_id}/workspace-services/{workspace_service_id}/user-resources',
         scope_id=workspace_scope,
-    )
-    # TODO table query
-    output(response.text, output_format=output_format, query=query, default_table_query=r"userResources[]")
+    ) as response:
+        # TODO table query
+        output(response.iter_bytes(), output_format=output_format, query=query, default_table_query=r"userResources[]", limit=limit)
 
 
 @click.command(name="new", help="Create a new user resource")
@@ -47,6 +51,7 @@ def user_resources_list(workspace_service_context: WorkspaceServiceContext, outp
 @click.option('--no-wait',
               flag_value=True,
               default=False)
+@polling_options()
 @output_option()
 @query_option()
 @pass_workspace_service_context
@@ -79,8 +84,8 @@ def user_resouce_create(workspace_service_context: WorkspaceServiceContext, defi
     )
 
     if no_wait:
-        output(response.text, output_format=output_format, query=query)
-        return response.text
+        output(response.content, output_format=output_format, query=query)
+        return response.content
     else:
         operation_url = response.headers['location']
         operation_show(log, operation_url, no_wait=False, output_format=output_format, query=query, scope_id=workspace_scope)
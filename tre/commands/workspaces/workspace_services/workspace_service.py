@@ -3,7 +3,10 @@ import logging
 import click
 from tre.api_client import ApiClient
 from tre.commands.operation import default_operation_table_query_single, operation_show
+from tre.completion import complete_from_api
+from tre.http_cache import max_age_option
 from tre.output import output, output_option, query_option
+from tre.polling import polling_options
 
 from .contexts import WorkspaceServiceContext, pass_workspace_service_context
 from .operation import workspace_service_operation
@@ -16,12 +19,8 @@ def workspace_service_id_completion(ctx: click.Context, param, incomplete):
     log = logging.getLogger(__name__)
     parent_ctx = ctx.parent
     workspace_id = parent_ctx.params["workspace_id"]
-    client = ApiClient.get_api_client_from_config()
-    workspace_scope = client.get_workspace_scope(log, workspace_id)
-    response = client.call_api(log, 'GET', f'/api/workspaces/{workspace_id}/workspace-services', scope_id=workspace_scope)
-    if response.is_success:
-        ids = [workspace["id"] for workspace in response.json()["workspaceServices"]]
-        return [id for id in ids if id.startswith(incomplete)]
+    list_url = f'/api/workspaces/{workspace_id}/workspace-services'
+    return complete_from_api(log, list_url, 'workspaceServices', incomplete, workspace_id=workspace_id)
 
 
 @click.group(name="workspace-service", invoke_without_command=True, help="Perform actions on an workspace-service")
@@ -34,6 +33,7 @@ def workspace_service(ctx: click.Context, workspace_service_id) -> None:
 @click.command(name="show", help="Workspace service")
 @output_option()
 @query_option()
+@max_age_option()
 @pass_workspace_service_context
 def workspace_service_show(workspace_service_context: WorkspaceServiceContext, output_format, query) -> None:
     log = logging.getLogger(__name__)
@@ -55,7 +55,7 @@ def workspace_service_show(workspace_service_context: WorkspaceServiceContext, o
         scope_id=workspace_scope,
     )
 
-    output(response.text, output_format=output_format, query=query, default_table_query=r"workspaceService.{id:id,template_name:templateName,template_version:templateVersion,sdeployment_status:deploymentStatus}")
+    output(response.content, output_format=output_format, query=query, default_table_query=r"workspaceService.{id:id,template_name:templateName,template_version:templateVersion,sdeployment_status:deploymentStatus}")
 
 
 @click.command(name="update", help="Update a workspace service")
@@ -67,6 +67,7 @@ def workspace_service_show(workspace_service_context: WorkspaceServiceContext, o
 @click.option('--no-wait',
               flag_value=True,
               default=False)
+@polling_options()
 @output_option()
 @query_option()
 @pass_workspace_service_context
@@ -98,7 +99,7 @@ def workspace_service_update(workspace_service_context: WorkspaceServiceContext,
         scope_id=workspace_scope)
 
     if no_wait:
-        output(response.text, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
+        output(response.content, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
     else:
         operation_url = response.headers['location']
         operation_show(
@@ -119,6 +120,7 @@ def workspace_service_update(workspace_service_context: WorkspaceServiceContext,
 @click.option('--no-wait',
               flag_value=True,
               default=False)
+@polling_options()
 @output_option()
 @query_option()
 @pass_workspace_service_context
@@ -145,7 +147,7 @@ def workspace_service_set_enabled(workspace_service_context: WorkspaceServiceCon
 
     if no_wait:
         if not suppress_output:
-            output(response.text, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
+            output(response.content, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
     else:
         operation_url = response.headers['location']
         operation_show(
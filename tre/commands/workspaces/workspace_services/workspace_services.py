@@ -5,7 +5,9 @@ import click
 from tre.api_client import ApiClient
 from tre.commands.operation import operation_show
 from tre.commands.workspaces.contexts import WorkspaceContext, pass_workspace_context
-from tre.output import output, output_option, query_option
+from tre.http_cache import max_age_option
+from tre.output import limit_option, output, output_option, query_option
+from tre.polling import polling_options
 
 
 @click.group(name="workspace-services", help="List/add workspace-services ")
@@ -16,8 +18,10 @@ def workspace_services():
 @click.command(name="list", help="List workspace services")
 @output_option()
 @query_option()
+@limit_option()
+@max_age_option()
 @pass_workspace_context
-def workspace_services_list(workspace_context, output_format, query):
+def workspace_services_list(workspace_context, output_format, query, limit):
     log = logging.getLogger(__name__)
 
     workspace_id = workspace_context.workspace_id
@@ -28,13 +32,13 @@ def workspace_services_list(workspace_context, output_format, query):
 
     workspace_scope = client.get_workspace_scope(log, workspace_id)
 
-    response = client.call_api(
+    with client.stream_api(
         log,
         'GET',
         f'/api/workspaces/{workspace_id}/workspace-services',
         scope_id=workspace_scope,
-    )
-    output(response.text, output_format=output_format, query=query, default_table_query=r"workspaceServices[].{id:id,template_name:templateName,template_version:templateVersion,sdeployment_status:deploymentStatus}")
+    ) as response:
+        output(response.iter_bytes(), output_format=output_format, query=query, default_table_query=r"workspaceServices[].{id:id,template_name:templateName,template_version:templateVersion,sdeployment_status:deploymentStatus}", limit=limit)
 
 
 @click.command(name="new", help="Create a new workspace-service")
@@ -43,6 +47,7 @@ def workspace_services_list(workspace_context, output_format, query):
 @click.option('--no-wait',
               flag_value=True,
               default=False)
+@polling_options()
 @output_option()
 @query_option()
 @pass_workspace_context
@@ -72,8 +77,8 @@ def workspace_services_create(workspace_context: WorkspaceContext, definition, d
     )
 
     if no_wait:
-        output(response.text, output_format=output_format, query=query)
-        return response.text
+        output(response.content, output_format=output_format, query=query)
+        return response.content
     else:
         operation_url = response.headers['location']
         operation_show(log, operation_url, no_wait=False, output_format=output_format, query=query, scope_id=workspace_scope)
@@ -1,10 +1,24 @@
+import asyncio
 import click
 import json
 import logging
+import typing as t
 
+from logging import Logger
+
+from tre import json_codec
 from tre.api_client import ApiClient
+from tre.async_api_client import AsyncApiClient
 from tre.commands.operation import default_operation_table_query_single, operation_show
-from tre.output import output, output_option, query_option
+from tre.estate import EstateCrawler, Resource
+from tre.fanout import fan_out, fan_out_as_completed
+from tre.http_cache import max_age_option
+from tre.output import limit_option, output, output_option, query_option
+from tre.polling import polling_options
+
+_default_table_query_list = r"workspaces[].{id:id, display_name:properties.display_name, deployment_status:deploymentStatus, workspace_url:workspaceURL}"
+
+_EXPAND_VALUES = ["services", "user-resources", "airlock"]
 
 
 @click.group(help="List/add workspaces")
@@ -12,20 +26,109 @@ def workspaces() -> None:
     pass
 
 
+def _parse_expand(ctx: click.Context, param: click.Parameter, value: t.Optional[str]) -> "set[str]":
+    if value is None:
+        return set()
+    expand = set(item.strip() for item in value.split(",") if item.strip() != "")
+    invalid = expand - set(_EXPAND_VALUES)
+    if len(invalid) > 0:
+        raise click.BadParameter(f"Unexpected value(s): {', '.join(sorted(invalid))} (expected a comma-separated list of {', '.join(_EXPAND_VALUES)})")
+    if "user-resources" in expand:
+        # user resources are nested under their workspace services
+        expand.add("services")
+    return expand
+
+
+async def _expand_workspace(crawler: EstateCrawler, workspace: Resource, expand: "set[str]") -> dict:
+    """Get the workspace with its workspace services (and their user resources) and/or airlock requests nested under it"""
+    workspace_json = dict(workspace.resource)
+
+    async def add_workspace_services():
+        workspace_services = await crawler.get_workspace_services(workspace)
+        workspace_services_json = [dict(workspace_service.resource) for workspace_service in workspace_services]
+        if "user-resources" in expand:
+            user_resources = await fan_out(crawler.get_user_resources, workspace_services)
+            for workspace_service_json, workspace_service_user_resources in zip(workspace_services_json, user_resources):
+                workspace_service_json["userResources"] = [user_resource.resource for user_resource in workspace_service_user_resources]
+        workspace_json["workspaceServices"] = workspace_services_json
+
+    async def add_airlock_requests():
+        workspace_json["airlockRequests"] = await crawler.get_airlock_requests(workspace)
+
+    await asyncio.gather(
+        add_workspace_services() if "services" in expand else asyncio.sleep(0),
+        add_airlock_requests() if "airlock" in expand else asyncio.sleep(0),
+    )
+    return workspace_json
+
+
+def _iter_expanded_content(log: Logger, api_client: ApiClient, expand: "set[str]") -> t.Iterator[bytes]:
+    """Yield the content of a workspaces list response with the children of each workspace nested under it.
+
+    The workspaces are expanded concurrently and each is yielded as soon as its children have been
+    retrieved, so the workspaces are in the order that they complete rather than the API order.
+    Errors getting the workspaces list are raised before any content is yielded.
+    """
+    loop = asyncio.new_event_loop()
+    client = AsyncApiClient(api_client)
+    expanded = None
+    try:
+        crawler = EstateCrawler(log, client)
+        workspaces = loop.run_until_complete(crawler.get_workspaces())
+
+        async def expand_workspace(workspace: Resource) -> dict:
+            return await _expand_workspace(crawler, workspace, expand)
+
+        expanded = fan_out_as_completed(expand_workspace, workspaces).__aiter__()
+        yield b'{"workspaces": ['
+        separator = b""
+        while True:
+            try:
+                _, workspace_json = loop.run_until_complete(expanded.__anext__())
+            except StopAsyncIteration:
+                break
+            # formatted as for json_codec.dumps of the whole document
+            yield separator + json_codec.dumps(workspace_json).encode("utf-8")
+            separator = b", "
+        yield b"]}"
+    finally:
+        if expanded is not None:
+            # cancel any outstanding calls (e.g. if the output was limited)
+            loop.run_until_complete(expanded.aclose())
+        loop.run_until_complete(client.close())
+        loop.close()
+
+
 @click.command(name="list", help="List workspaces")
+@click.option('--expand',
+              help="Include the children of each workspace: a comma-separated list of services, user-resources and/or airlock. "
+              "The children are retrieved concurrently and each workspace is output as soon as its children have been retrieved.",
+              callback=_parse_expand,
+              required=False)
 @output_option()
 @query_option()
-def workspaces_list(output_format, query):
+@limit_option()
+@max_age_option()
+def workspaces_list(expand, output_format, query, limit):
     log = logging.getLogger(__name__)
 
     client = ApiClient.get_api_client_from_config()
-    response = client.call_api(log, 'GET', '/api/workspaces')
-    output(
-        response.text,
-        output_format=output_format,
-        query=query,
-        default_table_query=r"workspaces[].{id:id, display_name:properties.display_name, deployment_status:deploymentStatus, workspace_url:workspaceURL}")
-    return response.text
+    if len(expand) > 0:
+        output(
+            _iter_expanded_content(log, client, expand),
+            output_format=output_format,
+            query=query,
+            default_table_query=_default_table_query_list,
+            limit=limit)
+        return
+
+    with client.stream_api(log, 'GET', '/api/workspaces') as response:
+        output(
+            response.iter_bytes(),
+            output_format=output_format,
+            query=query,
+            default_table_query=_default_table_query_list,
+            limit=limit)
 
 
 @click.command(name="new", help="Create a new workspace")
@@ -34,6 +137,7 @@ def workspaces_list(output_format, query):
 @click.option('--no-wait',
               flag_value=True,
               default=False)
+@polling_options()
 @output_option()
 @query_option()
 @click.pass_context
@@ -52,8 +156,8 @@ def workspaces_create(ctx, definition, definition_file, no_wait, output_format,
     response = client.call_api(log, 'POST', '/api/workspaces', json_data=definition_dict)
 
     if no_wait:
-        output(response.text, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
-        return response.text
+        output(response.content, output_format=output_format, query=query, default_table_query=default_operation_table_query_single())
+        return response.content
     else:
         operation_url = response.headers['location']
         operation_show(log, operation_url, no_wait=False, output_format=output_format, query=query)
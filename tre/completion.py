@@ -0,0 +1,167 @@
+"""Shell completion helpers that serve candidates from a local cache.
+
+Candidates are cached per list URL (i.e. per parent resource) in ~/.config/tre/completion_cache.
+Cached candidates are returned immediately and, when older than TRECLI_COMPLETION_CACHE_TTL
+seconds, refreshed by a detached background process (stale-while-revalidate).
+When nothing is cached, the API is called but completion waits at most
+TRECLI_COMPLETION_BUDGET_MS milliseconds for the result.
+"""
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import typing as t
+
+from tre import json_codec
+from tre.api_client import ApiClient
+from tre.cache import get_config_dir, read_json_file, write_json_file_atomic
+
+
+def get_completion_cache_ttl() -> float:
+    return float(os.getenv("TRECLI_COMPLETION_CACHE_TTL", "60"))
+
+
+def get_completion_budget() -> float:
+    """The maximum time (in seconds) to wait for the API when there are no cached candidates."""
+    return float(os.getenv("TRECLI_COMPLETION_BUDGET_MS", "150")) / 1000
+
+
+class CompletionCache:
+    def __init__(self, base_url: str, list_url: str):
+        cache_key = hashlib.sha256(f"{base_url}|{list_url}".encode("utf-8")).hexdigest()
+        cache_dir = get_config_dir() / "completion_cache"
+        cache_dir.mkdir(mode=0o700, exist_ok=True)
+        self._cache_file = cache_dir / f"{cache_key}.json"
+        self._refresh_marker_file = cache_dir / f"{cache_key}.refreshing"
+
+    def read(self) -> t.Optional[dict]:
+        return read_json_file(self._cache_file)
+
+    def write(self, values: "list[str]") -> None:
+        write_json_file_atomic(self._cache_file, {"values": values, "fetched_at": time.time()})
+
+    def is_stale(self, entry: dict) -> bool:
+        return entry["fetched_at"] + get_completion_cache_ttl() < time.time()
+
+    def try_start_refresh(self) -> bool:
+        """Mark a background refresh as in progress, returning False if one is already running."""
+        try:
+            if self._refresh_marker_file.stat().st_mtime + 30 > time.time():
+                return False
+        except OSError:
+            pass
+        self._refresh_marker_file.touch()
+        return True
+
+    def end_refresh(self) -> None:
+        try:
+            self._refresh_marker_file.unlink()
+        except OSError:
+            pass
+
+    @staticmethod
+    def clear() -> None:
+        cache_dir = get_config_dir() / "completion_cache"
+        if cache_dir.exists():
+            for cache_file in cache_dir.iterdir():
+                cache_file.unlink()
+
+
+def _fetch_values(log, client: ApiClient, list_url: str, list_key: str, value_key: str, workspace_id: t.Optional[str]) -> t.Optional["list[str]"]:
+    scope_id = client.get_workspace_scope(log, workspace_id) if workspace_id else None
+    response = client.call_api(log, 'GET', list_url, scope_id=scope_id, throw_on_error=False)
+    if not response.is_success:
+        return None
+    return [item[value_key] for item in json_codec.loads(response.content)[list_key]]
+
+
+def _refresh(log, client: ApiClient, cache: CompletionCache, list_url: str, list_key: str, value_key: str, workspace_id: t.Optional[str]) -> t.Optional["list[str]"]:
+    values = _fetch_values(log, client, list_url, list_key, value_key, workspace_id)
+    if values is not None:
+        cache.write(values)
+    return values
+
+
+def _start_background_refresh(cache: CompletionCache, list_url: str, list_key: str, value_key: str, workspace_id: t.Optional[str]) -> None:
+    if not cache.try_start_refresh():
+        return
+    args = json.dumps({"list_url": list_url, "list_key": list_key, "value_key": value_key, "workspace_id": workspace_id})
+    popen_kwargs = {}
+    if os.name == "nt":
+        popen_kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        popen_kwargs["start_new_session"] = True
+    try:
+        subprocess.Popen(
+            [sys.executable, "-m", "tre.completion", args],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **popen_kwargs)
+    except OSError:
+        cache.end_refresh()
+
+
+def _fetch_with_deadline(log, client: ApiClient, cache: CompletionCache, list_url: str, list_key: str, value_key: str, workspace_id: t.Optional[str]) -> t.Optional["list[str]"]:
+    result = {}
+
+    def fetch():
+        try:
+            result["values"] = _refresh(log, client, cache, list_url, list_key, value_key, workspace_id)
+        except Exception as e:
+            log.debug(f"Failed to fetch completion candidates: {e}")
+
+    thread = threading.Thread(target=fetch, daemon=True)
+    thread.start()
+    thread.join(get_completion_budget())
+    if thread.is_alive():
+        # The fetch will be abandoned when the process exits, so complete it in the background
+        # to have the candidates available for the next completion request
+        _start_background_refresh(cache, list_url, list_key, value_key, workspace_id)
+        return None
+    return result.get("values")
+
+
+def complete_from_api(log, list_url: str, list_key: str, incomplete: str, value_key: str = "id", workspace_id: str = None) -> "list[str]":
+    """Get completion candidates from the `value_key` property of the items in the `list_key` array returned by list_url.
+
+    If workspace_id is specified, the API is called using the workspace scope.
+    """
+    try:
+        client = ApiClient.get_api_client_from_config()
+    except Exception:
+        return []
+    if workspace_id is not None:
+        workspace_id = str(workspace_id)
+
+    cache = CompletionCache(client.base_url, list_url)
+    entry = cache.read()
+    if entry is not None:
+        if cache.is_stale(entry):
+            _start_background_refresh(cache, list_url, list_key, value_key, workspace_id)
+        values = entry["values"]
+    else:
+        values = _fetch_with_deadline(log, client, cache, list_url, list_key, value_key, workspace_id) or []
+
+    return [value for value in values if value.startswith(incomplete)]
+
+
+def _main(args_json: str) -> None:
+    log = logging.getLogger(__name__)
+    args = json.loads(args_json)
+    client = ApiClient.get_api_client_from_config()
+    cache = CompletionCache(client.base_url, args["list_url"])
+    try:
+        _refresh(log, client, cache, args["list_url"], args["list_key"], args["value_key"], args["workspace_id"])
+    finally:
+        cache.end_refresh()
+        client.close()
+
+
+if __name__ == "__main__":
+    # Invoked as a detached process to refresh the cached candidates for a list URL
+    _main(sys.argv[1])
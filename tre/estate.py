@@ -0,0 +1,190 @@
+"""Concurrent enumeration of the resources in a TRE: workspaces, workspace services, user resources and shared services.
+
+    async with AsyncApiClient(ApiClient.get_api_client_from_config()) as client:
+        crawler = EstateCrawler(log, client)
+        async for resource, operations in crawler.iter_operations(await crawler.get_resources()):
+            ...
+
+Calls for workspace services and user resources use the workspace scope. The number of calls in
+flight is limited to TRECLI_MAX_CONCURRENCY. A crawler created with conditional=True can be used
+to repeatedly re-crawl resources: responses are revalidated with If-None-Match/If-Modified-Since
+so that lists that haven't changed are not transferred again.
+"""
+import asyncio
+import click
+import typing as t
+
+from logging import Logger
+
+from tre import json_codec
+from tre.api_client import ApiException
+from tre.async_api_client import AsyncApiClient
+from tre.fanout import fan_out, fan_out_as_completed, get_max_concurrency
+
+WORKSPACE = "workspace"
+WORKSPACE_SERVICE = "workspace-service"
+USER_RESOURCE = "user-resource"
+SHARED_SERVICE = "shared-service"
+
+
+class Resource:
+    """A resource in the TRE, identified by its path (e.g. /workspaces/<id>/workspace-services/<id>)"""
+
+    def __init__(self, kind: str, resource_path: str, resource: dict, workspace_id: str = None):
+        self.kind = kind
+        self.resource_path = resource_path
+        self.resource = resource
+        # The workspace for workspace services and user resources, whose API calls need the workspace scope
+        self.workspace_id = workspace_id
+
+    @property
+    def id(self) -> str:
+        return self.resource["id"]
+
+    @property
+    def url(self) -> str:
+        return f"/api{self.resource_path}"
+
+    @staticmethod
+    def from_path(resource_path: str) -> "Resource":
+        """Create a Resource (without its details) from its path"""
+        parts = resource_path.strip("/").split("/")
+        kinds = {
+            ("workspaces",): WORKSPACE,
+            ("workspaces", "workspace-services"): WORKSPACE_SERVICE,
+            ("workspaces", "workspace-services", "user-resources"): USER_RESOURCE,
+            ("shared-services",): SHARED_SERVICE,
+        }
+        kind = kinds.get(tuple(parts[0::2])) if len(parts) % 2 == 0 else None
+        if kind is None:
+            raise ValueError(f"Unexpected resource path: {resource_path}")
+        workspace_id = parts[1] if kind in [WORKSPACE_SERVICE, USER_RESOURCE] else None
+        return Resource(kind, "/" + "/".join(parts), {"id": parts[-1]}, workspace_id)
+
+
+class EstateCrawler:
+
+    def __init__(self, log: Logger, client: AsyncApiClient, max_concurrency: int = None, conditional: bool = False):
+        self._log = log
+        self._client = client
+        self._max_concurrency = max_concurrency or get_max_concurrency()
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        # url -> (validator headers, parsed content) for the last response when using conditional requests
+        self._responses: "t.Optional[dict[str, tuple[dict[str, str], dict]]]" = {} if conditional else None
+        # Errors for resources that couldn't be enumerated (e.g. workspaces the user doesn't have access to)
+        self.errors: "list[tuple[str, str]]" = []
+
+    async def _get_scope_id(self, workspace_id: t.Optional[str]) -> t.Optional[str]:
+        if workspace_id is None:
+            return None
+        return await self._client.get_workspace_scope(self._log, workspace_id)
+
+    async def get_json(self, url: str, workspace_id: str = None) -> dict:
+        """GET url (using the workspace scope if workspace_id is specified)"""
+        scope_id = await self._get_scope_id(workspace_id)
+        previous = self._responses.get(url) if self._responses is not None else None
+        headers = {}
+        if previous is not None:
+            validators = previous[0]
+            if "etag" in validators:
+                headers["If-None-Match"] = validators["etag"]
+            if "last-modified" in validators:
+                headers["If-Modified-Since"] = validators["last-modified"]
+        async with self._semaphore:
+            response = await self._client.call_api(self._log, "GET", url, headers=headers, scope_id=scope_id)
+        if response.status_code == 304 and previous is not None:
+            return previous[1]
+        content = json_codec.loads(response.content)
+        if self._responses is not None:
+            validators = {name: response.headers[name] for name in ["etag", "last-modified"] if name in response.headers}
+            self._responses[url] = (validators, content)
+        return content
+
+    async def _try_get_list(self, url: str, key: str, workspace_id: str = None) -> "list[dict]":
+        """Get a list of child items, recording (rather than raising) errors so that the rest of the crawl can continue"""
+        try:
+            return (await self.get_json(url, workspace_id)).get(key, [])
+        except ApiException as e:
+            self._log.debug(f"Failed to get {url}: {e.message}")
+            self.errors.append((url, e.message))
+            click.echo(f"Skipping {url}: {e.message}", err=True)
+            return []
+
+    async def get_workspaces(self) -> "list[Resource]":
+        # Errors for the root lists are raised, as there's nothing to crawl without them
+        workspaces = (await self.get_json("/api/workspaces")).get("workspaces", [])
+        # The list includes the scope for each workspace, so there's no need to look them up individually
+        await self._client.set_cached_workspace_scopes({
+            workspace["id"]: workspace["properties"]["scope_id"]
+            for workspace in workspaces
+            if (workspace.get("properties") or {}).get("scope_id")
+        })
+        return [Resource(WORKSPACE, f"/workspaces/{workspace['id']}", workspace) for workspace in workspaces]
+
+    async def get_shared_services(self) -> "list[Resource]":
+        shared_services = (await self.get_json("/api/shared-services")).get("sharedServices", [])
+        return [Resource(SHARED_SERVICE, f"/shared-services/{shared_service['id']}", shared_service) for shared_service in shared_services]
+
+    async def get_workspace_services(self, workspace: Resource) -> "list[Resource]":
+        workspace_services = await self._try_get_list(f"{workspace.url}/workspace-services", "workspaceServices", workspace.id)
+        return [
+            Resource(WORKSPACE_SERVICE, f"{workspace.resource_path}/workspace-services/{workspace_service['id']}", workspace_service, workspace.id)
+            for workspace_service in workspace_services
+        ]
+
+    async def get_user_resources(self, workspace_service: Resource) -> "list[Resource]":
+        user_resources = await self._try_get_list(f"{workspace_service.url}/user-resources", "userResources", workspace_service.workspace_id)
+        return [
+            Resource(USER_RESOURCE, f"{workspace_service.resource_path}/user-resources/{user_resource['id']}", user_resource, workspace_service.workspace_id)
+            for user_resource in user_resources
+        ]
+
+    async def get_airlock_requests(self, workspace: Resource) -> "list[dict]":
+        return await self._try_get_list(f"{workspace.url}/requests", "airlockRequests", workspace.id)
+
+    async def get_workspace_children(self, workspace: Resource) -> "list[Resource]":
+        """Get the workspace services and user resources for a workspace"""
+        workspace_services = await self.get_workspace_services(workspace)
+        user_resources = await fan_out(self.get_user_resources, workspace_services, self._max_concurrency)
+        children = []
+        for workspace_service, workspace_service_user_resources in zip(workspace_services, user_resources):
+            children.append(workspace_service)
+            children += workspace_service_user_resources
+        return children
+
+    async def get_resources(
+        self,
+        workspace_ids: t.Optional[t.Iterable[str]] = None,
+        include_workspace_children: bool = True,
+        include_shared_services: bool = True,
+    ) -> "list[Resource]":
+        """Get the resources in the TRE, optionally limited to the given workspaces (and their children)"""
+        if workspace_ids is not None:
+            workspace_ids = set(str(workspace_id) for workspace_id in workspace_ids)
+
+        get_shared_services = self.get_shared_services() if include_shared_services and workspace_ids is None else _empty_list()
+        workspaces, shared_services = await asyncio.gather(self.get_workspaces(), get_shared_services)
+        if workspace_ids is not None:
+            workspaces = [workspace for workspace in workspaces if workspace.id in workspace_ids]
+
+        resources = []
+        if include_workspace_children:
+            children = await fan_out(self.get_workspace_children, workspaces, self._max_concurrency)
+            for workspace, workspace_children in zip(workspaces, children):
+                resources.append(workspace)
+                resources += workspace_children
+        else:
+            resources += workspaces
+        return resources + shared_services
+
+    async def get_operations(self, resource: Resource) -> "list[dict]":
+        return await self._try_get_list(f"{resource.url}/operations", "operations", resource.workspace_id)
+
+    async def iter_operations(self, resources: "list[Resource]") -> "t.AsyncIterator[tuple[Resource, list[dict]]]":
+        """Get the operations for each resource concurrently, yielding (resource, operations) as they are retrieved"""
+        async for resource, operations in fan_out_as_completed(self.get_operations, resources, self._max_concurrency):
+            yield resource, operations
+
+
+async def _empty_list() -> list:
+    return []
@@ -0,0 +1,97 @@
+"""Helpers for running many (async) API calls concurrently with bounded concurrency.
+
+    async with AsyncApiClient(ApiClient.get_api_client_from_config()) as client:
+        workspaces = await fan_out(lambda workspace_id: client.call_api(...), workspace_ids)
+
+The number of calls in flight is limited to TRECLI_MAX_CONCURRENCY (default 8). The number of
+connections to the API is separately limited by TRECLI_HTTP_MAX_CONNECTIONS.
+"""
+import asyncio
+import os
+import typing as t
+
+T = t.TypeVar("T")
+R = t.TypeVar("R")
+
+
+def get_max_concurrency() -> int:
+    return max(1, int(os.getenv("TRECLI_MAX_CONCURRENCY", "8")))
+
+
+async def _run(
+    func: t.Callable[[T], t.Awaitable[R]],
+    items: t.Iterable[T],
+    max_concurrency: t.Optional[int],
+    return_exceptions: bool,
+) -> "t.AsyncIterator[tuple[int, T, R]]":
+    if max_concurrency is None:
+        max_concurrency = get_max_concurrency()
+    # Workers share an iterator over the items rather than a task being created per item,
+    # so that the items can be produced lazily and memory use is bounded by max_concurrency
+    pending = iter(enumerate(items))
+    completed = asyncio.Queue()
+    done = object()
+
+    async def worker():
+        try:
+            for index, item in pending:
+                try:
+                    result = await func(item)
+                except Exception as e:
+                    completed.put_nowait((index, item, e))
+                    if not return_exceptions:
+                        return
+                else:
+                    completed.put_nowait((index, item, result))
+        finally:
+            completed.put_nowait(done)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(1, max_concurrency))]
+    try:
+        running = len(workers)
+        while running > 0:
+            entry = await completed.get()
+            if entry is done:
+                running -= 1
+                continue
+            if isinstance(entry[2], Exception) and not return_exceptions:
+                raise entry[2]
+            yield entry
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def fan_out(
+    func: t.Callable[[T], t.Awaitable[R]],
+    items: t.Iterable[T],
+    max_concurrency: int = None,
+    return_exceptions: bool = False,
+) -> "list[R]":
+    """Await func(item) for each item, running up to max_concurrency calls concurrently.
+
+    Results are returned in the same order as items. If a call raises then the remaining
+    calls are cancelled and the exception is raised, unless return_exceptions is True in
+    which case the exception is returned in place of the result.
+    """
+    results = {}
+    async for index, _, result in _run(func, items, max_concurrency, return_exceptions):
+        results[index] = result
+    return [results[index] for index in range(len(results))]
+
+
+async def fan_out_as_completed(
+    func: t.Callable[[T], t.Awaitable[R]],
+    items: t.Iterable[T],
+    max_concurrency: int = None,
+    return_exceptions: bool = False,
+) -> "t.AsyncIterator[tuple[T, R]]":
+    """Await func(item) for each item as for fan_out, yielding (item, result) tuples as the calls complete."""
+    results = _run(func, items, max_concurrency, return_exceptions)
+    try:
+        async for _, item, result in results:
+            yield item, result
+    finally:
+        # cancel the outstanding calls now if iteration is stopped early (rather than when results is garbage collected)
+        await results.aclose()
@@ -0,0 +1,146 @@
+import click
+import hashlib
+import os
+import time
+import typing as t
+
+from pathlib import Path
+
+from tre.cache import file_lock, get_config_dir, read_json_file, write_json_file_atomic
+
+if t.TYPE_CHECKING:
+    from httpx import Headers, Response
+
+
+def get_http_cache_max_size() -> int:
+    """Maximum total size (in bytes) of the HTTP response cache. 0 disables the cache."""
+    return int(float(os.getenv("TRECLI_HTTP_CACHE_MAX_SIZE_MB", "50")) * 1024 * 1024)
+
+
+def get_max_age() -> t.Optional[float]:
+    """Get the --max-age value for the current command (if specified)."""
+    ctx = click.get_current_context(silent=True)
+    if ctx is None:
+        return None
+    return ctx.meta.get("tre.max_age")
+
+
+def _store_max_age(ctx: click.Context, param: click.Parameter, value: t.Optional[float]) -> None:
+    if value is not None:
+        ctx.meta["tre.max_age"] = value
+
+
+def max_age_option(*param_decls: str, **kwargs: t.Any):
+    param_decls = ('--max-age',)
+    kwargs.setdefault("type", click.FloatRange(min=0))
+    kwargs.setdefault("default", None)
+    kwargs.setdefault("envvar", "TRECLI_MAX_AGE")
+    kwargs.setdefault("expose_value", False)
+    kwargs.setdefault("callback", _store_max_age)
+    kwargs.setdefault("help", "Use a cached response (without calling the API) if it is no older than this many seconds")
+    return click.option(*param_decls, **kwargs)
+
+
+class HttpCache:
+    """Cache of GET responses stored in ~/.config/tre/http_cache.
+
+    Cached responses are revalidated using If-None-Match/If-Modified-Since, or used
+    without a request when within the --max-age for the command.
+    Each entry is stored in its own file and the file modification time is used to track
+    when the entry was last used. When the total size exceeds TRECLI_HTTP_CACHE_MAX_SIZE_MB
+    the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir: Path = None, max_size: int = None):
+        self._cache_dir = cache_dir or get_config_dir() / "http_cache"
+        self._max_size = max_size if max_size is not None else get_http_cache_max_size()
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0
+
+    @property
+    def max_entry_size(self) -> int:
+        """Responses larger than this (a quarter of the cache size) are not cached."""
+        return self._max_size // 4
+
+    @staticmethod
+    def get_key(base_url: str, url: str, scope_id: t.Optional[str]) -> str:
+        return hashlib.sha256(f"{base_url}|{scope_id or ''}|{url}".encode("utf-8")).hexdigest()
+
+    def _get_entry_path(self, key: str) -> Path:
+        return self._cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> t.Optional[dict]:
+        entry_path = self._get_entry_path(key)
+        entry = read_json_file(entry_path)
+        if entry is not None:
+            try:
+                # mark the entry as recently used
+                os.utime(entry_path)
+            except OSError:
+                pass
+        return entry
+
+    def set(self, key: str, headers: "Headers", content: bytes) -> None:
+        """Store a response given its headers and content (which may have been read incrementally)."""
+        if len(content) > self.max_entry_size:
+            return
+        entry_headers = {
+            name: headers[name]
+            for name in ["content-type", "etag", "last-modified"]
+            if name in headers
+        }
+        self._write_entry(key, {"headers": entry_headers, "body": content.decode("utf-8"), "fetched_at": time.time()})
+
+    def mark_fresh(self, key: str, entry: dict, response: "Response") -> None:
+        """Update an entry after a 304 response confirmed that it is still current."""
+        for name in ["etag", "last-modified"]:
+            if name in response.headers:
+                entry["headers"][name] = response.headers[name]
+        entry["fetched_at"] = time.time()
+        self._write_entry(key, entry)
+
+    def _write_entry(self, key: str, entry: dict) -> None:
+        if len(entry["body"]) > self.max_entry_size:
+            return
+        self._cache_dir.mkdir(mode=0o700, exist_ok=True)
+        write_json_file_atomic(self._get_entry_path(key), entry)
+        self._evict()
+
+    def _evict(self) -> None:
+        with file_lock(self._cache_dir):
+            entries = []
+            total_size = 0
+            for entry_path in self._cache_dir.glob("*.json"):
+                try:
+                    stat = entry_path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+                total_size += stat.st_size
+            # remove least recently used entries first
+            entries.sort()
+            for _, size, entry_path in entries:
+                if total_size <= self._max_size:
+                    break
+                try:
+                    entry_path.unlink()
+                except OSError:
+                    pass
+                total_size -= size
+
+    @staticmethod
+    def to_response(entry: dict, method: str, url: str) -> "Response":
+        from httpx import Request, Response
+        return Response(
+            200,
+            headers=entry["headers"],
+            content=entry["body"].encode("utf-8"),
+            request=Request(method, url))
+
+    def clear(self) -> None:
+        if self._cache_dir.exists():
+            with file_lock(self._cache_dir):
+                for entry_path in self._cache_dir.glob("*.json"):
+                    entry_path.unlink()
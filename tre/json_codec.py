@@ -0,0 +1,85 @@
+"""JSON encoding/decoding for API payloads.
+
+orjson is used when it is installed (pip install tre[orjson]) as it is significantly faster
+than the json module for large payloads. Set TRECLI_JSON_BACKEND=json to always use the json module.
+
+dumps produces exactly the same output as json.dumps: orjson is only used where its output is
+known to match, otherwise the json module is used.
+"""
+import json
+import os
+import re
+import typing as t
+
+_orjson = None
+_orjson_loaded = False
+# Set when a payload has been parsed by the json module because orjson rejected it
+# (e.g. NaN/Infinity or integers larger than 64 bits). orjson serialises NaN/Infinity
+# as null, so orjson is no longer used for dumps.
+_orjson_loads_failed = False
+
+# orjson and the json module format some floats differently: exponents (1e16 vs 1e+16) and
+# values below 1e-4 (0.00001 vs 1e-05). With indented output every number ends a line, whereas
+# a string ends with a quote, so this only matches numbers with an exponent.
+_EXPONENT_AT_LINE_END = re.compile(rb"e-?\d+,?(?:\n|\Z)")
+
+
+def _get_orjson():
+    global _orjson, _orjson_loaded
+    if not _orjson_loaded:
+        _orjson_loaded = True
+        if os.getenv("TRECLI_JSON_BACKEND", "auto").lower() != "json":
+            try:
+                import orjson
+                _orjson = orjson
+            except ImportError:
+                pass
+    return _orjson
+
+
+def get_backend() -> str:
+    return "orjson" if _get_orjson() is not None else "json"
+
+
+def loads(data: t.Union[str, bytes]):
+    global _orjson_loads_failed
+    orjson = _get_orjson()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # fall back to the json module which accepts NaN/Infinity and arbitrarily large integers
+            _orjson_loads_failed = True
+    return json.loads(data)
+
+
+def dumps(obj, indent: int = None) -> str:
+    """Serialise obj to JSON, with the same output as json.dumps(obj, indent=indent)."""
+    orjson = _get_orjson()
+    # orjson only supports an indent of 2 and always uses compact separators without an indent
+    if orjson is not None and indent == 2 and not _orjson_loads_failed:
+        try:
+            data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            # e.g. non-string keys or integers larger than 64 bits
+            pass
+        else:
+            # The json module escapes non-ASCII characters (and DEL) and formats some numbers differently
+            if (data.isascii() and b"\x7f" not in data
+                    and b"0.0000" not in data and not _EXPONENT_AT_LINE_END.search(data)):
+                return data.decode("ascii")
+    return json.dumps(obj, indent=indent)
+
+
+def dumps_bytes(obj) -> bytes:
+    """Serialise obj to compact JSON (UTF-8), e.g. for request bodies.
+
+    Unlike dumps, the output is not guaranteed to match json.dumps.
+    """
+    orjson = _get_orjson()
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
@@ -0,0 +1,107 @@
+"""Incremental parsing of JSON API responses.
+
+List responses are of the form {"workspaces": [...]}. iter_array_items yields the items of such
+an array as the response content is received, so that memory use doesn't grow with the size of
+the response.
+"""
+import codecs
+import json
+import re
+import typing as t
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+_NUMBER_START = "-0123456789"
+_NUMBER_CHARS = "-+.eE0123456789"
+
+
+class _Reader:
+    def __init__(self, chunks: t.Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self) -> bool:
+        # discard the content that has been consumed
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        for chunk in self._chunks:
+            text = self._text_decoder.decode(chunk)
+            if text:
+                self._buffer += text
+                return True
+        if not self._eof:
+            self._buffer += self._text_decoder.decode(b"", final=True)
+            self._eof = True
+        return False
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character (or "" at the end of the content)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_more():
+                return ""
+
+    def expect(self, *chars: str) -> str:
+        char = self.peek()
+        if char == "" or char not in chars:
+            raise self._error(f"Expecting one of {chars}")
+        self._pos += 1
+        return char
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+                # a number may continue in the next chunk (e.g. `12500.` then `0`), so is only complete if it
+                # is followed by a character that can't be part of it. Other values are returned without
+                # waiting for the next chunk.
+                is_number = self._buffer[self._pos] in _NUMBER_START
+                if not is_number or self._eof or (end < len(self._buffer) and self._buffer[end] not in _NUMBER_CHARS):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # the value is incomplete - read more content and try again
+            self._read_more()
+
+
+def iter_array_items(chunks: t.Iterable[bytes], key: str) -> t.Iterator:
+    """Yield the items of the `key` array property of the top-level JSON object in chunks.
+
+    The content is parsed incrementally, one item at a time. Other properties are skipped.
+    Nothing is yielded if the property isn't present or isn't an array.
+    """
+    reader = _Reader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.expect("}")
+    else:
+        while True:
+            name = reader.read_value()
+            reader.expect(":")
+            if name == key and reader.peek() == "[":
+                reader.expect("[")
+                if reader.peek() == "]":
+                    reader.expect("]")
+                else:
+                    while True:
+                        yield reader.read_value()
+                        if reader.expect(",", "]") == "]":
+                            break
+            else:
+                reader.read_value()
+            if reader.expect(",", "}") == "}":
+                break
+    # read to the end of the content (as json.loads, fail if there is anything after the object)
+    if reader.peek() != "":
+        raise reader._error("Extra data")
@@ -0,0 +1,125 @@
+"""Colorized JSON (jsonc) output.
+
+The built-in colorizer produces the same text as json.dumps(obj, indent=2) with the colours used
+by pygments' JsonLexer/TerminalFormatter, but colours the tokens as it serialises rather than
+lexing the serialised text, which is several times faster for large documents.
+Set TRECLI_JSONC_HIGHLIGHTER=pygments to use pygments (pip install tre[pygments]) instead.
+"""
+import click
+import os
+import typing as t
+
+from json.encoder import encode_basestring_ascii
+
+from tre import json_codec
+
+_KEY = "\x1b[94m"
+_STRING = "\x1b[33m"
+_LITERAL = "\x1b[34m"
+_RESET = "\x1b[39;49;00m"
+
+# Number of characters to build up before writing to stdout
+_WRITE_SIZE = 64 * 1024
+
+
+def _format_float(value: float) -> str:
+    # as per json.dumps
+    if value != value:
+        return "NaN"
+    if value == float("inf"):
+        return "Infinity"
+    if value == float("-inf"):
+        return "-Infinity"
+    return float.__repr__(value)
+
+
+def _format_key(key) -> str:
+    # json.dumps converts keys that are not strings (e.g. numbers) to strings
+    if not isinstance(key, str):
+        key = json_codec.dumps(key)
+    return encode_basestring_ascii(key)
+
+
+def iter_jsonc(obj, indent: str = "\n") -> t.Iterator[str]:
+    """Yield the colorized JSON for obj (formatted as json.dumps(obj, indent=2)) as a series of tokens."""
+    if isinstance(obj, str):
+        yield _STRING + encode_basestring_ascii(obj) + _RESET
+    elif obj is None:
+        yield _LITERAL + "null" + _RESET
+    elif obj is True:
+        yield _LITERAL + "true" + _RESET
+    elif obj is False:
+        yield _LITERAL + "false" + _RESET
+    elif isinstance(obj, int):
+        yield _LITERAL + int.__repr__(obj) + _RESET
+    elif isinstance(obj, float):
+        yield _LITERAL + _format_float(obj) + _RESET
+    elif isinstance(obj, dict):
+        if not obj:
+            yield "{}"
+            return
+        item_indent = indent + "  "
+        separator = "{" + item_indent
+        for key, value in obj.items():
+            yield separator + _KEY + _format_key(key) + _RESET + ": "
+            yield from iter_jsonc(value, item_indent)
+            separator = "," + item_indent
+        yield indent + "}"
+    elif isinstance(obj, (list, tuple)):
+        if not obj:
+            yield "[]"
+            return
+        item_indent = indent + "  "
+        separator = "[" + item_indent
+        for value in obj:
+            yield separator
+            yield from iter_jsonc(value, item_indent)
+            separator = "," + item_indent
+        yield indent + "]"
+    else:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _use_color() -> bool:
+    # As for click.echo: use colour when writing to a terminal unless overridden with ctx.color
+    ctx = click.get_current_context(silent=True)
+    if ctx is not None and ctx.color is not None:
+        return ctx.color
+    return click.get_text_stream("stdout").isatty()
+
+
+def _use_pygments() -> bool:
+    if os.getenv("TRECLI_JSONC_HIGHLIGHTER", "builtin").lower() != "pygments":
+        return False
+    try:
+        import pygments  # noqa: F401
+    except ImportError:
+        click.echo("TRECLI_JSONC_HIGHLIGHTER is set to 'pygments' but pygments is not installed - using the built-in highlighter", err=True)
+        return False
+    return True
+
+
+def output_jsonc(content) -> None:
+    if not _use_color():
+        # click.echo would strip the colours anyway
+        click.echo(json_codec.dumps(content, indent=2) + "\n")
+        return
+
+    if _use_pygments():
+        from pygments import highlight, lexers, formatters
+        formatted_json = json_codec.dumps(content, indent=2)
+        jsonc = highlight(formatted_json, lexers.JsonLexer(), formatters.TerminalFormatter())
+        click.echo(jsonc)
+        return
+
+    pending = []
+    pending_size = 0
+    for token in iter_jsonc(content):
+        pending.append(token)
+        pending_size += len(token)
+        if pending_size >= _WRITE_SIZE:
+            click.echo("".join(pending), nl=False)
+            pending = []
+            pending_size = 0
+    pending.append("\n\n")
+    click.echo("".join(pending), nl=False)
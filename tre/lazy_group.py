@@ -0,0 +1,74 @@
+import click
+import importlib
+import typing as t
+
+from click.utils import make_default_short_help
+
+
+class LazyGroup(click.Group):
+    """A click Group that imports its subcommands only when they are used.
+
+    lazy_subcommands maps command names to the import path of the command object and its
+    short help, e.g. {"workspace": ("tre.commands.workspaces.workspace.workspace", "Perform actions on a workspace")}.
+    The short help is used to list the commands (for --help and shell completion) without importing them.
+    """
+
+    def __init__(self, *args, lazy_subcommands: "dict[str, tuple[str, str]]" = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands or {}
+
+    def list_commands(self, ctx: click.Context) -> "list[str]":
+        return sorted(super().list_commands(ctx) + list(self.lazy_subcommands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str):
+        if cmd_name in self.lazy_subcommands:
+            return self._load_command(cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _load_command(self, cmd_name: str) -> click.Command:
+        import_path, _ = self.lazy_subcommands[cmd_name]
+        module_name, command_object_name = import_path.rsplit(".", 1)
+        module = importlib.import_module(module_name)
+        command = getattr(module, command_object_name)
+        if not isinstance(command, click.Command):
+            raise ValueError(f"Lazy loading of '{import_path}' failed: not a click Command")
+        return command
+
+    def _get_short_help(self, ctx: click.Context, cmd_name: str, limit: int = 45) -> t.Optional[str]:
+        """Get the short help for a command (None if the command is hidden), only importing it if it isn't lazy"""
+        if cmd_name in self.lazy_subcommands:
+            _, short_help = self.lazy_subcommands[cmd_name]
+            return make_default_short_help(short_help, limit)
+        command = super().get_command(ctx, cmd_name)
+        if command is None or command.hidden:
+            return None
+        return command.get_short_help_str(limit)
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        # as per click.MultiCommand.format_commands, but without loading the lazy commands
+        names = self.list_commands(ctx)
+        if len(names) == 0:
+            return
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        rows = []
+        for name in names:
+            short_help = self._get_short_help(ctx, name, limit)
+            if short_help is not None:
+                rows.append((name, short_help))
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+    def shell_complete(self, ctx: click.Context, incomplete: str):
+        # as per click.MultiCommand.shell_complete, but without loading the lazy commands
+        from click.shell_completion import CompletionItem
+
+        results = []
+        for name in self.list_commands(ctx):
+            if name.startswith(incomplete):
+                short_help = self._get_short_help(ctx, name)
+                if short_help is not None:
+                    results.append(CompletionItem(name, help=short_help))
+        # options
+        results.extend(click.Command.shell_complete(self, ctx, incomplete))
+        return results
@@ -1,47 +1,42 @@
 import click
-from .commands.costs import costs
-from .commands.health import health
-
-from tre.commands.get_token import get_token
-from tre.commands.login import login
-from tre.commands.api_call import call_api
-from tre.commands.workspaces.workspace import workspace
-from tre.commands.workspaces.workspaces import workspaces
-from tre.commands.shared_services.shared_service import shared_service
-from tre.commands.shared_services.shared_services import shared_services
-
-from tre.commands.workspace_templates.workspace_templates import workspace_templates
-from tre.commands.workspace_templates.workspace_template import workspace_template
-from tre.commands.shared_service_templates.shared_service_templates import shared_service_templates
-from tre.commands.shared_service_templates.shared_service_template import shared_service_template
-from tre.commands.workspace_service_templates.workspace_service_templates import workspace_service_templates
-from tre.commands.workspace_service_templates.workspace_service_template import workspace_service_template
-
-
-@click.group()
-def cli():
-    pass
+import logging
+import os
+
+from tre.lazy_group import LazyGroup
+
 
+# Commands are imported on first use to keep startup (and shell completion) fast.
+# The short help for each command is used to list the commands without importing them.
+@click.group(cls=LazyGroup, lazy_subcommands={
+    "login": ("tre.commands.login.login", "Set the TRE credentials and base URL"),
+    "api": ("tre.commands.api_call.call_api", "Call an API endpoint"),
+    "workspaces": ("tre.commands.workspaces.workspaces.workspaces", "List/add workspaces"),
+    "workspace": ("tre.commands.workspaces.workspace.workspace", "Perform actions on an individual workspace"),
+    "shared-services": ("tre.commands.shared_services.shared_services.shared_services", "List/add shared_services"),
+    "shared-service": ("tre.commands.shared_services.shared_service.shared_service", "Perform actions on an individual shared_service"),
+    "operations": ("tre.commands.operations.operations.operations", "Work with operations across resources"),
+    "operation": ("tre.commands.operations.operation.operation", "Work with operations started by the CLI"),
 
-cli.add_command(login)
-cli.add_command(call_api)
-cli.add_command(workspaces)
-cli.add_command(workspace)
-cli.add_command(shared_services)
-cli.add_command(shared_service)
+    "workspace-templates": ("tre.commands.workspace_templates.workspace_templates.workspace_templates", "List workspace-templates"),
+    "workspace-template": ("tre.commands.workspace_templates.workspace_template.workspace_template", "Perform actions on an workspace-template"),
+    "shared-service-templates": ("tre.commands.shared_service_templates.shared_service_templates.shared_service_templates", "List shared-service-templates"),
+    "shared-service-template": ("tre.commands.shared_service_templates.shared_service_template.shared_service_template", "Perform actions on an shared-service-template"),
+    "workspace-service-templates": ("tre.commands.workspace_service_templates.workspace_service_templates.workspace_service_templates", "List workspace-service-templates"),
+    "workspace-service-template": ("tre.commands.workspace_service_templates.workspace_service_template.workspace_service_template", "Perform actions on an workspace-service-template"),
 
-cli.add_command(workspace_templates)
-cli.add_command(workspace_template)
-cli.add_command(shared_service_templates)
-cli.add_command(shared_service_template)
-cli.add_command(workspace_service_templates)
-cli.add_command(workspace_service_template)
+    "get-token": ("tre.commands.get_token.get_token", "Get an access token"),
 
-cli.add_command(get_token)
+    "cache": ("tre.commands.cache.cache", "Manage the CLI's local caches"),
 
-cli.add_command(costs)
+    "costs": ("tre.commands.costs.costs", "Show costs"),
+
+    "health": ("tre.commands.health.health", "Show Health"),
+})
+def cli():
+    log_level = os.getenv("TRECLI_LOG_LEVEL")
+    if log_level:
+        logging.basicConfig(level=log_level.upper(), format="%(levelname)s %(name)s: %(message)s")
 
-cli.add_command(health)
 
 # TODO - migrations?
 
@@ -0,0 +1,184 @@
+import atexit
+import json
+import time
+import typing as t
+import weakref
+
+from pathlib import Path
+
+from tre.cache import file_lock, get_config_dir, read_json_file, write_file_atomic
+from tre.token_cache import get_jwt_expiry, get_token_refresh_margin
+
+# Process-wide MSAL state, keyed by (token_cache_file, client_id, aad_tenant_id)
+_msal_apps = {}
+# In-memory copies of access tokens found in the token cache file, keyed by
+# (token_cache_file, client_id, aad_tenant_id, scope)
+_access_tokens = {}
+# The entries in each token cache when it was last loaded from (or saved to) its file, used to
+# determine the changes to save
+_loaded_token_cache_states = weakref.WeakKeyDictionary()
+
+_AUTHORITY_HOST = "login.microsoftonline.com"
+
+
+def _get_authority(aad_tenant_id: str) -> str:
+    return f"https://{_AUTHORITY_HOST}/{aad_tenant_id}"
+
+
+def _get_selected_home_account_id(cache_json: dict) -> t.Optional[str]:
+    """Get the home_account_id of the account that the MSAL path uses, i.e. the first of app.get_accounts()"""
+    for account in cache_json.get("Account", {}).values():
+        if account.get("environment") == _AUTHORITY_HOST and account.get("authority_type") in ["MSSTS", "ADFS"]:
+            return account.get("home_account_id")
+    return None
+
+
+def _is_unexpired(expires_on: float) -> bool:
+    return expires_on - get_token_refresh_margin() > time.time()
+
+
+def find_cached_access_token(token_cache_file: str, client_id: str, aad_tenant_id: str, scope: str) -> t.Optional[str]:
+    """Look up an unexpired access token for scope directly in the MSAL token cache file.
+
+    This avoids creating an MSAL application (and the network calls that go with it)
+    when the cache already holds a valid token. As for the MSAL path, only tokens for the
+    first account in the cache are used, so that a token for another user isn't returned.
+    """
+    memo_key = (str(token_cache_file), client_id, aad_tenant_id, scope)
+    memo = _access_tokens.get(memo_key)
+    if memo is not None and _is_unexpired(memo[1]):
+        return memo[0]
+
+    cache_json = read_json_file(Path(token_cache_file)) or {}
+    home_account_id = _get_selected_home_account_id(cache_json)
+    if home_account_id is None:
+        return None
+    scope_lower = scope.lower()
+    best = None
+    for entry in cache_json.get("AccessToken", {}).values():
+        if entry.get("client_id") != client_id or entry.get("realm") != aad_tenant_id:
+            continue
+        if entry.get("home_account_id") != home_account_id:
+            continue
+        if scope_lower not in entry.get("target", "").lower().split(" "):
+            continue
+        token = entry.get("secret")
+        if not token:
+            continue
+        expires_on = get_jwt_expiry(token)
+        if expires_on is None:
+            expires_on = float(entry.get("expires_on", 0))
+        if _is_unexpired(expires_on) and (best is None or expires_on > best[1]):
+            best = (token, expires_on)
+
+    if best is None:
+        return None
+    _access_tokens[memo_key] = best
+    return best[0]
+
+
+def load_token_cache(token_cache_file: str):
+    import msal
+    cache = msal.SerializableTokenCache()
+    cache_text = None
+    try:
+        cache_text = Path(token_cache_file).read_text(encoding="utf-8")
+    except OSError:
+        pass
+    if cache_text:
+        cache.deserialize(cache_text)
+    _loaded_token_cache_states[cache] = json.loads(cache.serialize())
+    return cache
+
+
+def _merge_token_cache_changes(file_state: dict, loaded_state: dict, current_state: dict) -> dict:
+    """Apply the changes made to a token cache since it was loaded (loaded_state -> current_state) to file_state.
+
+    Entries added or updated in the cache are written and entries that were removed from it (e.g.
+    by MSAL removing an expired or revoked token) are removed. Other entries in file_state (e.g.
+    those written by other processes since the cache was loaded) are left as they are.
+    """
+    merged = dict(file_state)
+    for section in set(loaded_state) | set(current_state):
+        loaded_entries = loaded_state.get(section, {})
+        current_entries = current_state.get(section, {})
+        entries = dict(merged.get(section, {}))
+        for key, entry in current_entries.items():
+            if loaded_entries.get(key) != entry:
+                entries[key] = entry
+        for key in loaded_entries:
+            if key not in current_entries:
+                entries.pop(key, None)
+        merged[section] = entries
+    return merged
+
+
+def save_token_cache(cache, token_cache_file: str) -> None:
+    """Save the token cache if it has changed.
+
+    The write is atomic and done under a file lock. Only the entries that this process has
+    added, updated or removed since the cache was loaded are written, so entries written by
+    other processes in the meantime are kept.
+    """
+    if not cache.has_state_changed:
+        return
+    token_cache_path = Path(token_cache_file)
+    with file_lock(token_cache_path):
+        merged = _merge_token_cache_changes(
+            read_json_file(token_cache_path) or {},
+            _loaded_token_cache_states.get(cache, {}),
+            json.loads(cache.serialize()))
+        merged_text = json.dumps(merged, indent=4)
+        write_file_atomic(token_cache_path, merged_text)
+        cache.deserialize(merged_text)
+        _loaded_token_cache_states[cache] = json.loads(cache.serialize())
+
+
+def _load_http_cache(http_cache_file: Path) -> dict:
+    import pickle
+    try:
+        with open(http_cache_file, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        # missing or unreadable (e.g. written by an incompatible MSAL version) - start afresh
+        return {}
+
+
+def _save_http_cache(http_cache_file: Path, http_cache: dict, loaded_state: bytes) -> None:
+    import pickle
+    try:
+        state = pickle.dumps(http_cache)
+    except Exception:
+        return
+    if state == loaded_state:
+        return
+    with file_lock(http_cache_file):
+        write_file_atomic(http_cache_file, state)
+
+
+def get_msal_app(token_cache_file: str, client_id: str, aad_tenant_id: str):
+    """Get the (process-wide) MSAL application and token cache for the given client/tenant.
+
+    Authority/instance discovery responses are persisted in ~/.config/tre/msal_http_cache.bin
+    so that they aren't re-fetched by every process.
+
+    Returns a tuple of (app, cache)
+    """
+    key = (str(token_cache_file), client_id, aad_tenant_id)
+    app_and_cache = _msal_apps.get(key)
+    if app_and_cache is None:
+        import msal
+        import pickle
+        http_cache_file = get_config_dir() / "msal_http_cache.bin"
+        http_cache = _load_http_cache(http_cache_file)
+        atexit.register(_save_http_cache, http_cache_file, http_cache, pickle.dumps(http_cache))
+
+        cache = load_token_cache(token_cache_file)
+        app = msal.PublicClientApplication(
+            client_id=client_id,
+            authority=_get_authority(aad_tenant_id),
+            token_cache=cache,
+            http_cache=http_cache)
+        app_and_cache = (app, cache)
+        _msal_apps[key] = app_and_cache
+    return app_and_cache
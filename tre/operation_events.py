@@ -0,0 +1,92 @@
+import click
+import time
+import typing as t
+
+from tre import json_codec
+
+
+def events_enabled() -> bool:
+    """Whether --events was specified for the current command (see polling_options)."""
+    ctx = click.get_current_context(silent=True)
+    return ctx is not None and ctx.meta.get("tre.events", False)
+
+
+class OperationEvents:
+    """Writes an NDJSON record to stdout for each observed change in the status of an operation or its steps.
+
+    Times are taken from the operation (createdWhen/updatedWhen) where possible, so that they
+    reflect when the change happened rather than when it was observed by polling:
+    - elapsed is the time since the operation was submitted
+    - previousStatusDuration is the time spent in the previous status
+    """
+
+    def __init__(self):
+        # operation id -> {"status": ..., "changed": ..., "steps": {step key: (status, changed)}}
+        self._operations: "dict[str, dict]" = {}
+
+    def observe(self, operation: dict) -> None:
+        now = time.time()
+        operation_id = operation.get("id")
+        created = operation.get("createdWhen")
+        state = self._operations.get(operation_id)
+        if state is None:
+            state = {"status": None, "changed": None, "steps": {}}
+            self._operations[operation_id] = state
+
+        status = operation.get("status")
+        if status != state["status"]:
+            changed = self._get_change_time(operation, now)
+            self._write({
+                "timestamp": now,
+                "type": "operation",
+                "operationId": operation_id,
+                "resourcePath": operation.get("resourcePath"),
+                "action": operation.get("action"),
+                "status": status,
+                "previousStatus": state["status"],
+                "elapsed": self._get_duration(created, changed),
+                "previousStatusDuration": self._get_duration(state["changed"], changed),
+                "message": operation.get("message"),
+            })
+            state["status"] = status
+            state["changed"] = changed
+
+        for index, step in enumerate(operation.get("steps") or []):
+            step_key = step.get("stepId") or str(index)
+            step_status = step.get("status")
+            previous_status, previous_changed = state["steps"].get(step_key, (None, None))
+            if step_status == previous_status:
+                continue
+            changed = self._get_change_time(step, now)
+            self._write({
+                "timestamp": now,
+                "type": "step",
+                "operationId": operation_id,
+                "resourcePath": operation.get("resourcePath"),
+                "action": operation.get("action"),
+                "stepId": step.get("stepId"),
+                "resourceTemplateName": step.get("resourceTemplateName"),
+                "status": step_status,
+                "previousStatus": previous_status,
+                "elapsed": self._get_duration(created, changed),
+                "previousStatusDuration": self._get_duration(previous_changed, changed),
+                "message": step.get("message"),
+            })
+            state["steps"][step_key] = (step_status, changed)
+
+    @staticmethod
+    def _get_change_time(item: dict, now: float) -> float:
+        updated = item.get("updatedWhen")
+        return updated if isinstance(updated, (int, float)) else now
+
+    @staticmethod
+    def _get_duration(start: t.Optional[float], end: float) -> t.Optional[float]:
+        if not isinstance(start, (int, float)):
+            return None
+        return round(max(0.0, end - start), 3)
+
+    @staticmethod
+    def _write(event: dict) -> None:
+        stdout = click.get_binary_stream("stdout")
+        stdout.write(json_codec.dumps_bytes(event) + b"\n")
+        stdout.flush()
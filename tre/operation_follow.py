@@ -0,0 +1,119 @@
+import asyncio
+import time
+import typing as t
+
+from logging import Logger
+
+from tre import json_codec
+from tre.api_client import ApiClient
+from tre.async_api_client import AsyncApiClient
+from tre.estate import WORKSPACE, WORKSPACE_SERVICE, EstateCrawler, Resource
+from tre.output import RECORD_OUTPUT_FORMATS, OutputFormat, is_streamable_query, output
+from tre.polling import is_operation_state_terminal
+
+
+def _get_state(operation: dict) -> tuple:
+    steps = operation.get("steps") or []
+    return (operation.get("status"), operation.get("updatedWhen"), tuple(step.get("status") for step in steps))
+
+
+class OperationFollower:
+    """Polls the operations for a resource (and optionally its child resources), reporting those that are new or have changed.
+
+    All calls share a single AsyncApiClient (so tokens and workspace scopes are only looked up once)
+    and use conditional requests, so polling a resource whose operations haven't changed is a small
+    304 response where the API supports it. The child resources are re-listed every
+    `resource_refresh_polls` polls to pick up resources that have been added.
+    """
+
+    def __init__(self, log: Logger, client: AsyncApiClient, resource: Resource, recursive: bool, resource_refresh_polls: int = 6):
+        self._crawler = EstateCrawler(log, client, conditional=True)
+        self._resource = resource
+        self._recursive = recursive
+        self._resource_refresh_polls = resource_refresh_polls
+        self._resources = [resource]
+        # (resource path, operation id) -> state when last polled
+        self._operations: "dict[tuple[str, str], tuple]" = {}
+        self._polls = 0
+        self._started = time.time()
+
+    async def _refresh_resources(self) -> None:
+        if self._resource.kind == WORKSPACE:
+            children = await self._crawler.get_workspace_children(self._resource)
+        elif self._resource.kind == WORKSPACE_SERVICE:
+            children = await self._crawler.get_user_resources(self._resource)
+        else:
+            children = []
+        self._resources = [self._resource] + children
+
+    async def poll(self) -> "list[dict]":
+        """Get the operations that are new or have changed since the last poll, ordered by updatedWhen.
+
+        Operations that are seen for the first time are only included if they are in progress or were
+        updated after following started, i.e. the first poll returns the operations that are in progress.
+        """
+        if self._recursive and self._polls % self._resource_refresh_polls == 0:
+            await self._refresh_resources()
+        self._polls += 1
+
+        changed = []
+        async for resource, operations in self._crawler.iter_operations(self._resources):
+            for operation in operations:
+                key = (resource.resource_path, operation.get("id"))
+                state = _get_state(operation)
+                previous = self._operations.get(key)
+                self._operations[key] = state
+                if previous is None:
+                    updated = operation.get("updatedWhen")
+                    is_recent = isinstance(updated, (int, float)) and updated >= self._started
+                    if is_recent or not is_operation_state_terminal(operation.get("status")):
+                        changed.append(operation)
+                elif state != previous:
+                    changed.append(operation)
+        changed.sort(key=lambda operation: operation.get("updatedWhen") or 0)
+        return changed
+
+
+def _iter_list_content(polls: "t.Iterable[list[dict]]") -> t.Iterator[bytes]:
+    """Yield the content of an operations list response with the operations from each poll (which never ends)"""
+    yield b'{"operations": ['
+    separator = b""
+    for operations in polls:
+        for operation in operations:
+            yield separator + json_codec.dumps(operation).encode("utf-8")
+            separator = b", "
+
+
+def follow_operations(
+        log: Logger, operations_url: str, recursive: bool, interval: float, output_format: str, query: t.Optional[str], default_table_query: str) -> None:
+    """Follow the operations at operations_url (e.g. /api/workspaces/<id>/operations) until interrupted.
+
+    For table and record-per-line output there is a single table (or stream of records) with a row for
+    each new or changed operation, so the table header is only output once. For JSON output (or a
+    query whose records can't be streamed), the operations from each poll are output as a document.
+    """
+    resource = Resource.from_path(operations_url.removeprefix("/api").removesuffix("/operations"))
+    api_client = ApiClient.get_api_client_from_config()
+    client = AsyncApiClient(api_client)
+    follower = OperationFollower(log, client, resource, recursive)
+    loop = asyncio.new_event_loop()
+
+    def iter_polls() -> "t.Iterator[list[dict]]":
+        while True:
+            changed = loop.run_until_complete(follower.poll())
+            if len(changed) > 0:
+                yield changed
+            time.sleep(interval)
+
+    is_record_output = output_format in RECORD_OUTPUT_FORMATS or output_format == OutputFormat.Table.value
+    try:
+        if is_record_output and is_streamable_query(query or default_table_query):
+            output(_iter_list_content(iter_polls()), output_format=output_format, query=query, default_table_query=default_table_query, incremental=True)
+        else:
+            for changed in iter_polls():
+                output(json_codec.dumps_bytes({"operations": changed}), output_format=output_format, query=query, default_table_query=default_table_query)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        loop.run_until_complete(client.close())
+        loop.close()
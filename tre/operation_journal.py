@@ -0,0 +1,68 @@
+import time
+import typing as t
+
+from tre import json_codec
+from tre.cache import file_lock, get_config_dir, read_json_file, write_json_file_atomic
+
+if t.TYPE_CHECKING:
+    from httpx import Response
+
+
+class OperationJournal:
+    """Operations started by the CLI that may not have completed yet.
+
+    Operations are recorded (in ~/.config/tre/operation_journal.json) when an API call returns
+    202 Accepted with the operation's location, and removed once the CLI sees that they have
+    completed. This allows waiting for an operation to be resumed if the CLI exits before it
+    completes (tre operation resume / tre operations pending).
+    """
+
+    def __init__(self, base_url: str, journal_file=None):
+        self.base_url = base_url
+        self._journal_file = journal_file or get_config_dir() / "operation_journal.json"
+
+    def _update(self, update: t.Callable[["dict[str, dict]"], None]) -> None:
+        with file_lock(self._journal_file):
+            journal = read_json_file(self._journal_file) or {}
+            entries = journal.setdefault(self.base_url, {})
+            update(entries)
+            if len(entries) == 0:
+                del journal[self.base_url]
+            write_json_file_atomic(self._journal_file, journal)
+
+    def add(self, operation_url: str, scope_id: t.Optional[str], response: "Response") -> None:
+        """Record the operation started by a request (given the 202 response)"""
+        try:
+            operation = json_codec.loads(response.content)["operation"]
+            operation_id = operation["id"]
+        except (ValueError, KeyError, TypeError):
+            return
+        entry = {
+            "id": operation_id,
+            "resourcePath": operation.get("resourcePath"),
+            "action": operation.get("action"),
+            "url": operation_url,
+            "scopeId": scope_id,
+            "startedWhen": operation.get("createdWhen", time.time()),
+        }
+
+        def add_entry(entries: "dict[str, dict]"):
+            entries[operation_id] = entry
+        self._update(add_entry)
+
+    def remove(self, operation_id: str) -> None:
+        """Remove an operation that has completed"""
+        operation_id = str(operation_id)
+        if operation_id not in self.get_entries_by_id():
+            return
+
+        def remove_entry(entries: "dict[str, dict]"):
+            entries.pop(operation_id, None)
+        self._update(remove_entry)
+
+    def get_entries_by_id(self) -> "dict[str, dict]":
+        return (read_json_file(self._journal_file) or {}).get(self.base_url, {})
+
+    def get_entries(self) -> "list[dict]":
+        """Get the recorded operations, oldest first"""
+        return sorted(self.get_entries_by_id().values(), key=lambda entry: entry.get("startedWhen") or 0)
@@ -1,28 +1,44 @@
 import click
-import jmespath
-import json
+import functools
+import itertools
+import os
 import typing as t
-from tabulate import tabulate
-from pygments import highlight, lexers, formatters
 from enum import Enum
 
+from tre import json_codec
+
 
 class OutputFormat(Enum):
     Suppress = 'none'
     Json = 'json'
     JsonC = 'jsonc'
     Table = 'table'
+    NDJson = 'ndjson'
+    Csv = 'csv'
+    Tsv = 'tsv'
+
+
+# Formats that output one line per record, written as the records are produced
+RECORD_OUTPUT_FORMATS = [OutputFormat.NDJson.value, OutputFormat.Csv.value, OutputFormat.Tsv.value]
 
 
 def output_option(*param_decls: str, **kwargs: t.Any):
     param_decls = ('--output', '-o', 'output_format')
     kwargs.setdefault("default", 'table')
-    kwargs.setdefault("type", click.Choice(['table', 'json', 'jsonc', 'none']))
+    kwargs.setdefault("type", click.Choice(['table', 'json', 'jsonc', 'ndjson', 'csv', 'tsv', 'none']))
     kwargs.setdefault("envvar", "TRECLI_OUTPUT")
     kwargs.setdefault("help", "Output format")
     return click.option(*param_decls, **kwargs)
 
 
+def limit_option(*param_decls: str, **kwargs: t.Any):
+    param_decls = ('--limit',)
+    kwargs.setdefault("default", None)
+    kwargs.setdefault("type", click.IntRange(min=0))
+    kwargs.setdefault("help", "Maximum number of items to output (for table, ndjson, csv and tsv output)")
+    return click.option(*param_decls, **kwargs)
+
+
 def query_option(*param_decls: str, **kwargs: t.Any):
     param_decls = ('--query', '-q')
     kwargs.setdefault("default", None)
@@ -30,53 +46,328 @@ def query_option(*param_decls: str, **kwargs: t.Any):
     return click.option(*param_decls, **kwargs)
 
 
-def output(result_json, output_format: OutputFormat = OutputFormat.Json, query: str = None, default_table_query: str = None) -> None:
-    if output_format == OutputFormat.Suppress.value:
+@functools.lru_cache(maxsize=64)
+def _compile_query(query: str):
+    import jmespath
+    return jmespath.compile(query)
+
+
+def _iter_records(content, query: t.Optional[str], project: bool = True) -> t.Iterator:
+    """Yield the records for the query result: the items if it is a list, otherwise the result itself.
+
+    For a projection query (e.g. `workspaces[].{id:id}`) the projection is applied to each item as
+    it is yielded rather than building the whole result first. If project is False then the
+    trailing projection/multi-select is not applied, i.e. whole items are yielded (e.g. each workspace).
+    """
+    from jmespath.visitor import TreeInterpreter
+    interpreter = TreeInterpreter()
+    parsed = _compile_query(query).parsed if query is not None else {"type": "identity", "children": []}
+
+    if parsed["type"] == "projection":
+        left, right = parsed["children"]
+        items = interpreter.visit(left, content)
+        if not isinstance(items, list):
+            return
+        for item in items:
+            record = interpreter.visit(right, item) if project else item
+            if record is not None:
+                yield record
+        return
+
+    if not project and parsed["type"] == "multi_select_dict":
+        # e.g. `{id: id, name:name}`
+        result = content
+    elif not project and parsed["type"] == "subexpression" and parsed["children"][1]["type"] == "multi_select_dict":
+        # e.g. `workspace.{id:id}`
+        result = interpreter.visit(parsed["children"][0], content)
+    else:
+        result = interpreter.visit(parsed, content)
+    if isinstance(result, list):
+        yield from result
+    elif result is not None:
+        yield result
+
+
+def _is_truthy(value) -> bool:
+    """Whether a value is true in JMESPath terms: anything other than null, false or an empty list, object or string"""
+    return value is not None and value is not False and value != [] and value != {} and value != ""
+
+
+def _get_streamed_array(query: str) -> "t.Optional[tuple[dict, dict, bool]]":
+    """Get the (parsed) query, the top-level array field it projects and whether it flattens the array, or None if it isn't such a projection"""
+    parsed = _compile_query(query).parsed
+    if parsed["type"] not in ["projection", "filter_projection"]:
+        return None
+    left = parsed["children"][0]
+    flatten = left["type"] == "flatten"
+    if flatten:
+        left = left["children"][0]
+    if left["type"] != "field":
+        return None
+    return parsed, left, flatten
+
+
+def is_streamable_query(query: str) -> bool:
+    """Whether the records for query can be output as streamed content is read, i.e. without reading all of the content first"""
+    return _get_streamed_array(query) is not None
+
+
+def _iter_streamed_records(chunks: t.Iterable[bytes], query: str, project: bool = True) -> t.Optional[t.Iterator]:
+    """Yield the records for the query result as for _iter_records, parsing the items incrementally from chunks.
+
+    This is only possible for a projection of a top-level array (e.g. `workspaces[].{id:id}` or
+    `operations[?status=='failed']`). Returns None for other queries.
+    """
+    streamed_array = _get_streamed_array(query)
+    if streamed_array is None:
+        return None
+    parsed, left, flatten = streamed_array
+
+    def generate():
+        from jmespath.visitor import TreeInterpreter
+        from tre.json_stream import iter_array_items
+        interpreter = TreeInterpreter()
+        right = parsed["children"][1]
+        condition = parsed["children"][2] if parsed["type"] == "filter_projection" else None
+        for item in iter_array_items(chunks, left["value"]):
+            # `[]` flattens nested lists into the projection
+            for value in (item if flatten and isinstance(item, list) else [item]):
+                if condition is not None:
+                    if not _is_truthy(interpreter.visit(condition, value)):
+                        continue
+                elif not project:
+                    if value is not None:
+                        yield value
+                    continue
+                record = interpreter.visit(right, value)
+                if record is not None:
+                    yield record
+
+    return generate()
+
+
+def _format_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list)):
+        return json_codec.dumps_bytes(value).decode("utf-8")
+    return str(value)
+
+
+def _output_records(records: t.Iterator, output_format: str, flush: bool = False) -> None:
+    if output_format == OutputFormat.NDJson.value:
+        stdout = click.get_binary_stream("stdout")
+        for record in records:
+            stdout.write(json_codec.dumps_bytes(record) + b"\n")
+            if flush:
+                stdout.flush()
         return
 
-    if query is None and output_format == OutputFormat.Table.value:
-        query = default_table_query
+    import csv
+    stdout = click.get_text_stream("stdout")
+    delimiter = "," if output_format == OutputFormat.Csv.value else "\t"
+    writer = csv.writer(stdout, delimiter=delimiter, lineterminator="\n")
+    columns = None
+    for record in records:
+        if isinstance(record, dict):
+            if columns is None:
+                # columns are taken from the first record
+                columns = list(record)
+                if output_format == OutputFormat.Csv.value:
+                    writer.writerow(columns)
+            writer.writerow([_format_cell(record.get(column)) for column in columns])
+        elif isinstance(record, list):
+            writer.writerow([_format_cell(value) for value in record])
+        else:
+            writer.writerow([_format_cell(record)])
+        if flush:
+            stdout.flush()
+
+
+def get_table_sample_size() -> int:
+    """Number of rows used to determine the table columns and column widths."""
+    return max(1, int(os.getenv("TRECLI_TABLE_SAMPLE_SIZE", "100")))
 
-    if query is None:
-        output_json = result_json
+
+def _is_number(value) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    if isinstance(value, str):
+        try:
+            float(value)
+            return True
+        except ValueError:
+            return False
+    return False
+
+
+def _format_table_cell(value) -> str:
+    return "" if value is None else str(value)
+
+
+def _get_decimals(text: str) -> int:
+    """Get the number of characters after the decimal point (or exponent) of a number, or -1 if it has neither (as per tabulate)"""
+    position = text.rfind(".")
+    if position < 0:
+        position = text.lower().rfind("e")
+    return len(text) - position - 1 if position >= 0 else -1
+
+
+def _output_table(records: t.Iterator, sample_size: int = None, flush: bool = False) -> None:
+    """Output records as a table in the style of tabulate's 'simple' format.
+
+    Numeric columns are aligned on the decimal point and other columns are left-aligned, as per
+    tabulate. Unlike tabulate, values are output as they are (numbers aren't reformatted, e.g. a
+    templateVersion of "1.0" isn't output as 1) and the table is written without reading all of
+    the records first: the columns (the union of the keys of the records), column widths and
+    alignment are determined from the first sample_size (default TRECLI_TABLE_SAMPLE_SIZE) records,
+    which are output as soon as they are available. Later rows are output as they are produced
+    (and flushed if flush is set), so:
+    - keys that first appear after the sample are dropped, i.e. their values are not output
+    - cells wider than the column are output in full, so the rest of the row is not aligned
+    """
+    sample = list(itertools.islice(records, sample_size or get_table_sample_size()))
+    if len(sample) == 0:
+        # nothing to output
+        return
+
+    if all(isinstance(record, dict) for record in sample):
+        columns = list(dict.fromkeys(key for record in sample for key in record))
+
+        def get_cells(record):
+            return [record.get(column) for column in columns] if isinstance(record, dict) else [record]
+    else:
+        columns = None
+
+        def get_cells(record):
+            return list(record) if isinstance(record, list) else [record]
+
+    sample_cells = [get_cells(record) for record in sample]
+    column_count = max(len(cells) for cells in sample_cells)
+    if columns is not None:
+        # Ensure the column is wider than the header (as per tabulate)
+        widths = [len(column) + 2 for column in columns]
     else:
-        result = json.loads(result_json)
-        output = jmespath.search(query, result)
-        output_json = json.dumps(output)
+        widths = [0] * column_count
+    numeric = [True] * column_count
+    for cells in sample_cells:
+        for index, value in enumerate(cells):
+            if value is not None and not _is_number(value):
+                numeric[index] = False
+    # For numeric columns, the most characters after the decimal point, used to align the decimal points
+    decimals = [-1] * column_count
+    for cells in sample_cells:
+        for index, value in enumerate(cells):
+            if numeric[index]:
+                decimals[index] = max(decimals[index], _get_decimals(_format_table_cell(value)))
+
+    def format_cell(index: int, value) -> str:
+        text = _format_table_cell(value)
+        if index < column_count and numeric[index] and text != "":
+            # pad after the number so that the decimal points line up when right-aligned
+            text += " " * max(0, decimals[index] - _get_decimals(text))
+        return text
+
+    for cells in sample_cells:
+        for index, value in enumerate(cells):
+            widths[index] = max(widths[index], len(format_cell(index, value)))
+
+    def format_row(cells, is_header: bool = False) -> str:
+        formatted = []
+        for index, value in enumerate(cells):
+            text = _format_table_cell(value) if is_header else format_cell(index, value)
+            if index >= column_count:
+                formatted.append(text)
+            elif numeric[index]:
+                formatted.append(text.rjust(widths[index]))
+            else:
+                formatted.append(text.ljust(widths[index]))
+        return "  ".join(formatted).rstrip() + "\n"
+
+    stdout = click.get_text_stream("stdout")
+    if columns is not None:
+        stdout.write(format_row(columns, is_header=True))
+        stdout.write("  ".join("-" * width for width in widths) + "\n")
+    for cells in sample_cells:
+        stdout.write(format_row(cells))
+    # output the first rows without waiting for the rest
+    stdout.flush()
+    for record in records:
+        stdout.write(format_row(get_cells(record)))
+        if flush:
+            stdout.flush()
+    stdout.flush()
+
+
+def output(
+        result_json: t.Union[str, bytes, t.Iterable[bytes]], output_format: OutputFormat = OutputFormat.Json, query: str = None,
+        default_table_query: str = None, limit: int = None, incremental: bool = False) -> None:
+    """Output an API response in the specified format.
+
+    result_json can be the raw response content (bytes). It is only parsed if a query
+    is applied or the output format requires it.
+    result_json can also be an iterable of content chunks (e.g. StreamedResponse.iter_bytes()).
+    Where possible the content is then output, or the items of a list response parsed, as it
+    is read rather than reading the whole response first.
+    limit is the maximum number of items to output for the table and record-per-line formats.
+    incremental is for content whose chunks are produced over time (e.g. as operations complete):
+    each chunk or record is flushed as it is written, and table column widths are taken from the
+    first row rather than waiting for a sample of rows. Output that needs the whole result (a json
+    query or jsonc) is still written at the end.
+    """
+    if output_format == OutputFormat.Suppress.value:
+        return
+
+    chunks = None
+    if not isinstance(result_json, (str, bytes)):
+        chunks = result_json
+        if query is None and output_format == OutputFormat.Json.value:
+            stdout = click.get_binary_stream("stdout")
+            for chunk in chunks:
+                stdout.write(chunk)
+                if incremental:
+                    stdout.flush()
+            stdout.write(b"\n")
+            stdout.flush()
+            return
+
+    if output_format in RECORD_OUTPUT_FORMATS or output_format == OutputFormat.Table.value:
+        if query is None and output_format == OutputFormat.NDJson.value:
+            # output the full items rather than the table columns
+            records_query, project = default_table_query, False
+        else:
+            records_query, project = query or default_table_query, True
+        records = None
+        if chunks is not None and records_query is not None:
+            records = _iter_streamed_records(chunks, records_query, project)
+        if records is None:
+            content = json_codec.loads(b"".join(chunks) if chunks is not None else result_json)
+            records = _iter_records(content, records_query, project)
+        if limit is not None:
+            records = itertools.islice(records, limit)
+        if output_format == OutputFormat.Table.value:
+            _output_table(records, sample_size=1 if incremental else None, flush=incremental)
+        else:
+            _output_records(records, output_format, flush=incremental)
+        return
+
+    if query is None and output_format == OutputFormat.Json.value:
+        # No need to parse the response - pass it straight through
+        click.echo(result_json)
+        return
+
+    content = json_codec.loads(b"".join(chunks) if chunks is not None else result_json)
+    if query is not None:
+        content = _compile_query(query).search(content)
 
     if output_format == OutputFormat.Json.value:
-        click.echo(output_json)
+        click.echo(json_codec.dumps(content))
     elif output_format == OutputFormat.JsonC.value:
-        formatted_json = json.dumps(json.loads(output_json), sort_keys=False, indent=2)
-        jsonc = highlight(formatted_json, lexers.JsonLexer(), formatters.TerminalFormatter())
-        click.echo(jsonc)
-    elif output_format == OutputFormat.Table.value:
-        content = json.loads(output_json)
-        if content is not None:
-            columns = []
-            rows = []
-
-            if type(content) is dict:
-                # single item
-                item = content
-                row = []
-                for property_name in item:
-                    columns.append(property_name)
-                    row.append(item[property_name])
-                rows.append(row)
-            else:
-                if len(content) == 0:
-                    # nothing to output
-                    return
-                item = content[0]
-                for property_name in item:
-                    columns.append(property_name)
-                for item in content:
-                    row = []
-                    for property_name in item:
-                        row.append(item[property_name])
-                    rows.append(row)
-
-            click.echo(tabulate(rows, columns))
+        from tre.jsonc import output_jsonc
+        output_jsonc(content)
     else:
         raise click.ClickException(f"Unhandled output format: '{output_format}'")
@@ -0,0 +1,209 @@
+import click
+import os
+import typing as t
+
+from tre.cache import file_lock, get_config_dir, read_json_file, write_json_file_atomic
+
+
+def _store_in_meta(ctx: click.Context, param: click.Parameter, value: t.Any) -> None:
+    if value is not None:
+        ctx.meta[f"tre.{param.name}"] = value
+
+
+def polling_options():
+    """Add the --poll-interval, --max-poll-interval, --wait-timeout and --events options to a command that waits for operations.
+
+    The values are stored in ctx.meta and picked up by PollingPolicy.from_context.
+    """
+    options = [
+        click.option(
+            '--poll-interval',
+            type=click.FloatRange(min=0.1),
+            envvar="TRECLI_POLL_INTERVAL",
+            expose_value=False,
+            callback=_store_in_meta,
+            help="Initial interval (in seconds) between polls when waiting for an operation to complete [default: 1]"),
+        click.option(
+            '--max-poll-interval',
+            type=click.FloatRange(min=0.1),
+            envvar="TRECLI_MAX_POLL_INTERVAL",
+            expose_value=False,
+            callback=_store_in_meta,
+            help="Maximum interval (in seconds) between polls when waiting for an operation to complete [default: 30]"),
+        click.option(
+            '--wait-timeout',
+            type=click.FloatRange(min=0),
+            envvar="TRECLI_WAIT_TIMEOUT",
+            expose_value=False,
+            callback=_store_in_meta,
+            help="Maximum time (in seconds) to wait for an operation to complete [default: no limit]"),
+        click.option(
+            '--events',
+            is_flag=True,
+            default=None,
+            expose_value=False,
+            callback=_store_in_meta,
+            help="Output an NDJSON record for each change in the status of the operation or its steps (instead of the final result)"),
+    ]
+
+    def decorator(f):
+        for option in reversed(options):
+            f = option(f)
+        return f
+    return decorator
+
+
+def follow_options(recursive: bool = False):
+    """Add the --follow and --follow-interval options (and optionally --recursive) to an operations list command"""
+    options = [
+        click.option(
+            '--follow',
+            help="Keep polling the operations, outputting operations that are in progress and then those that are new or change",
+            flag_value=True,
+            default=False),
+        click.option(
+            '--follow-interval',
+            type=click.FloatRange(min=1),
+            default=5,
+            envvar="TRECLI_FOLLOW_INTERVAL",
+            show_default=True,
+            help="Interval (in seconds) between polls with --follow"),
+    ]
+    if recursive:
+        options.append(click.option(
+            '--recursive',
+            help="With --follow, also follow the operations for the child resources (workspace services and user resources)",
+            flag_value=True,
+            default=False))
+
+    def decorator(f):
+        for option in reversed(options):
+            f = option(f)
+        return f
+    return decorator
+
+
+def is_operation_state_terminal(state: str) -> bool:
+    # In the absence of a field on the operation indicating whether it is completed or not,
+    # we maintain a list here.
+    # Note that we test against 'active' states
+    # This way, a new state will be considered terminal (and not a success)
+    # so we avoid a case where waiting for copmletion continues indefinitely
+    # when there is a new state (and we return a non-successful status to
+    # highlight it)
+    return state not in [
+        'deleting',
+        'deploying',
+        'awaiting_action',
+        'invoking_action',
+        'pipeline_deploying',
+        'pipeline_running',
+        'not_deployed',
+        'awaiting_deployment',
+        'awaiting_deletion',
+        'awaiting_update',
+        'updating'
+    ]
+
+
+def is_operation_state_success(state: str) -> bool:
+    return state in [
+        'deleted',
+        'deployed',
+        'action_succeeded',
+        'pipeline_succeeded',
+        'updated'
+    ]
+
+
+class PollingPolicy:
+    """Controls how often an in-progress operation is polled.
+
+    The delay between polls is half of the time spent waiting so far, bounded by interval and
+    max_interval, i.e. fast initial polls followed by exponential backoff up to max_interval.
+    If the operation is expected to take expected_duration seconds (e.g. learned from previous
+    operations by OperationDurations) then the delay is half of the remaining expected time,
+    so that polling is infrequent until the operation is expected to complete and then fast again.
+    Polls that fail with transient errors are retried, up to max_errors consecutive failures.
+    """
+
+    def __init__(self,
+                 interval: float = 1,
+                 max_interval: float = 30,
+                 timeout: t.Optional[float] = None,
+                 expected_duration: t.Optional[float] = None,
+                 max_errors: int = 10):
+        self.interval = interval
+        self.max_interval = max(interval, max_interval)
+        self.timeout = timeout
+        self.expected_duration = expected_duration
+        self.max_errors = max_errors
+
+    @staticmethod
+    def from_context() -> "PollingPolicy":
+        """Create a PollingPolicy from the polling_options for the current command (or the environment)."""
+        ctx = click.get_current_context(silent=True)
+        meta = ctx.meta if ctx is not None else {}
+
+        def get_value(name: str, env_name: str, default: t.Optional[float]) -> t.Optional[float]:
+            if name in meta:
+                return meta[name]
+            value = os.getenv(env_name)
+            return float(value) if value else default
+
+        return PollingPolicy(
+            interval=get_value("tre.poll_interval", "TRECLI_POLL_INTERVAL", 1),
+            max_interval=get_value("tre.max_poll_interval", "TRECLI_MAX_POLL_INTERVAL", 30),
+            timeout=get_value("tre.wait_timeout", "TRECLI_WAIT_TIMEOUT", None),
+        )
+
+    def get_delay(self, elapsed: float) -> float:
+        """Get the delay before the next poll, after waiting for `elapsed` seconds."""
+        if self.expected_duration is not None:
+            # once the expected duration has passed, back off again from that point
+            delay = abs(self.expected_duration - elapsed) / 2
+        else:
+            delay = elapsed / 2
+        return min(self.max_interval, max(self.interval, delay))
+
+
+class OperationDurations:
+    """The typical duration of operations for each action/template, learned from completed operations.
+
+    Durations are stored in ~/.config/tre/operation_durations.json as an exponential moving average.
+    Set TRECLI_POLL_LEARN_DURATIONS=false to disable.
+    """
+
+    def __init__(self, base_url: str, state_file=None, smoothing: float = 0.3):
+        self.base_url = base_url
+        self.enabled = os.getenv("TRECLI_POLL_LEARN_DURATIONS", "true").lower() not in ["0", "false", "no"]
+        self._state_file = state_file or get_config_dir() / "operation_durations.json"
+        self._smoothing = smoothing
+
+    def _get_key(self, operation: dict) -> str:
+        steps = operation.get("steps") or [{}]
+        template_name = steps[0].get("resourceTemplateName", "")
+        return f"{self.base_url}|{operation.get('action', '')}|{template_name}"
+
+    def get_expected_duration(self, operation: dict) -> t.Optional[float]:
+        if not self.enabled:
+            return None
+        return (read_json_file(self._state_file) or {}).get(self._get_key(operation))
+
+    def record(self, operation: dict) -> None:
+        """Record the duration of a successfully completed operation."""
+        if not self.enabled:
+            return
+        created = operation.get("createdWhen")
+        updated = operation.get("updatedWhen")
+        if not isinstance(created, (int, float)) or not isinstance(updated, (int, float)) or updated < created:
+            return
+        duration = updated - created
+        key = self._get_key(operation)
+        with file_lock(self._state_file):
+            durations = read_json_file(self._state_file) or {}
+            previous = durations.get(key)
+            if previous is not None:
+                duration = previous + self._smoothing * (duration - previous)
+            durations[key] = round(duration, 1)
+            write_json_file_atomic(self._state_file, durations)
@@ -0,0 +1,148 @@
+import os
+import random
+import time
+import typing as t
+
+from email.utils import parsedate_to_datetime
+
+from tre.cache import file_lock, get_config_dir, read_json_file, write_json_file_atomic
+
+if t.TYPE_CHECKING:
+    from httpx import Response
+
+RETRYABLE_STATUS_CODES = [429, 502, 503, 504]
+
+
+def _get_retry_after(response: "Response") -> t.Optional[float]:
+    """Get the delay (in seconds) requested by a Retry-After header (delay-seconds or HTTP-date)."""
+    retry_after = response.headers.get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Retry policy for API calls using exponential backoff with full jitter.
+
+    Only idempotent requests are retried: GET/HEAD/OPTIONS, and PATCH requests guarded by an etag.
+    Retry-After headers are honoured (up to max_backoff).
+    """
+
+    def __init__(self,
+                 max_attempts: int = 5,
+                 backoff_base: float = 0.5,
+                 max_backoff: float = 30,
+                 max_total_backoff: float = 120):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.max_total_backoff = max_total_backoff
+
+    @staticmethod
+    def from_env() -> "RetryPolicy":
+        return RetryPolicy(
+            max_attempts=int(os.getenv("TRECLI_RETRY_MAX_ATTEMPTS", "5")),
+            backoff_base=float(os.getenv("TRECLI_RETRY_BACKOFF_BASE", "0.5")),
+            max_backoff=float(os.getenv("TRECLI_RETRY_MAX_BACKOFF", "30")),
+            max_total_backoff=float(os.getenv("TRECLI_RETRY_MAX_TOTAL_BACKOFF", "120")),
+        )
+
+    def is_idempotent_request(self, method: str, headers: "dict[str, str]") -> bool:
+        method = method.upper()
+        if method in ["GET", "HEAD", "OPTIONS"]:
+            return True
+        if method == "PATCH":
+            header_names = [name.lower() for name in headers]
+            return "etag" in header_names or "if-match" in header_names
+        return False
+
+    def is_retryable_response(self, response: "Response") -> bool:
+        return response.status_code in RETRYABLE_STATUS_CODES
+
+    def get_delay(self, attempt: int, response: "Response" = None) -> float:
+        """Get the delay before the retry following the given (zero-based) attempt."""
+        if response is not None:
+            retry_after = _get_retry_after(response)
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff_base * (2 ** attempt)))
+
+    def can_retry(self, attempt: int, total_backoff: float, delay: float) -> bool:
+        return attempt + 1 < self.max_attempts and total_backoff + delay <= self.max_total_backoff
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, base_url: str, open_for: float):
+        super().__init__(f"The API at {base_url} is failing - not sending requests for another {open_for:.0f}s")
+        self.open_for = open_for
+
+
+class CircuitBreaker:
+    """Fail fast when an API is repeatedly failing.
+
+    The state is shared between processes (via ~/.config/tre/circuit_breaker.json) so that
+    scripts running many commands back off as a whole. After `threshold` consecutive failed
+    calls the circuit opens for `cooldown` seconds, during which calls fail immediately.
+    """
+
+    def __init__(self, base_url: str, threshold: int = None, cooldown: float = None, state_file=None):
+        self.base_url = base_url
+        self.threshold = threshold if threshold is not None else int(os.getenv("TRECLI_CIRCUIT_BREAKER_THRESHOLD", "5"))
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv("TRECLI_CIRCUIT_BREAKER_COOLDOWN", "30"))
+        self._state_file = state_file or get_config_dir() / "circuit_breaker.json"
+        self._has_failures = None
+
+    def _read_state(self) -> dict:
+        return (read_json_file(self._state_file) or {}).get(self.base_url, {"failures": 0, "open_until": 0})
+
+    def _update_state(self, update: t.Callable[[dict], dict]) -> None:
+        with file_lock(self._state_file):
+            states = read_json_file(self._state_file) or {}
+            states[self.base_url] = update(states.get(self.base_url, {"failures": 0, "open_until": 0}))
+            write_json_file_atomic(self._state_file, states)
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if calls should not currently be made."""
+        if self.threshold <= 0:
+            return
+        state = self._read_state()
+        self._has_failures = state["failures"] > 0
+        open_for = state["open_until"] - time.time()
+        if open_for > 0:
+            raise CircuitOpenError(self.base_url, open_for)
+
+    def record_success(self) -> None:
+        if self.threshold <= 0 or self._has_failures is False:
+            return
+        self._update_state(lambda state: {"failures": 0, "open_until": 0})
+        self._has_failures = False
+
+    def record_failure(self) -> None:
+        if self.threshold <= 0:
+            return
+
+        def update(state):
+            failures = state["failures"] + 1
+            open_until = state["open_until"]
+            if failures >= self.threshold:
+                open_until = time.time() + self.cooldown
+                # half-open after the cooldown: a single further failure re-opens the circuit
+                failures = self.threshold - 1
+            return {"failures": failures, "open_until": open_until}
+
+        self._update_state(update)
+        self._has_failures = True
+
+    @staticmethod
+    def clear(state_file=None) -> None:
+        state_file = state_file or get_config_dir() / "circuit_breaker.json"
+        with file_lock(state_file):
+            if state_file.exists():
+                state_file.unlink()
@@ -0,0 +1,123 @@
+import base64
+import json
+import os
+import time
+import typing as t
+
+from logging import Logger
+
+from tre.cache import file_lock, get_config_dir, read_json_file, write_json_file_atomic
+
+
+def get_token_refresh_margin() -> int:
+    """Number of seconds before expiry that a cached token is treated as expired."""
+    return int(os.getenv("TRECLI_TOKEN_REFRESH_MARGIN", "300"))
+
+
+def get_jwt_expiry(token: str) -> t.Optional[float]:
+    """Decode the `exp` claim from a JWT access token (without validating the signature)."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def get_token_expiry(token_response: dict) -> float:
+    """Determine the absolute expiry time for a token endpoint response.
+
+    Uses `expires_in` if present, falling back to the `exp` claim of the token itself.
+    """
+    expires_in = token_response.get("expires_in")
+    if expires_in is not None:
+        return time.time() + float(expires_in)
+    expiry = get_jwt_expiry(token_response["access_token"])
+    # if we can't determine the expiry then don't cache the token
+    return expiry if expiry is not None else time.time()
+
+
+class AccessTokenCache:
+    """Cache of access tokens held in memory and in ~/.config/tre/access_token_cache.json
+
+    Entries are keyed by (tenant, client id, scope) and are considered valid until
+    `TRECLI_TOKEN_REFRESH_MARGIN` seconds (default 300) before they expire.
+    """
+
+    def __init__(self, cache_file=None):
+        self._cache_file = cache_file or get_config_dir() / "access_token_cache.json"
+        self._tokens: "dict[str, dict]" = {}
+
+    @staticmethod
+    def get_key(aad_tenant_id: str, client_id: str, scope: str) -> str:
+        return f"{aad_tenant_id}|{client_id}|{scope}"
+
+    def _is_valid(self, entry) -> bool:
+        return entry is not None and entry["expires_on"] - get_token_refresh_margin() > time.time()
+
+    def _read_from_file(self, key: str) -> t.Optional[dict]:
+        entries = read_json_file(self._cache_file) or {}
+        entry = entries.get(key)
+        if self._is_valid(entry):
+            self._tokens[key] = entry
+            return entry
+        return None
+
+    def _write_to_file(self, key: str, entry: dict) -> None:
+        entries = read_json_file(self._cache_file) or {}
+        now = time.time()
+        # drop expired entries while we're here
+        entries = {k: v for k, v in entries.items() if v.get("expires_on", 0) > now}
+        entries[key] = entry
+        write_json_file_atomic(self._cache_file, entries)
+
+    def get_token(self, key: str) -> t.Optional[str]:
+        entry = self._tokens.get(key)
+        if not self._is_valid(entry):
+            entry = self._read_from_file(key)
+        return entry["access_token"] if entry else None
+
+    def get_or_acquire_token(self, log: Logger, key: str, acquire_token: t.Callable[[], dict]) -> str:
+        """Get a cached token or call acquire_token to get a new token response.
+
+        The on-disk cache is locked while acquiring a token so that concurrent
+        processes wait for and reuse the new token rather than each requesting one.
+        """
+        token = self.get_token(key)
+        if token is not None:
+            log.debug("Using cached access token")
+            return token
+
+        with file_lock(self._cache_file):
+            # another process may have refreshed the token while we waited for the lock
+            entry = self._read_from_file(key)
+            if entry is not None:
+                log.debug("Using access token cached by another process")
+                return entry["access_token"]
+
+            token_response = acquire_token()
+            entry = {
+                "access_token": token_response["access_token"],
+                "expires_on": get_token_expiry(token_response),
+            }
+            self._tokens[key] = entry
+            self._write_to_file(key, entry)
+            return entry["access_token"]
+
+    def clear(self) -> None:
+        self._tokens = {}
+        with file_lock(self._cache_file):
+            if self._cache_file.exists():
+                self._cache_file.unlink()
+
+
+_access_token_cache = None
+
+
+def get_access_token_cache() -> AccessTokenCache:
+    """Get the process-wide AccessTokenCache."""
+    global _access_token_cache
+    if _access_token_cache is None:
+        _access_token_cache = AccessTokenCache()
+    return _access_token_cache
@@ -0,0 +1,57 @@
+import os
+import time
+import typing as t
+
+from tre.cache import file_lock, get_config_dir, read_json_file, write_json_file_atomic
+
+
+def get_workspace_scope_cache_ttl() -> int:
+    """Number of seconds a cached workspace scope is used for before being looked up again."""
+    return int(os.getenv("TRECLI_WORKSPACE_SCOPE_CACHE_TTL", str(24 * 60 * 60)))
+
+
+class WorkspaceScopeCache:
+    """Cache of workspace id -> scope_id stored in ~/.config/tre/workspace_scope_cache.json"""
+
+    def __init__(self, cache_file=None):
+        self._cache_file = cache_file or get_config_dir() / "workspace_scope_cache.json"
+
+    @staticmethod
+    def _get_key(base_url: str, workspace_id: str) -> str:
+        return f"{base_url}|{workspace_id}"
+
+    def get_scope(self, base_url: str, workspace_id: str) -> t.Optional[str]:
+        entries = read_json_file(self._cache_file) or {}
+        entry = entries.get(self._get_key(base_url, workspace_id))
+        if entry is None or entry["cached_at"] + get_workspace_scope_cache_ttl() < time.time():
+            return None
+        return entry["scope_id"]
+
+    def set_scopes(self, base_url: str, workspace_scopes: "dict[str, str]") -> None:
+        """Store the scope_id for each workspace id in workspace_scopes."""
+        with file_lock(self._cache_file):
+            entries = read_json_file(self._cache_file) or {}
+            now = time.time()
+            for workspace_id, scope_id in workspace_scopes.items():
+                entries[self._get_key(base_url, workspace_id)] = {"scope_id": scope_id, "cached_at": now}
+            write_json_file_atomic(self._cache_file, entries)
+
+    def set_scope(self, base_url: str, workspace_id: str, scope_id: str) -> None:
+        self.set_scopes(base_url, {workspace_id: scope_id})
+
+    def invalidate_scope(self, base_url: str, scope_id: str) -> None:
+        """Remove any entries for the given scope (scope_id may include a suffix such as /user_impersonation)"""
+        with file_lock(self._cache_file):
+            entries = read_json_file(self._cache_file) or {}
+            prefix = f"{base_url}|"
+            remaining = {
+                key: entry for key, entry in entries.items()
+                if not (key.startswith(prefix) and scope_id.startswith(entry["scope_id"]))
+            }
+            if len(remaining) != len(entries):
+                write_json_file_atomic(self._cache_file, remaining)
+
+    def clear(self) -> None:
+        with file_lock(self._cache_file):
+            if self._cache_file.exists():
+                self._cache_file.unlink()